@@ -0,0 +1,91 @@
+"""Batch scoring of screening CSVs with the smoking & drinking models.
+
+    python batch_predict.py screening.csv -o predictions.csv [--user USERNAME]
+"""
+import argparse
+import sys
+
+from features import drinking_status, habit_inputs, normalize_sex, smoking_status
+from instrumentation import timed
+from lazy_import import lazy_import
+from model_registry import get_registry
+
+pd = lazy_import("pandas")
+
+SMOKING_MODEL_PATH = 'xgb_best_model_smk.pkl'
+DRINKING_MODEL_PATH = 'xgb_best_model_drink.pkl'
+
+REQUIRED_COLUMNS = ['age', 'sex', 'height', 'weight', 'gamma_GTP']
+OPTIONAL_COLUMNS = ['SBP', 'DBP', 'BLDS']
+CHUNK_SIZE = 10000
+
+
+def load_habit_models():
+    registry = get_registry()
+    return registry.get(SMOKING_MODEL_PATH), registry.get(DRINKING_MODEL_PATH)
+
+
+def _normalize_columns(df):
+    """Accepts column names in any case (e.g. ``gamma_gtp``, ``sbp``)."""
+    canonical = {name.lower(): name for name in REQUIRED_COLUMNS + OPTIONAL_COLUMNS}
+    df = df.rename(columns=lambda name: canonical.get(str(name).strip().lower(), name))
+    missing = [name for name in REQUIRED_COLUMNS if name not in df.columns]
+    if missing:
+        raise ValueError(f"Kolom wajib tidak ditemukan: {', '.join(missing)}")
+    for name in OPTIONAL_COLUMNS:
+        if name not in df.columns:
+            df[name] = None
+    return df
+
+
+@timed('predict.score_frame')
+def score_frame(df, smoking_model, drinking_model):
+    """Adds prediction columns to ``df`` using one vectorized predict call per model."""
+    df = _normalize_columns(df)
+    df['sex'] = normalize_sex(df['sex']).to_numpy()
+    smoking_X, drinking_X = habit_inputs(df)
+    df['smoking_prediction'] = smoking_model.predict(smoking_X)
+    df['drinking_prediction'] = drinking_model.predict(drinking_X)
+    df['smoking_status'] = df['smoking_prediction'].map(smoking_status)
+    df['drinking_status'] = df['drinking_prediction'].map(drinking_status)
+    return df
+
+
+def score_csv(source, smoking_model, drinking_model, chunksize=CHUNK_SIZE):
+    """Yields scored DataFrame chunks of ``source`` (a path or file-like object)."""
+    for chunk in pd.read_csv(source, chunksize=chunksize):
+        yield score_frame(chunk, smoking_model, drinking_model)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a screening CSV with the smoking & drinking models.")
+    parser.add_argument('input', help="CSV file to score ('-' for stdin)")
+    parser.add_argument('-o', '--output', default='-', help="where to write the scored CSV (default: stdout)")
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--user', help="also save the results to this user's health history")
+    args = parser.parse_args(argv)
+
+    smoking_model, drinking_model = load_habit_models()
+    source = sys.stdin if args.input == '-' else args.input
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', newline='')
+    scored_chunks = []
+    rows = 0
+    try:
+        for index, scored in enumerate(score_csv(source, smoking_model, drinking_model, args.chunksize)):
+            scored.to_csv(out, index=False, header=index == 0)
+            rows += len(scored)
+            if args.user:
+                scored_chunks.append(scored)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if args.user:
+        from user_manager import add_health_data_bulk, init_db
+        init_db()
+        add_health_data_bulk(args.user, pd.concat(scored_chunks) if scored_chunks else [])
+    print(f"Scored {rows} rows" + (f", saved to {args.user}'s history" if args.user else ""), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Insert throughput for health_data: add_health_data per row vs add_health_data_bulk.
+
+Each method writes --rows rows for its own user into a fresh database built with
+init_db (WAL, synchronous=NORMAL). The per-row path commits once per row; the bulk
+paths use one executemany in a single transaction, fed with tuples or a DataFrame.
+
+    python benchmarks/bench_bulk_insert.py --rows 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import user_manager  # noqa: E402
+from synthetic import make_health_frame  # noqa: E402
+
+
+def prediction_frame(rows):
+    df = make_health_frame(rows)
+    return df.assign(smoking_prediction=df['smoking'] % 2, drinking_prediction=(df['drinking'] == 'Y').astype(int))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    frame = prediction_frame(args.rows)
+    tuples = list(user_manager._record_tuples(frame))
+
+    def per_row(username):
+        for record in tuples:
+            user_manager.add_health_data(username, *record)
+
+    methods = {
+        "add_health_data (per row)": per_row,
+        "bulk, tuples": lambda username: user_manager.add_health_data_bulk(username, tuples),
+        "bulk, DataFrame": lambda username: user_manager.add_health_data_bulk(username, frame),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        user_manager.DB_PATH = os.path.join(tmp, "bench.db")
+        user_manager.init_db()
+        print(f"{'method':<28}{'rows':>10}{'seconds':>10}{'rows/s':>12}")
+        for index, (name, insert) in enumerate(methods.items()):
+            username = f"bench{index}"
+            start = time.perf_counter()
+            insert(username)
+            seconds = time.perf_counter() - start
+            with user_manager.get_connection() as conn:
+                stored, distinct = conn.execute("SELECT COUNT(*), COUNT(DISTINCT timestamp) FROM health_data "
+                                                "WHERE username = ?", (username,)).fetchone()
+            assert stored == distinct == len(tuples), (name, stored, distinct)
+            print(f"{name:<28}{stored:>10}{seconds:>10.2f}{stored / seconds:>12.0f}")
+        user_manager.close_connections()
+
+
+if __name__ == "__main__":
+    main()
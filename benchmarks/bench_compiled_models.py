@@ -0,0 +1,121 @@
+"""Pickled models vs their NumPy-only .npz exports: cold start, memory and throughput.
+
+Cold start runs in a fresh interpreter per format: import the registry, load all
+seven models, report wall time and peak RSS. Throughput compares the library
+predict with the compiled evaluator for one row and for a --batch row batch.
+
+Uses the *.pkl files from --model-dir; disease forests are trained on
+synthetic data when their files are missing.
+
+    python benchmarks/bench_compiled_models.py --batch 10000
+"""
+import argparse
+import json
+import os
+import pickle
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import export_models  # noqa: E402
+from batch_predict import DRINKING_MODEL_PATH, SMOKING_MODEL_PATH  # noqa: E402
+from features import DISEASE_MODEL_FILES, habit_inputs  # noqa: E402
+from synthetic import disease_features, make_health_frame, train_disease_models  # noqa: E402
+
+COLD_START = """
+import json, sys, time, warnings
+warnings.filterwarnings("ignore")
+start = time.perf_counter()
+
+def peak_rss():
+    # ru_maxrss survives exec and would report the parent's peak; VmHWM does not.
+    with open("/proc/self/status") as status:
+        return next(int(line.split()[1]) * 1024 for line in status if line.startswith("VmHWM"))
+
+sys.path.insert(0, {root!r})
+from model_registry import get_registry
+registry = get_registry()
+for path in {paths!r}:
+    registry.get(path)
+print(json.dumps({{"seconds": time.perf_counter() - start,
+                  "max_rss": peak_rss(),
+                  "libraries": sorted({{"xgboost", "sklearn"}} & set(sys.modules))}}))
+"""
+
+
+def cold_start(model_dir, repeats):
+    script = COLD_START.format(root=ROOT, paths=export_models.MODEL_FILES)
+    runs = [json.loads(subprocess.run([sys.executable, "-c", script], cwd=model_dir, check=True,
+                                      capture_output=True, text=True).stdout) for _ in range(repeats)]
+    return statistics.median(run["seconds"] for run in runs), runs[0]["max_rss"], runs[0]["libraries"]
+
+
+def per_call(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-dir", default=ROOT)
+    parser.add_argument("--batch", type=int, default=10000)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--cold-starts", type=int, default=3)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pickle_dir, compiled_dir = os.path.join(tmp, "pkl"), os.path.join(tmp, "npz")
+        os.makedirs(pickle_dir)
+        for filename in (SMOKING_MODEL_PATH, DRINKING_MODEL_PATH):
+            shutil.copy(os.path.join(args.model_dir, filename), pickle_dir)
+        disease_paths = [os.path.join(args.model_dir, filename) for filename in DISEASE_MODEL_FILES.values()]
+        if all(os.path.exists(path) for path in disease_paths):
+            for path in disease_paths:
+                shutil.copy(path, pickle_dir)
+        else:
+            for filename, model in train_disease_models().items():
+                with open(os.path.join(pickle_dir, filename), "wb") as file:
+                    pickle.dump(model, file)
+        shutil.copytree(pickle_dir, compiled_dir)
+        if export_models.main(["--model-dir", compiled_dir, "--check-rows", "2000"]):
+            sys.exit("export failed")
+        print()
+
+        print(f"{'cold start (import + load 7 models)':<40}{'seconds':>10}{'peak RSS MB':>13}  libraries imported")
+        for label, directory in (("pickles", pickle_dir), ("npz", compiled_dir)):
+            seconds, rss, libraries = cold_start(directory, args.cold_starts)
+            print(f"{label:<40}{seconds:>10.2f}{rss / 1e6:>13.0f}  {', '.join(libraries) or '-'}")
+        print()
+
+        df = make_health_frame(args.batch, seed=2)
+        smoking_X, drinking_X = habit_inputs(df.assign(sex=df["sex"].map({"Male": "Pria", "Female": "Wanita"})))
+        disease_X = disease_features(df)
+        inputs = {SMOKING_MODEL_PATH: smoking_X, DRINKING_MODEL_PATH: drinking_X}
+        inputs.update({filename: disease_X for filename in DISEASE_MODEL_FILES.values()})
+
+        print(f"{'model':<34}{'1 row: pkl ms':>15}{'npz ms':>9}{f'{args.batch} rows: pkl rows/s':>26}{'npz rows/s':>13}")
+        for filename, X in inputs.items():
+            with open(os.path.join(pickle_dir, filename), "rb") as file:
+                model = pickle.load(file)
+            compiled = export_models.compile_model(model)
+            one = X.iloc[:1]
+            single = [per_call(lambda: model.predict(one), args.repeats), per_call(lambda: compiled.predict(one), args.repeats)]
+            batch = [per_call(lambda: model.predict(X), 3), per_call(lambda: compiled.predict(X), 3)]
+            print(f"{filename:<34}{single[0] * 1000:>15.2f}{single[1] * 1000:>9.2f}"
+                  f"{len(X) / batch[0]:>26.0f}{len(X) / batch[1]:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Cost of the Dashboard's data export per rerun, and of preparing it in each format.
+
+Before, every rerun serialized the filtered frame with to_csv and encoded it
+for the download button. Now a rerun only hashes the filter and looks the
+export up in the cache; serializing happens once, when "Siapkan Unduhan" is
+pressed. Peak memory is the tracemalloc peak of the serialization.
+
+    python benchmarks/bench_dashboard_export.py --rows 1000 10000 100000
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dashboard_stats import add_derived_columns, prepare_global_frame  # noqa: E402
+from data_export import ExportCache, available_formats, export_frame, export_key  # noqa: E402
+from synthetic import make_health_frame  # noqa: E402
+
+
+def old_rerun(df):
+    csv_buffer = io.StringIO()
+    df.to_csv(csv_buffer, index=False)
+    return csv_buffer.getvalue().encode('utf-8')
+
+
+def median_seconds(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def peak_bytes(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8}  {'per rerun':<22}{'ms':>9}")
+    frames = {}
+    for n_rows in args.rows:
+        df = frames[n_rows] = add_derived_columns(prepare_global_frame(make_health_frame(n_rows)))
+        cache = ExportCache()
+        key = export_key(scope='bench', rows=len(df), format='csv')
+        cache.put(key, 'bench.csv', export_frame(df))
+        cached = median_seconds(lambda: cache.get(export_key(scope='bench', rows=len(df), format='csv')), 100)
+        print(f"{n_rows:>8}  {'to_csv + encode (old)':<22}{median_seconds(lambda: old_rerun(df), args.repeats) * 1000:>9.1f}")
+        print(f"{n_rows:>8}  {'cached export':<22}{cached * 1000:>9.3f}")
+
+    print(f"\n{'rows':>8}  {'prepare':<22}{'ms':>9}{'KB':>10}{'peak MB':>10}")
+    for n_rows, df in frames.items():
+        runs = {'to_csv + encode (old)': lambda: old_rerun(df)}
+        for fmt in available_formats():
+            runs[fmt] = lambda fmt=fmt: export_frame(df, fmt)
+        for label, run in runs.items():
+            seconds = median_seconds(run, args.repeats)
+            size = len(run())
+            print(f"{n_rows:>8}  {label:<22}{seconds * 1000:>9.1f}{size / 1024:>10.0f}{peak_bytes(run) / 2**20:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
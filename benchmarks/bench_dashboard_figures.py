@@ -0,0 +1,74 @@
+"""Serialized size and build time of the Dashboard's distribution charts, raw points vs precomputed.
+
+For --rows synthetic dataset rows, builds the box plot and the histogram of
+--metric two ways and serializes each figure as st.plotly_chart does:
+
+  raw:         px.box / px.histogram over every row (what the browser used to receive)
+  precomputed: summarize_box / summarize_histogram, then dashboard_figures
+
+"aggregate ms" is the summarize_* call (all metrics at once); the global
+dashboard reads it from its store instead of running it per render. Browser-side rendering is not
+measured here; it scales with the serialized points.
+
+    python benchmarks/bench_dashboard_figures.py --rows 1000 10000 100000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import plotly.express as px  # noqa: E402
+import plotly.io as pio  # noqa: E402
+
+from dashboard_figures import box_figure, histogram_figure  # noqa: E402
+from dashboard_stats import HISTOGRAM_BINS, add_derived_columns, prepare_global_frame, summarize_box, summarize_histogram  # noqa: E402
+from synthetic import make_health_frame  # noqa: E402
+
+
+def median_seconds(fn, repeats):
+    samples, result = [], None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+def serialized(build, repeats):
+    """(build + to_json seconds, payload bytes) for the figure returned by ``build``."""
+    seconds, payload = median_seconds(lambda: pio.to_json(build(), validate=False), repeats)
+    return seconds, len(payload.encode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--metric", default="gamma_GTP")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    metric = args.metric
+
+    print(f"{'rows':>8}  {'chart':<10}{'raw KB':>10}{'raw ms':>9}{'precomp KB':>12}{'precomp ms':>12}{'aggregate ms':>14}")
+    for n_rows in args.rows:
+        df = add_derived_columns(prepare_global_frame(make_health_frame(n_rows)))
+        charts = {
+            "box": (lambda: px.box(df, x='smoking', y=metric, color='drinking'),
+                    lambda: summarize_box(df)[metric],
+                    lambda groups: box_figure(groups, metric)),
+            "histogram": (lambda: px.histogram(df, x=metric, color='smoking', nbins=HISTOGRAM_BINS),
+                          lambda: summarize_histogram(df)[metric],
+                          lambda histogram: histogram_figure(histogram, metric)),
+        }
+        for chart, (raw_figure, aggregate, precomputed_figure) in charts.items():
+            raw_seconds, raw_bytes = serialized(raw_figure, args.repeats)
+            aggregate_seconds, stats = median_seconds(aggregate, args.repeats)
+            figure_seconds, figure_bytes = serialized(lambda: precomputed_figure(stats), args.repeats)
+            print(f"{n_rows:>8}  {chart:<10}{raw_bytes / 1024:>10.1f}{raw_seconds * 1000:>9.1f}"
+                  f"{figure_bytes / 1024:>12.1f}{figure_seconds * 1000:>12.1f}{aggregate_seconds * 1000:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
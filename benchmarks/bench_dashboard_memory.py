@@ -0,0 +1,98 @@
+"""Dashboard memory per session: a preprocessed global frame per rerun vs one shared lean frame.
+
+  per session:  what the Dashboard did for every rerun with raw data loaded:
+                load_dataset, prepare_global_frame and add_derived_columns
+                (float64 numbers, object strings for sex/smoking/drinking)
+  shared lean:  dashboard_stats.shared_global_frame (float32/int16,
+                categoricals, read-only, built once per process)
+
+Memory is measured with tracemalloc while --sessions frames are held at once,
+as concurrent reruns would. The lean frame is checked to hold the same values
+(floats to float32 precision).
+
+    python benchmarks/bench_dashboard_memory.py --rows 100000 --sessions 1 4 16
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dashboard_stats  # noqa: E402
+from data_cache import load_dataset  # noqa: E402
+from synthetic import make_health_frame  # noqa: E402
+
+
+def per_session_frame(csv_path):
+    return dashboard_stats.add_derived_columns(dashboard_stats.prepare_global_frame(load_dataset(csv_path)))
+
+
+def held(build, sessions):
+    """Seconds per call and traced bytes still allocated while ``sessions`` results are held."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    frames = [build() for _ in range(sessions)]
+    seconds = (time.perf_counter() - start) / sessions
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del frames
+    return seconds, current
+
+
+def check_same(expected, lean):
+    assert list(expected.columns) == list(lean.columns)
+    for name in expected.columns:
+        if expected[name].dtype.kind == 'f' or lean[name].dtype.kind in 'fi':
+            assert np.allclose(expected[name].to_numpy(dtype=float), lean[name].to_numpy(dtype=float),
+                               rtol=1e-6, equal_nan=True), name
+        else:
+            assert expected[name].astype(object).equals(lean[name].astype(object)), name
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = args.csv
+        if csv_path is None:
+            csv_path = os.path.join(tmp, dashboard_stats.DATASET_CSV)
+            make_health_frame(args.rows).to_csv(csv_path, index=False)
+        per_session_frame(csv_path)  # builds the column cache
+
+        start = time.perf_counter()
+        lean = dashboard_stats.shared_global_frame(csv_path)
+        first_build = time.perf_counter() - start
+        expected = per_session_frame(csv_path)
+        check_same(expected, lean)
+        old_bytes = int(expected.memory_usage(index=False, deep=True).sum())
+        lean_bytes = int(lean.memory_usage(index=False, deep=True).sum())
+        del expected
+
+        print(f"{len(lean)} rows, values identical; frame {old_bytes / 1e6:.1f} MB -> {lean_bytes / 1e6:.1f} MB "
+              f"({lean_bytes / old_bytes:.0%}), first shared build {first_build * 1000:.0f} ms")
+        print(f"{'dtype':<12}{'columns':>8}")
+        for dtype, count in pd.Series([str(dtype) for dtype in lean.dtypes]).value_counts().items():
+            print(f"{dtype:<12}{count:>8}")
+
+        print(f"\n{'sessions':<10}{'per session ms':>16}{'MB':>10}{'shared ms':>12}{'MB':>10}")
+        for sessions in args.sessions:
+            old_seconds, old_held = held(lambda: per_session_frame(csv_path), sessions)
+            new_seconds, new_held = held(lambda: dashboard_stats.shared_global_frame(csv_path), sessions)
+            # The shared frame was allocated before tracing started; count it once.
+            new_held += lean_bytes
+            print(f"{sessions:<10}{old_seconds * 1000:>16.1f}{old_held / 1e6:>10.1f}"
+                  f"{new_seconds * 1000:>12.3f}{new_held / 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
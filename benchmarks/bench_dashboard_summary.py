@@ -0,0 +1,92 @@
+"""Dashboard aggregates from the health_summary table vs recomputing them from the rows.
+
+For users with --sizes rows of history, times what a dashboard rerun needs for
+its gauges, pies and bars:
+
+  rows:    read every row, build the frame, derive BMI/age groups, summarize
+  summary: read the user's health_summary cells, summarize_cells
+
+The box plot still needs the rows; "box ms" is what that part alone costs.
+Also reports what the summary upsert adds to each add_health_data call.
+
+    python benchmarks/bench_dashboard_summary.py --sizes 1000 10000 100000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd  # noqa: E402
+
+import user_manager  # noqa: E402
+from bench_bulk_insert import prediction_frame  # noqa: E402
+from dashboard_stats import add_derived_columns, summarize, summarize_box, summarize_cells  # noqa: E402
+
+COLUMNS = ['age', 'sex', 'height', 'weight', 'gamma_GTP', 'smoking', 'drinking', 'SBP', 'DBP', 'BLDS', 'timestamp']
+
+
+def load_frame(username):
+    return add_derived_columns(pd.DataFrame(user_manager.get_health_data_range(username), columns=COLUMNS))
+
+
+def from_summary(username):
+    return summarize_cells(user_manager.get_health_summary(username))
+
+
+def median_seconds(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def insert_seconds(username, rows, with_summary):
+    record = tuple(rows.iloc[0][list(user_manager.HEALTH_RECORD_FIELDS)])
+    samples = []
+    for _ in range(200):
+        start = time.perf_counter()
+        if with_summary:
+            user_manager.add_health_data(username, *record)
+        else:  # the insert alone, as before health_summary existed
+            with user_manager.get_connection() as conn, user_manager._write_transaction(conn):
+                timestamp = next(user_manager._allocate_timestamps(conn, username))
+                conn.execute(user_manager.HEALTH_DATA_INSERT, (username, timestamp, *record))
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        user_manager.DB_PATH = os.path.join(tmp, "users.db")
+        user_manager.init_db()
+        print(f"{'history rows':>12}{'cells':>8}{'rows ms':>10}{'summary ms':>12}{'speed-up':>10}{'box ms':>10}")
+        for size in args.sizes:
+            username = f"user{size}"
+            rows = prediction_frame(size)
+            user_manager.add_health_data_bulk(username, rows)
+            cells = len(user_manager.get_health_summary(username))
+            rows_ms = median_seconds(lambda: summarize(load_frame(username)), args.repeats) * 1000
+            summary_ms = median_seconds(lambda: from_summary(username), args.repeats) * 1000
+            box_ms = median_seconds(lambda: summarize_box(load_frame(username)), args.repeats) * 1000
+            print(f"{size:>12}{cells:>8}{rows_ms:>10.1f}{summary_ms:>12.2f}{rows_ms / summary_ms:>9.0f}x{box_ms:>10.1f}")
+
+        rows = prediction_frame(1)
+        plain = insert_seconds("insert-plain", rows, with_summary=False) * 1000
+        summarized = insert_seconds("insert-summary", rows, with_summary=True) * 1000
+        print(f"\nadd_health_data: {plain:.3f} ms without the summary upsert, {summarized:.3f} ms with it")
+        user_manager.close_connections()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Load time and memory: pd.read_csv vs the columnar .npy cache (all columns and a 4-column projection).
+
+    python benchmarks/bench_data_cache.py --csv smoking_drinkin_100k.csv
+    python benchmarks/bench_data_cache.py --rows 100000   # generate a synthetic CSV
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_cache  # noqa: E402
+from synthetic import make_health_frame  # noqa: E402
+
+GAUGE_COLUMNS = ['SBP', 'DBP', 'smoking', 'drinking']
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def frame_bytes(df):
+    """Heap bytes held by the frame; memory-mapped columns count as zero."""
+    total = 0
+    for name in df.columns:
+        values = df[name].values
+        base = getattr(values, 'base', None)
+        if isinstance(values, np.memmap) or isinstance(base, np.memmap):
+            continue
+        total += int(df[name].memory_usage(index=False, deep=True))
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv")
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = args.csv
+        if csv_path is None:
+            csv_path = os.path.join(tmp, data_cache.DATASET_CSV)
+            make_health_frame(args.rows).to_csv(csv_path, index=False)
+        cache_root = os.path.join(tmp, 'cache')
+
+        rows = [
+            ("pd.read_csv", *timed(lambda: pd.read_csv(csv_path))),
+            ("cache build (cold)", *timed(lambda: data_cache.load_dataset(csv_path, cache_root=cache_root))),
+            ("cache, all columns", *timed(lambda: data_cache.load_dataset(csv_path, cache_root=cache_root))),
+            ("cache, 4 columns", *timed(lambda: data_cache.load_dataset(csv_path, columns=GAUGE_COLUMNS, cache_root=cache_root))),
+            ("cache, 4 columns mmap", *timed(lambda: data_cache.load_dataset(csv_path, columns=GAUGE_COLUMNS, mmap=True,
+                                                                             cache_root=cache_root))),
+        ]
+
+    print(f"{'load':<24}{'ms':>10}{'heap MB':>10}")
+    for name, seconds, df in rows:
+        print(f"{name:<24}{seconds * 1000:>10.1f}{frame_bytes(df) / 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Per-request latency: five sequential RandomForest.predict calls vs one ForestEnsemble pass.
+
+Uses the real *_risk_model.pkl files from --model-dir when present, otherwise
+trains stand-in forests on synthetic data first.
+
+    python benchmarks/bench_disease_engine.py --requests 200 --batch 1000
+"""
+import argparse
+import os
+import pickle
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tree_engine import ForestEnsemble  # noqa: E402
+from synthetic import DISEASE_RISKS, disease_features, make_health_frame, train_disease_models  # noqa: E402
+
+
+def load_models(model_dir):
+    paths = [os.path.join(model_dir, filename) for filename in DISEASE_RISKS.values()]
+    if all(os.path.exists(path) for path in paths):
+        models = {}
+        for path in paths:
+            with open(path, 'rb') as file:
+                models[os.path.basename(path)] = pickle.load(file)
+        return models, "pickled models"
+    return train_disease_models(), "synthetic stand-in models"
+
+
+def time_per_call(fn, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-dir", default=".")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    models, source = load_models(args.model_dir)
+    start = time.perf_counter()
+    engine = ForestEnsemble.from_forests(models)
+    compile_seconds = time.perf_counter() - start
+
+    X = disease_features(make_health_frame(args.batch, seed=7))
+    single = X.iloc[[0]]
+
+    def loop(rows):
+        return {name: model.predict(rows) for name, model in models.items()}
+
+    # Same labels and probabilities as the per-model loop.
+    labels, probas = engine.predict_with_proba(X)
+    for name, model in models.items():
+        assert np.array_equal(labels[name], model.predict(X)), name
+        assert np.array_equal(probas[name], model.predict_proba(X)), name
+
+    loop_single = time_per_call(lambda: loop(single), args.requests)
+    engine_single = time_per_call(lambda: engine.predict_with_proba(single), args.requests)
+    loop_batch = time_per_call(lambda: loop(X), 3)
+    engine_batch = time_per_call(lambda: engine.predict_with_proba(X), 3)
+
+    print(f"{source}: {len(engine.roots)} trees, {engine.feature.size} nodes, compiled in {compile_seconds * 1000:.1f} ms")
+    print(f"{'':<22}{'predict loop':>14}{'ensemble':>12}{'speedup':>10}")
+    print(f"{'single row (ms)':<22}{loop_single * 1000:>14.2f}{engine_single * 1000:>12.2f}{loop_single / engine_single:>9.1f}x")
+    print(f"{f'batch of {args.batch} (ms)':<22}{loop_batch * 1000:>14.2f}{engine_batch * 1000:>12.2f}{loop_batch / engine_batch:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Overhead of instrumentation.timed on the calls it wraps.
+
+  bare:          the function called directly
+  @timed:        the same function behind the decorator
+  with timed:    the same call inside a ``with timed(...)`` block
+  concurrent:    @timed from --threads threads at once, all on one histogram
+                 (its lock is the only shared state)
+
+Also times get_health_data_bounds with and without the decorator, a real
+call the app makes on every Dashboard rerun, against a temporary database.
+
+    python benchmarks/bench_instrumentation.py --calls 200000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import instrumentation  # noqa: E402
+import user_manager  # noqa: E402
+from instrumentation import timed  # noqa: E402
+
+
+def noop():
+    return None
+
+
+def per_call(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls
+
+
+def concurrent_per_call(fn, calls, threads):
+    per_thread = calls // threads
+    barrier = threading.Barrier(threads + 1)
+
+    def worker():
+        barrier.wait()
+        for _ in range(per_thread):
+            fn()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return (time.perf_counter() - start) / (per_thread * threads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--db-calls", type=int, default=5000)
+    args = parser.parse_args()
+
+    decorated = timed("bench.decorated")(noop)
+    block = timed("bench.block")
+
+    def with_block():
+        with block:
+            return noop()
+
+    rows = [
+        ("bare", per_call(noop, args.calls)),
+        ("@timed", per_call(decorated, args.calls)),
+        ("with timed", per_call(with_block, args.calls)),
+        (f"concurrent x{args.threads}", concurrent_per_call(decorated, args.calls, args.threads)),
+    ]
+    print(f"{args.calls} calls of a no-op function")
+    print(f"{'wrapper':<18}{'ns/call':>10}{'overhead ns':>13}")
+    for label, seconds in rows:
+        print(f"{label:<18}{seconds * 1e9:>10.0f}{(seconds - rows[0][1]) * 1e9:>13.0f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        user_manager.DB_PATH = os.path.join(tmp, "bench.db")
+        user_manager.init_db()
+        user_manager.add_health_data_bulk("alice", [(45, "Pria", 170, 70, 30, 1, 0)] * 1000)
+        bare_bounds = user_manager.get_health_data_bounds.__wrapped__
+        bare, wrapped = float("inf"), float("inf")
+        for _ in range(3):  # interleaved, best of three
+            bare = min(bare, per_call(lambda: bare_bounds("alice"), args.db_calls))
+            wrapped = min(wrapped, per_call(lambda: user_manager.get_health_data_bounds("alice"), args.db_calls))
+        user_manager.close_connections()
+    print(f"\nget_health_data_bounds: {bare * 1e6:.1f} us bare, {wrapped * 1e6:.1f} us with @timed "
+          f"({(wrapped - bare) / bare:+.1%})")
+
+    recorded = {row["operation"]: row["calls"] for row in instrumentation.snapshot()}
+    print(f"recorded: {recorded['bench.decorated']} decorated calls, {recorded['bench.block']} blocks")
+
+if __name__ == "__main__":
+    main()
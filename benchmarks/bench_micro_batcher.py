@@ -0,0 +1,92 @@
+"""Throughput of concurrent one-row predictions: direct predict calls vs MicroBatcher.
+
+--sessions threads each score --requests single rows, once calling the model
+directly and once through a MicroBatcher, for the smoking XGBoost model and the
+five disease forests (ForestEnsemble). Stand-in disease forests are trained on
+synthetic data when the .pkl files are not in --model-dir.
+
+    python benchmarks/bench_micro_batcher.py --sessions 16 --requests 100
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+import warnings
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_predict import SMOKING_MODEL_PATH  # noqa: E402
+from bench_disease_engine import load_models  # noqa: E402
+from features import habit_inputs  # noqa: E402
+from micro_batcher import MicroBatcher  # noqa: E402
+from model_registry import get_registry  # noqa: E402
+from synthetic import disease_features, make_health_frame  # noqa: E402
+from tree_engine import ForestEnsemble  # noqa: E402
+
+
+def run_sessions(predict, rows, sessions, requests):
+    """Each session predicts ``requests`` rows one at a time; returns (rows/s, p50 ms, p95 ms)."""
+    latencies = []
+    lock = threading.Lock()
+
+    def session(offset):
+        local = []
+        for i in range(requests):
+            row = rows[(offset + i) % len(rows)]
+            start = time.perf_counter()
+            predict(row)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=session, args=(i * requests,)) for i in range(sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) * 1000
+    return len(latencies) / elapsed, np.percentile(latencies, 50), np.percentile(latencies, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-dir", default=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser.add_argument("--sessions", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--max-batch-size", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    df = make_health_frame(2000, seed=1)
+    smoking_X, _ = habit_inputs(df.assign(sex=df['sex'].map({'Male': 'Pria', 'Female': 'Wanita'})))
+    disease_X = disease_features(df)
+    smoking_model = get_registry().get(os.path.join(args.model_dir, SMOKING_MODEL_PATH))
+    forests, source = load_models(args.model_dir)
+    engine = ForestEnsemble.from_forests(forests)
+
+    workloads = {
+        "smoking XGBoost": (smoking_model.predict, [smoking_X.iloc[[i]] for i in range(len(smoking_X))]),
+        f"disease forests ({source})": (engine.predict_with_proba, [disease_X.iloc[[i]] for i in range(len(disease_X))]),
+    }
+    print(f"{args.sessions} sessions x {args.requests} one-row requests; "
+          f"max_batch_size={args.max_batch_size}, max_wait_ms={args.max_wait_ms}\n")
+    print(f"{'model':<44}{'path':<10}{'rows/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'batch':>8}{'queue p95':>11}")
+    for name, (predict_fn, rows) in workloads.items():
+        rate, p50, p95 = run_sessions(predict_fn, rows, args.sessions, args.requests)
+        print(f"{name:<44}{'direct':<10}{rate:>10.0f}{p50:>10.2f}{p95:>10.2f}")
+        batcher = MicroBatcher(predict_fn, args.max_batch_size, args.max_wait_ms, name=name)
+        rate, p50, p95 = run_sessions(batcher.predict, rows, args.sessions, args.requests)
+        stats = batcher.stats()
+        batcher.close()
+        print(f"{'':<44}{'batched':<10}{rate:>10.0f}{p50:>10.2f}{p95:>10.2f}"
+              f"{stats['mean_batch_rows']:>8.1f}{stats['queue_ms_p95']:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Time to first render of main.py and every page, logged out and logged in.
+
+Each run is a fresh interpreter that has already imported streamlit (as a
+running server has) and then renders the script once with AppTest, so the
+time includes every import the script triggers. The heavy libraries the run
+pulled in are listed; --profile adds the slowest top-level imports reported
+by ``python -X importtime``.
+
+The app is copied to a temporary directory together with the models from
+--model-dir, so users.db is created there. Point --app-dir at another
+checkout (e.g. a ``git worktree`` of an older commit) to compare.
+
+    python benchmarks/bench_page_imports.py --repeats 5 --profile
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_prediction_server import prepare_model_dir  # noqa: E402
+
+HEAVY_MODULES = ("pandas", "numpy", "plotly.express", "sklearn", "xgboost")
+MARKER = "-- first render --"
+
+FIRST_RENDER = """
+import json, sys, time, warnings
+warnings.filterwarnings("ignore")
+from streamlit.testing.v1 import AppTest
+import streamlit.logger
+streamlit.logger.set_log_level("error")
+from user_manager import issue_session_token
+before = set(sys.modules)
+sys.stderr.write({marker!r} + "\\n")
+sys.stderr.flush()
+start = time.perf_counter()
+at = AppTest.from_file({script!r}, default_timeout=300)
+if {logged_in!r}:
+    at.session_state["user"] = "bench"
+    at.session_state["session_token"] = issue_session_token("bench")
+at.run()
+print(json.dumps({{"seconds": time.perf_counter() - start,
+                  "imported": [name for name in {heavy!r} if name in sys.modules and name not in before],
+                  "exceptions": [str(exc.value) for exc in at.exception]}}))
+"""
+
+
+def slowest_imports(stderr, top):
+    """Top-level imports made during the render, slowest (cumulative) first."""
+    lines = stderr.split(MARKER, 1)[-1].splitlines()
+    imports = []
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            imports.append((int(cumulative) / 1000, name.strip()))
+    return sorted(imports, reverse=True)[:top]
+
+
+def first_render(app_dir, script, logged_in, repeats, profile):
+    code = FIRST_RENDER.format(marker=MARKER, script=script, logged_in=logged_in, heavy=HEAVY_MODULES)
+    command = [sys.executable] + (["-X", "importtime"] if profile else []) + ["-c", code]
+    runs, stderr = [], ""
+    for _ in range(repeats):
+        process = subprocess.run(command, cwd=app_dir, check=True, capture_output=True, text=True)
+        runs.append(json.loads(process.stdout.strip().splitlines()[-1]))
+        stderr = stderr or process.stderr
+    return statistics.median(run["seconds"] for run in runs), runs[0], stderr
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app-dir", default=ROOT)
+    parser.add_argument("--model-dir", default=ROOT)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as app_dir:
+        for path in glob.glob(os.path.join(args.app_dir, "*.py")):
+            shutil.copy(path, app_dir)
+        shutil.copytree(os.path.join(args.app_dir, "pages"), os.path.join(app_dir, "pages"))
+        print(f"app: {args.app_dir} ({prepare_model_dir(args.model_dir, app_dir)})\n")
+
+        scripts = ["main.py"] + sorted(os.path.relpath(path, app_dir)
+                                       for path in glob.glob(os.path.join(app_dir, "pages", "*.py")))
+        print(f"{'script':<42}{'state':<11}{'first render s':>15}  heavy imports")
+        for script in scripts:
+            for logged_in in (False, True):
+                seconds, run, stderr = first_render(app_dir, script, logged_in, args.repeats, args.profile)
+                state = "logged in" if logged_in else "anonymous"
+                note = f"  !! {run['exceptions']}" if run["exceptions"] else ""
+                print(f"{script:<42}{state:<11}{seconds:>15.3f}  {', '.join(run['imported']) or '-'}{note}")
+                if args.profile:
+                    for milliseconds, name in slowest_imports(stderr, args.top):
+                        print(f"{'':<53}{milliseconds:>9.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Logins per second per core for the password hash, and the cost of a session-token check.
+
+Runs single-threaded, so every rate is per core. Compares the legacy unsalted
+SHA-256 with PBKDF2 at a few iteration counts, then times authenticate_user
+end to end against a temporary database: the first login of a legacy account
+(check + rehash), later logins at the current cost, and an unknown username.
+
+    python benchmarks/bench_password_hashing.py --logins 10
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import user_manager  # noqa: E402
+
+PASSWORD = "correct horse battery staple"
+
+
+def rate(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return calls / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=10)
+    parser.add_argument("--iterations", type=int, nargs="+", default=[100_000, 310_000, user_manager.PBKDF2_ITERATIONS])
+    args = parser.parse_args()
+
+    print(f"{'hash':<28}{'ms/hash':>10}{'hashes/s/core':>15}")
+    legacy = rate(lambda: hashlib.sha256(PASSWORD.encode()).hexdigest(), 100_000)
+    print(f"{'sha256 (legacy)':<28}{1000 / legacy:>10.4f}{legacy:>15.0f}")
+    for iterations in args.iterations:
+        per_second = rate(lambda: user_manager.hash_password(PASSWORD, iterations=iterations), args.logins)
+        label = f"pbkdf2_sha256 {iterations:,}" + (" *" if iterations == user_manager.PBKDF2_ITERATIONS else "")
+        print(f"{label:<28}{1000 / per_second:>10.1f}{per_second:>15.1f}")
+    print("* current PBKDF2_ITERATIONS\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        user_manager.DB_PATH = os.path.join(tmp, "users.db")
+        user_manager.init_db()
+        legacy_users = [f"legacy{i}" for i in range(args.logins)]
+        for username in legacy_users:
+            user_manager.add_user(username, hashlib.sha256(PASSWORD.encode()).hexdigest())
+        user_manager.add_user("current", user_manager.hash_password(PASSWORD))
+
+        users = iter(legacy_users)
+        results = {
+            "first login, legacy hash": rate(lambda: user_manager.authenticate_user(next(users), PASSWORD), args.logins),
+            "login, current hash": rate(lambda: user_manager.authenticate_user("current", PASSWORD), args.logins),
+            "unknown username": rate(lambda: user_manager.authenticate_user("nobody", PASSWORD), args.logins),
+        }
+        assert all(user_manager.authenticate_user(username, PASSWORD) for username in legacy_users[:2])
+        user_manager.close_connections()
+
+    token = user_manager.issue_session_token("current")
+    results["session token check"] = rate(lambda: user_manager.session_user(token), 100_000)
+
+    print(f"{'authenticate':<28}{'ms/call':>10}{'calls/s/core':>15}")
+    for label, per_second in results.items():
+        print(f"{label:<28}{1000 / per_second:>10.4f}{per_second:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
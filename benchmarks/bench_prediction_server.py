@@ -0,0 +1,165 @@
+"""Requests per second: prediction_server.py vs a rerun of the Streamlit disease-risk page.
+
+Starts the server in-process on a free localhost port and drives it with
+--clients threads, each on its own keep-alive connection. The Streamlit figure
+is one AppTest run of pages/3_Disease Risk.py with the form filled in and
+submitted, which is what a prediction costs through the UI.
+
+Uses the real *_risk_model.pkl files from --model-dir when present, otherwise
+pickles stand-in forests trained on synthetic data.
+
+    python benchmarks/bench_prediction_server.py --requests 2000 --clients 8
+"""
+import argparse
+import http.client
+import json
+import os
+import pickle
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import warnings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import prediction_server  # noqa: E402
+from batch_predict import DRINKING_MODEL_PATH, SMOKING_MODEL_PATH  # noqa: E402
+from features import DISEASE_MODEL_FILES  # noqa: E402
+from synthetic import train_disease_models  # noqa: E402
+
+HABITS = {'sex': 'Pria', 'age': 45, 'height': 170, 'gamma_GTP': 30}
+DISEASE = {
+    'sex': 'Pria', 'age': 45, 'height': 170, 'weight': 80, 'waistline': 95.0, 'sight_left': 1.0,
+    'sight_right': 1.0, 'hear_left': 1, 'hear_right': 1, 'SBP': 145, 'DBP': 85, 'BLDS': 130,
+    'tot_chole': 210, 'HDL_chole': 45, 'LDL_chole': 120, 'triglyceride': 160, 'hemoglobin': 12.5,
+    'urine_protein': 1, 'serum_creatinine': 1.0, 'SGOT_AST': 45, 'SGOT_ALT': 30, 'gamma_GTP': 70,
+    'smoking': 'Perokok', 'drinking': 'Ya',
+}
+PAGE_INPUTS = {
+    'age': 45, 'height': 170, 'weight': 80, 'waistline': 95.0, 'sight_left': 1.0, 'sight_right': 1.0,
+    'hear_left': 1, 'hear_right': 1, 'sbp': 145, 'dbp': 85, 'blds': 130, 'tot_chole': 210, 'hdl_chole': 45,
+    'ldl_chole': 120, 'triglyceride': 160, 'hemoglobin': 12.5, 'urine_protein': 1, 'serum_creatinine': 1.0,
+    'sgot_ast': 45, 'sgot_alt': 30, 'gamma_gtp': 70,
+}
+
+
+def prepare_model_dir(source_dir, target_dir):
+    """Copies the habit models and the disease models (or synthetic stand-ins) into ``target_dir``."""
+    for filename in (SMOKING_MODEL_PATH, DRINKING_MODEL_PATH):
+        shutil.copy(os.path.join(source_dir, filename), target_dir)
+    paths = [os.path.join(source_dir, filename) for filename in DISEASE_MODEL_FILES.values()]
+    if all(os.path.exists(path) for path in paths):
+        for path in paths:
+            shutil.copy(path, target_dir)
+        return "pickled models"
+    for filename, model in train_disease_models().items():
+        with open(os.path.join(target_dir, filename), 'wb') as file:
+            pickle.dump(model, file)
+    return "synthetic stand-in models"
+
+
+def drive(port, path, payload, requests, clients):
+    """Sends ``requests`` POSTs over ``clients`` connections; returns (req/s, latencies)."""
+    body = json.dumps(payload)
+    latencies = []
+    lock = threading.Lock()
+
+    def client(count):
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        local = []
+        for _ in range(count):
+            start = time.perf_counter()
+            conn.request('POST', path, body, {'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            local.append(time.perf_counter() - start)
+            assert response.status == 200, response.status
+        conn.close()
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(requests // clients,)) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies) / (time.perf_counter() - start), latencies
+
+
+def streamlit_rate(model_dir, runs):
+    """Requests per second for submitting the disease-risk form through AppTest."""
+    from streamlit import logger
+    from streamlit.testing.v1 import AppTest
+    from user_manager import issue_session_token
+
+    logger.set_log_level('error')  # AppTest warns about the missing ScriptRunContext on every run
+    page = os.path.join(ROOT, 'pages', '3_Disease Risk.py')
+    cwd = os.getcwd()
+    os.chdir(model_dir)
+    try:
+        samples = []
+        for _ in range(runs):
+            at = AppTest.from_file(page, default_timeout=60)
+            at.session_state['user'] = 'bench'
+            at.session_state['session_token'] = issue_session_token('bench')
+            at.run()
+            at.radio(key='sex_input_main').set_value('Pria')
+            at.radio(key='smoking_input_main').set_value('Perokok')
+            at.radio(key='drinking_input_main').set_value('Ya')
+            for key, value in PAGE_INPUTS.items():
+                at.number_input(key=f'{key}_input_main').set_value(value)
+            start = time.perf_counter()
+            at.button[0].click().run()
+            samples.append(time.perf_counter() - start)
+            assert not at.exception, at.exception
+        return 1 / statistics.median(samples)
+    finally:
+        os.chdir(cwd)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--model-dir", default=ROOT)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--batch", type=int, default=100, help="instances per request in the batched run")
+    parser.add_argument("--streamlit-runs", type=int, default=20, help="0 skips the Streamlit comparison")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = prepare_model_dir(args.model_dir, tmp)
+        server = prediction_server.create_server(port=0, model_dir=tmp, quiet=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_port
+        print(f"disease models: {source}; {args.clients} clients\n")
+
+        runs = [
+            ("POST /predict/habits", '/predict/habits', HABITS, 1),
+            ("POST /predict/disease-risk", '/predict/disease-risk', DISEASE, 1),
+            (f"POST /predict/disease-risk x{args.batch}", '/predict/disease-risk',
+             {'instances': [DISEASE] * args.batch}, args.batch),
+        ]
+        print(f"{'path':<40}{'req/s':>10}{'rows/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+        for name, path, payload, rows in runs:
+            drive(port, path, payload, args.clients * 5, args.clients)  # warm-up
+            rate, latencies = drive(port, path, payload, args.requests, args.clients)
+            latencies.sort()
+            p50 = latencies[len(latencies) // 2] * 1000
+            p95 = latencies[int(len(latencies) * 0.95)] * 1000
+            print(f"{name:<40}{rate:>10.0f}{rate * rows:>10.0f}{p50:>10.2f}{p95:>10.2f}")
+        server.shutdown()
+        server.server_close()
+
+        if args.streamlit_runs:
+            rate = streamlit_rate(tmp, args.streamlit_runs)
+            print(f"{'Streamlit page 3 rerun (AppTest)':<40}{rate:>10.1f}{rate:>10.1f}{1000 / rate:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Disease-risk labelling: Train.ipynb's pandas ``df.loc`` chain vs risk_rules on NumPy arrays.
+
+  loc chain:        the notebook's cell, verbatim (boolean Series, .loc writes)
+  encode + rules:   features.disease_inputs, then risk_rules.risk_labels
+  rules:            risk_rules.risk_labels on an already encoded matrix (what
+                    training and the prediction page hold)
+
+Every row's five labels are checked to be identical. One row is also timed,
+the case the Disease Risk page serves.
+
+    python benchmarks/bench_risk_rules.py --rows 1000000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from features import disease_inputs  # noqa: E402
+from risk_rules import RISK_LABELS, risk_labels  # noqa: E402
+from synthetic import make_health_frame  # noqa: E402
+
+
+def loc_chain(df):
+    """The labelling part of Train.ipynb."""
+    df['Hypertension_Risk'] = ((df['SBP'] >= 140) | (df['DBP'] >= 90)).astype(int)
+    df['Diabetes_Risk'] = (df['BLDS'] >= 126).astype(int)
+    df['High_Cholesterol_Risk'] = 0
+    df.loc[(df['tot_chole'] >= 193) |
+           (df['LDL_chole'] >= 116) |
+           (df['triglyceride'] >= 150), 'High_Cholesterol_Risk'] = 1
+    df.loc[(df['sex'] == 'Male') & (df['HDL_chole'] < 40), 'High_Cholesterol_Risk'] = 1
+    df.loc[(df['sex'] == 'Female') & (df['HDL_chole'] < 50), 'High_Cholesterol_Risk'] = 1
+    df['Anemia_Risk'] = 0
+    df.loc[(df['sex'] == 'Male') & (df['hemoglobin'] < 13), 'Anemia_Risk'] = 1
+    df.loc[(df['sex'] == 'Female') & (df['hemoglobin'] < 12), 'Anemia_Risk'] = 1
+    df['BMI'] = df['weight'] / ((df['height'] / 100)**2)
+    df['Fatty_Liver_Risk'] = 0
+    elevated_liver_enzymes = (df['SGOT_AST'] > 40) | (df['SGOT_ALT'] > 40) | (df['gamma_GTP'] > 60)
+    df['Obesity_Risk'] = (df['BMI'] >= 30).astype(int)
+    df['Overweight_Risk'] = (df['BMI'] >= 25).astype(int)
+    df['High_Waistline_Risk'] = 0
+    df.loc[(df['sex'] == 'Male') & (df['waistline'] >= 94), 'High_Waistline_Risk'] = 1
+    df.loc[(df['sex'] == 'Female') & (df['waistline'] >= 80), 'High_Waistline_Risk'] = 1
+    df['Metabolic_Risk_Count'] = (df['Obesity_Risk'] | df['Overweight_Risk']).astype(int) + \
+                                 df['High_Waistline_Risk'] + \
+                                 df['Hypertension_Risk'] + \
+                                 df['Diabetes_Risk'] + \
+                                 df['High_Cholesterol_Risk']
+    df.loc[(elevated_liver_enzymes) & (df['Metabolic_Risk_Count'] >= 2), 'Fatty_Liver_Risk'] = 1
+    return df[RISK_LABELS].to_numpy()
+
+
+def timed(fn, repeats):
+    samples, result = [], None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_health_frame(args.rows)
+    # Values exactly on the thresholds, and missing values, must label the same way
+    edges = {'SBP': 140, 'DBP': 90, 'BLDS': 126, 'hemoglobin': 13.0, 'HDL_chole': 40, 'waistline': 94.0, 'gamma_GTP': 60}
+    for offset, (column, value) in enumerate(edges.items()):
+        df.loc[offset::97, column] = value
+        df.loc[offset::1009, column] = np.nan
+    encoded = disease_inputs(df).to_numpy(dtype=np.float64)
+
+    loc_seconds, expected = timed(lambda: loc_chain(df.copy()), args.repeats)
+    encode_seconds, from_frame = timed(lambda: risk_labels(disease_inputs(df)), args.repeats)
+    rules_seconds, from_matrix = timed(lambda: risk_labels(encoded), args.repeats)
+    assert np.array_equal(expected, from_frame) and np.array_equal(expected, from_matrix)
+    one_row = encoded[:1]
+    single = timed(lambda: risk_labels(one_row), 1000)[0]
+
+    print(f"{args.rows} rows, labels identical; positive rate "
+          + ", ".join(f"{label.split('_Risk')[0]} {rate:.1%}" for label, rate in zip(RISK_LABELS, expected.mean(axis=0))))
+    print(f"{'method':<18}{'ms':>10}{'rows/s':>14}")
+    for label, seconds in (("loc chain", loc_seconds), ("encode + rules", encode_seconds), ("rules", rules_seconds)):
+        print(f"{label:<18}{seconds * 1000:>10.1f}{args.rows / seconds:>14,.0f}")
+    print(f"\none row: {single * 1e6:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
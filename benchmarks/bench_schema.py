@@ -0,0 +1,107 @@
+"""Per-user query time as health_data/history grow: schema v1 vs the fully migrated schema.
+
+Every user owns --rows-per-user rows, so each growth step adds users rather than
+making existing histories longer; a query that only touches one user's rows
+should therefore cost the same at every table size. Rows are appended in time
+order with the step's users interleaved, like real traffic. After each step the
+script times get_all_health_data, get_latest_health_data and a per-user history
+scan for a sample of all users so far.
+
+    python benchmarks/bench_schema.py --rows-per-user 400 --sizes 250000,1000000,2000000
+"""
+import argparse
+import datetime
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import user_manager  # noqa: E402
+
+HISTORY_SQL = "SELECT action, timestamp, metadata FROM history WHERE username = ? ORDER BY timestamp"
+QUERIES = {
+    "get_all_health_data": "SELECT age, sex, height, weight, gamma_GTP, smoking_prediction, drinking_prediction, SBP, DBP, BLDS, timestamp "
+                           "FROM health_data WHERE username = ? ORDER BY timestamp ASC",
+    "get_latest_health_data": "SELECT age, sex, height, weight, gamma_GTP, smoking_prediction, drinking_prediction, SBP, DBP, BLDS, timestamp "
+                              "FROM health_data WHERE username = ? ORDER BY timestamp DESC LIMIT 1",
+    "history by user": HISTORY_SQL,
+}
+START = datetime.datetime(2020, 1, 1)
+
+
+def grow(conn, start_row, end_row, rows_per_user):
+    first_user = start_row // rows_per_user
+    new_users = (end_row - start_row) // rows_per_user
+
+    def username(i):
+        return f"user{first_user + (i - start_row) % new_users}"
+
+    def health_rows():
+        for i in range(start_row, end_row):
+            timestamp = (START + datetime.timedelta(seconds=i)).isoformat()
+            yield (username(i), timestamp, 20 + i % 60, "Pria", 170.0, 70.0, 25.0, i % 2, i % 3 % 2, 120.0, 80.0, 95.0)
+
+    def history_rows():
+        for i in range(start_row, end_row):
+            yield (username(i), "prediction", (START + datetime.timedelta(seconds=i)).isoformat(), "{}")
+
+    with conn:
+        conn.executemany("INSERT INTO health_data VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", health_rows())
+        conn.executemany("INSERT INTO history VALUES (?, ?, ?, ?)", history_rows())
+
+
+def time_queries(conn, users, samples):
+    rng = random.Random(0)
+    sampled = [f"user{rng.randrange(users)}" for _ in range(samples)]
+    results = {}
+    for name, sql in QUERIES.items():
+        start = time.perf_counter()
+        for username in sampled:
+            conn.execute(sql, (username,)).fetchall()
+        results[name] = (time.perf_counter() - start) / samples * 1000
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows-per-user", type=int, default=400)
+    parser.add_argument("--sizes", default="250000,1000000,2000000")
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args()
+    sizes = [int(size) // args.rows_per_user * args.rows_per_user for size in args.sizes.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        schemas = {"v1 (no indexes)": 1, f"v{len(user_manager.MIGRATIONS)} (migrated)": None}
+        connections = {}
+        for label, target in schemas.items():
+            conn = sqlite3.connect(os.path.join(tmp, f"schema{target}.db"))
+            conn.execute("PRAGMA journal_mode=WAL")
+            user_manager.migrate(conn, target)
+            connections[label] = conn
+
+        for label, conn in connections.items():
+            plans = [conn.execute(f"EXPLAIN QUERY PLAN {sql}", ("user0",)).fetchall() for sql in QUERIES.values()]
+            print(f"{label}: " + " | ".join("; ".join(step[3] for step in plan) for plan in plans))
+        print()
+
+        header = f"{'rows':>10}{'users':>8}  {'schema':<16}" + "".join(f"{name + ' ms':>26}" for name in QUERIES)
+        print(header)
+        previous = 0
+        for size in sizes:
+            for label, conn in connections.items():
+                grow(conn, previous, size, args.rows_per_user)
+                users = size // args.rows_per_user
+                timings = time_queries(conn, users, args.samples)
+                print(f"{size:>10}{users:>8}  {label:<16}" + "".join(f"{timings[name]:>26.3f}" for name in QUERIES))
+            previous = size
+
+        for conn in connections.values():
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Wall time to train the five disease-risk forests: the notebook's sequential loop vs train_models.py.
+
+  notebook:      Train.ipynb's loop, one forest after another on the DataFrame
+                 (default n_jobs, a fresh split and float32 copy of X per model)
+  train_models:  features encoded once into a memory-mapped float32 array,
+                 fits spread over --cores (1 and all cores by default)
+
+Uses synthetic data; the models are written to a temporary directory.
+
+    python benchmarks/bench_training.py --rows 30000 --n-estimators 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sklearn.ensemble import RandomForestClassifier  # noqa: E402
+from sklearn.model_selection import train_test_split  # noqa: E402
+
+import train_models  # noqa: E402
+from synthetic import DISEASE_RISKS, disease_training_frame, make_health_frame  # noqa: E402
+
+
+def notebook_loop(raw, n_estimators):
+    df = disease_training_frame(raw)
+    feature_columns = [col for col in df.columns if col not in DISEASE_RISKS]
+    for disease in DISEASE_RISKS:
+        X_train, X_test, y_train, y_test = train_test_split(
+            df[feature_columns], df[disease], test_size=0.3, random_state=42, stratify=df[disease])
+        model = RandomForestClassifier(n_estimators=n_estimators, random_state=42).fit(X_train, y_train)
+        model.predict(X_test)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=30000)
+    parser.add_argument("--n-estimators", type=int, default=50)
+    parser.add_argument("--cores", type=int, nargs="+", default=sorted({1, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    raw = make_health_frame(args.rows)
+    print(f"{args.rows} rows, {args.n_estimators} trees per model, {os.cpu_count()} cores available\n")
+    print(f"{'pipeline':<28}{'wall s':>8}{'fits s':>9}")
+    start = time.perf_counter()
+    notebook_loop(raw, args.n_estimators)
+    print(f"{'notebook (sequential)':<28}{time.perf_counter() - start:>8.1f}{'':>9}")
+    for cores in args.cores:
+        with tempfile.TemporaryDirectory() as out_dir:
+            report = train_models.train_models(raw, out_dir, cores, args.n_estimators)
+        label = f"train_models {report['processes']}x{report['n_jobs_per_model']}"
+        print(f"{label:<28}{report['wall_seconds']:>8.1f}{report['fit_seconds_total']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Inserts/reads per second for user_manager: connect-per-call vs pooled WAL connections.
+
+Run from the repository root:
+
+    python benchmarks/bench_user_manager.py --rows 2000
+"""
+import argparse
+import datetime
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import user_manager  # noqa: E402
+
+INSERT_SQL = """INSERT INTO health_data (username, timestamp, age, sex, height, weight, gamma_GTP,
+                smoking_prediction, drinking_prediction, SBP, DBP, BLDS)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+SELECT_SQL = """SELECT age, sex, height, weight, gamma_GTP, smoking_prediction, drinking_prediction, SBP, DBP, BLDS, timestamp
+                FROM health_data WHERE username = ? ORDER BY timestamp DESC LIMIT 1"""
+
+
+# The pre-pool implementation: one connection (and one fsync'd commit) per call.
+def legacy_add_health_data(path, username, *values):
+    conn = sqlite3.connect(path)
+    c = conn.cursor()
+    timestamp = datetime.datetime.now().isoformat()
+    c.execute(INSERT_SQL, (username, timestamp, *values))
+    conn.commit()
+    conn.close()
+
+
+def legacy_get_latest_health_data(path, username):
+    conn = sqlite3.connect(path)
+    c = conn.cursor()
+    c.execute(SELECT_SQL, (username,))
+    data = c.fetchone()
+    conn.close()
+    return data
+
+
+def _sample(i):
+    return (30 + i % 40, "Pria", 170.0, 70.0, 25.0, 0, 1, 120.0, 80.0, 90.0)
+
+
+def run_legacy(path, rows):
+    # WAL is persistent in the file; put it back to the default rollback journal.
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.close()
+
+    start = time.perf_counter()
+    for i in range(rows):
+        legacy_add_health_data(path, f"user{i % 50}", *_sample(i))
+    insert_rate = rows / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(rows):
+        legacy_get_latest_health_data(path, f"user{i % 50}")
+    read_rate = rows / (time.perf_counter() - start)
+    return insert_rate, read_rate
+
+
+def run_pooled(path, rows):
+    user_manager.DB_PATH = path
+    start = time.perf_counter()
+    for i in range(rows):
+        user_manager.add_health_data(f"user{i % 50}", *_sample(i))
+    insert_rate = rows / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(rows):
+        user_manager.get_latest_health_data(f"user{i % 50}")
+    read_rate = rows / (time.perf_counter() - start)
+    user_manager.close_connections()
+    return insert_rate, read_rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for name, runner in (("connect-per-call", run_legacy), ("pooled WAL", run_pooled)):
+            path = os.path.join(tmp, f"{name.split()[0]}.db")
+            user_manager.DB_PATH = path
+            user_manager.init_db()
+            user_manager.close_connections()
+            results[name] = runner(path, args.rows)
+
+    print(f"{'mode':<18}{'inserts/s':>12}{'reads/s':>12}")
+    for name, (inserts, reads) in results.items():
+        print(f"{name:<18}{inserts:>12.0f}{reads:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
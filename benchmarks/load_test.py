@@ -0,0 +1,336 @@
+"""Multi-user load test: scripted sessions against the Streamlit app, with ramped concurrency.
+
+Each virtual user runs one realistic session through Streamlit's AppTest, in
+its own thread of this process, the way a Streamlit server runs every
+session's reruns in threads of one process:
+
+  open          main.py, not logged in
+  signup        Sign Up form (login())
+  login         Login form, then the main page
+  smoking       open the Smoking & Alcohol page, submit the form (saved to users.db)
+  disease       open the Disease Risk page, submit the form
+  dashboard     open the Dashboard (own data), then switch to the whole dataset
+
+For each concurrency level (--users) it reports p50/p95/p99 latency per step,
+the process CPU use and peak RSS, and users.db write-lock contention: how long
+add_health_data waited in BEGIN IMMEDIATE for other writers
+(instrumentation's ``db.write_lock``) and any failed DB calls.
+
+Runs in a temporary directory with a fresh users.db, the models from
+--model-dir (stand-in disease forests are trained when missing) and the
+dataset from --csv or a synthetic one of --dataset-rows rows.
+
+    python benchmarks/load_test.py --users 1 2 4 8 --sessions 2 -o load.json
+"""
+import argparse
+import collections
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import warnings
+from unittest.mock import MagicMock
+from urllib import parse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np  # noqa: E402
+from streamlit import config  # noqa: E402
+from streamlit.runtime import Runtime  # noqa: E402
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager  # noqa: E402
+from streamlit.runtime.media_file_manager import MediaFileManager  # noqa: E402
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage  # noqa: E402
+from streamlit.runtime.pages_manager import PagesManager  # noqa: E402
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+from streamlit.testing.v1.local_script_runner import LocalScriptRunner  # noqa: E402
+
+import instrumentation  # noqa: E402
+from dashboard_stats import DATASET_CSV  # noqa: E402
+from suite import load_models  # noqa: E402
+from synthetic import make_health_frame  # noqa: E402
+
+PASSWORD = "load-test-password"
+HABITS_FORM = {"Usia (Tahun)": 45, "Tinggi Badan (cm)": 170, "Tekanan Darah Sistolik (SBP)": 125,
+               "Berat Badan (kg)": 72, "Gamma-GTP (γ-GTP)": 30, "Tekanan Darah Diastolik (DBP)": 82,
+               "Gula Darah Puasa (mg/dL)": 98}
+DISEASE_FORM = dict(age=45, height=170, weight=80, waistline=95.0, sight_left=1.0, sight_right=1.0,
+                    hear_left=1, hear_right=1, sbp=145, dbp=85, blds=130, tot_chole=210, hdl_chole=45,
+                    ldl_chole=120, triglyceride=160, hemoglobin=12.5, urine_protein=1, serum_creatinine=1.0,
+                    sgot_ast=45, sgot_alt=30, gamma_gtp=70)
+STEPS = ("open", "signup", "login", "smoking.open", "smoking.submit", "disease.open", "disease.submit",
+         "dashboard.user", "dashboard.global")
+RSS_SAMPLE_SECONDS = 0.1
+
+
+# ---------- CONCURRENT APPTEST ----------
+class ConcurrentAppTest(AppTest):
+    """AppTest whose runs may overlap in several threads.
+
+    AppTest.run installs a mock Runtime and the ``global.appTest`` option for
+    the length of one run and removes them afterwards, under any run still
+    going in another thread. ``install_runtime`` sets both once instead.
+    """
+
+    def _run(self, widget_state=None, timeout=None):
+        pages_manager = PagesManager(self._script_path, ScriptCache(), setup_watcher=False)
+        script_runner = LocalScriptRunner(self._script_path, self.session_state, pages_manager,
+                                          args=self.args, kwargs=self.kwargs)
+        self._tree = script_runner.run(widget_state, self.query_params,
+                                       self.default_timeout if timeout is None else timeout, self._page_hash)
+        self._tree._runner = self
+        self.query_params = parse.parse_qs(script_runner.event_data[-1]["client_state"].query_string)
+        return self
+
+
+def install_runtime():
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = runtime
+    config.set_option("global.appTest", True)
+
+
+# ---------- SESSION SCRIPT ----------
+class StepFailed(Exception):
+    pass
+
+
+def _labelled(elements, label):
+    for element in elements:
+        if element.label == label:
+            return element
+    raise StepFailed(f"no widget labelled {label!r}")
+
+
+class Session:
+    """One virtual user; ``run`` records ``(step, seconds, error)`` tuples in ``records``."""
+
+    def __init__(self, username, timeout):
+        self.username = username
+        self.timeout = timeout
+        self.records = []
+        self.at = None
+
+    def _step(self, name, action):
+        start = time.perf_counter()
+        try:
+            action()
+            if self.at.exception:
+                raise StepFailed(self.at.exception[0].value)
+        except Exception as exc:  # one failed step ends the session
+            self.records.append((name, time.perf_counter() - start, f"{type(exc).__name__}: {exc}"))
+            return False
+        self.records.append((name, time.perf_counter() - start, None))
+        return True
+
+    def _open(self):
+        self.at = ConcurrentAppTest(os.path.join(ROOT, "main.py"), default_timeout=self.timeout)
+        self.at.run()
+
+    def _account_form(self, menu, button):
+        at = self.at
+        at.sidebar.radio[0].set_value(menu).run()
+        at.text_input[0].input(self.username)
+        at.text_input[1].input(PASSWORD)
+        _labelled(at.button, button).click().run()
+
+    def _signup(self):
+        self._account_form("Sign Up", "Sign Up")
+        if not self.at.success:
+            raise StepFailed("sign-up was not confirmed")
+
+    def _login(self):
+        self._account_form("Login", "Login")
+        state = self.at.session_state
+        if "user" not in state or state["user"] != self.username:
+            raise StepFailed("login did not start a session")
+
+    def _page(self, path):
+        self.at.switch_page(os.path.join("pages", path)).run()
+
+    def _submit_habits(self):
+        at = self.at
+        _labelled(at.selectbox, "Jenis Kelamin").set_value("Pria")
+        for label, value in HABITS_FORM.items():
+            _labelled(at.number_input, label).set_value(value)
+        _labelled(at.button, "Dapatkan Prediksi").click().run()
+        if not at.success:
+            raise StepFailed("no prediction shown")
+
+    def _submit_disease(self):
+        at = self.at
+        at.radio(key="sex_input_main").set_value("Pria")
+        at.radio(key="smoking_input_main").set_value("Perokok")
+        at.radio(key="drinking_input_main").set_value("Ya")
+        for name, value in DISEASE_FORM.items():
+            at.number_input(key=f"{name}_input_main").set_value(value)
+        _labelled(at.button, "Prediksi Risiko Penyakit").click().run()
+        if not (at.success or at.error):
+            raise StepFailed("no risk results shown")
+
+    def _global_scope(self):
+        _labelled(self.at.radio, "Pilih Cakupan Data:").set_value("Semua Statistik Data").run()
+
+    def run(self):
+        steps = [
+            ("open", self._open),
+            ("signup", self._signup),
+            ("login", self._login),
+            ("smoking.open", lambda: self._page("1_Smoking & Alcohol Prediction.py")),
+            ("smoking.submit", self._submit_habits),
+            ("disease.open", lambda: self._page("3_Disease Risk.py")),
+            ("disease.submit", self._submit_disease),
+            ("dashboard.user", lambda: self._page("4_Dashboard.py")),
+            ("dashboard.global", self._global_scope),
+        ]
+        for name, action in steps:
+            if not self._step(name, action):
+                return
+
+
+# ---------- MEASUREMENT ----------
+def current_rss():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class RssSampler(threading.Thread):
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = current_rss()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(RSS_SAMPLE_SECONDS):
+            self.peak = max(self.peak, current_rss())
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        return max(self.peak, current_rss())
+
+
+def percentiles(values):
+    if not values:
+        return {"n": 0}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"n": len(values), "p50": p50, "p95": p95, "p99": p99, "max": max(values)}
+
+
+def run_level(users, sessions, timeout):
+    """``users`` threads, each running ``sessions`` sessions back to back."""
+    instrumentation.reset()
+    records, lock = [], threading.Lock()
+
+    def user(index):
+        for number in range(sessions):
+            session = Session(f"load{users}-{index}-{number}-{uuid.uuid4().hex[:6]}", timeout)
+            session.run()
+            with lock:
+                records.extend(session.records)
+
+    sampler = RssSampler()
+    sampler.start()
+    cpu_before, wall_before = os.times(), time.perf_counter()
+    threads = [threading.Thread(target=user, args=(index,)) for index in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - wall_before
+    cpu_after = os.times()
+    peak_rss = sampler.stop()
+
+    by_step = collections.defaultdict(list)
+    errors = collections.Counter()
+    for step, seconds, error in records:
+        by_step[step].append(seconds)
+        if error:
+            errors[f"{step}: {error[:120]}"] += 1
+    db = {row["operation"]: row for row in instrumentation.snapshot() if row["operation"].startswith("db.")}
+    write_lock = db.get("db.write_lock", {})
+    cpu = (cpu_after.user - cpu_before.user) + (cpu_after.system - cpu_before.system)
+    completed = sum(1 for step, _, error in records if step == STEPS[-1] and error is None)
+    return {
+        "users": users,
+        "sessions": users * sessions,
+        "completed_sessions": completed,
+        "wall_seconds": wall,
+        "sessions_per_minute": completed / wall * 60,
+        "cpu_seconds": cpu,
+        "cpu_percent": cpu / wall * 100,
+        "peak_rss_bytes": peak_rss,
+        "steps": {step: percentiles(by_step[step]) for step in STEPS if step in by_step},
+        "write_lock": {key: write_lock.get(key, 0) for key in ("calls", "p50_ms", "p95_ms", "p99_ms", "max_ms")},
+        "db_errors": sum(row["errors"] for row in db.values()),
+        "errors": dict(errors),
+    }
+
+
+def print_level(level):
+    print(f"\n== {level['users']} concurrent users: {level['completed_sessions']}/{level['sessions']} sessions "
+          f"in {level['wall_seconds']:.1f} s ({level['sessions_per_minute']:.1f}/min), "
+          f"CPU {level['cpu_percent']:.0f}% of one core, peak RSS {level['peak_rss_bytes'] / 2**20:.0f} MB")
+    print(f"{'step':<20}{'n':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for step, stats in level["steps"].items():
+        print(f"{step:<20}{stats['n']:>5}{stats['p50'] * 1000:>10.0f}{stats['p95'] * 1000:>10.0f}"
+              f"{stats['p99'] * 1000:>10.0f}{stats['max'] * 1000:>10.0f}")
+    lock = level["write_lock"]
+    print(f"users.db write lock: {lock['calls']} waits, p50 {lock['p50_ms']:.2f} ms, p95 {lock['p95_ms']:.2f} ms, "
+          f"max {lock['max_ms']:.2f} ms; {level['db_errors']} failed DB calls")
+    for error, count in level["errors"].items():
+        print(f"  {count} x {error}")
+
+
+def prepare_workdir(work_dir, args):
+    load_models(args.model_dir, work_dir)
+    dataset = os.path.join(work_dir, DATASET_CSV)
+    if args.csv:
+        shutil.copy(args.csv, dataset)
+    else:
+        make_health_frame(args.dataset_rows, seed=4).to_csv(dataset, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="concurrency levels to ramp through")
+    parser.add_argument("--sessions", type=int, default=2, help="sessions per user at each level")
+    parser.add_argument("--model-dir", default=ROOT)
+    parser.add_argument("--csv", help="dataset for the global dashboard (default: synthetic)")
+    parser.add_argument("--dataset-rows", type=int, default=100_000)
+    parser.add_argument("--timeout", type=float, default=300, help="seconds allowed per rerun")
+    parser.add_argument("-o", "--output", help="write the results to this JSON file")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        prepare_workdir(work_dir, args)
+        os.chdir(work_dir)  # the app finds users.db, the models and the dataset in its working directory
+        install_runtime()
+
+        # Warm-up: loads the models, builds the column cache and the global stats store
+        warm_up = run_level(1, 1, args.timeout)
+        print(f"warm-up session: {sum(stats['p50'] for stats in warm_up['steps'].values()):.1f} s")
+        levels = []
+        for users in args.users:
+            levels.append(run_level(users, args.sessions, args.timeout))
+            print_level(levels[-1])
+        os.chdir(ROOT)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"cpus": os.cpu_count(), "warm_up": warm_up, "levels": levels}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
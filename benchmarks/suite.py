@@ -0,0 +1,283 @@
+"""Reproducible benchmark suite for the app's hot paths, with JSON results and a regression check.
+
+Runs offline in a temporary directory, against a synthetic users.db and a
+smoking_drinkin_100k.csv-shaped CSV (benchmarks/synthetic.py, fixed seeds):
+
+  db          authenticate_user, add_health_data, and get_all_health_data
+              over a --history row history
+  predict     each of the seven models from --model-dir, one row and a
+              --batch row batch, as the pickle and as its .npz export
+              (disease forests are trained on synthetic data when missing)
+  dashboard   per --sizes rows: CSV parse, load_dataset from the column
+              cache, preprocessing (labels, BMI, pd.cut age groups) and
+              summarize (the groupbys behind the charts)
+
+Each result is the median seconds per call over --repeats runs. Results go to
+JSON together with the library versions, the schema version and a hash of each
+model file, so a comparison also says when the models or the schema changed.
+
+    python benchmarks/suite.py -o baseline.json
+    python benchmarks/suite.py -o current.json --compare baseline.json
+    python benchmarks/suite.py --compare baseline.json current.json   # no run
+
+With --compare the exit status is 1 when any benchmark got slower by more
+than --threshold (default 25%).
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import pickle
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+from importlib import metadata
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd  # noqa: E402
+
+import export_models  # noqa: E402
+import user_manager  # noqa: E402
+from batch_predict import DRINKING_MODEL_PATH, SMOKING_MODEL_PATH  # noqa: E402
+from dashboard_stats import add_derived_columns, prepare_global_frame, summarize  # noqa: E402
+from data_cache import load_dataset  # noqa: E402
+from features import DISEASE_MODEL_FILES, habit_inputs  # noqa: E402
+from synthetic import disease_features, make_health_frame, train_disease_models  # noqa: E402
+
+GROUPS = ("db", "predict", "dashboard")
+LIBRARIES = ("numpy", "pandas", "scikit-learn", "xgboost", "plotly", "streamlit")
+DEFAULT_THRESHOLD = 0.25
+USERNAME = "bench"
+PASSWORD = "bench-password"
+
+
+def measure(fn, repeats, number=1):
+    """Median and minimum seconds per call of ``fn`` over ``repeats`` runs of ``number`` calls."""
+    fn()  # warm-up
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return {"median": statistics.median(samples), "min": min(samples), "repeats": repeats, "number": number}
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+# ---------- BENCHMARKS ----------
+def bench_db(work_dir, args):
+    user_manager.DB_PATH = os.path.join(work_dir, "users.db")
+    user_manager.init_db()
+    user_manager.add_user(USERNAME, user_manager.hash_password(PASSWORD))
+    df = make_health_frame(args.history, seed=1)
+    user_manager.add_health_data_bulk(USERNAME, df.assign(smoking_prediction=1, drinking_prediction=0))
+    record = (45, "Pria", 170, 70, 30, 1, 0, 120, 80, 95)
+    results = {}
+    try:
+        results["db.authenticate_user"] = measure(
+            lambda: user_manager.authenticate_user(USERNAME, PASSWORD), max(3, args.repeats // 5))
+        # Read before the insert benchmark grows the history
+        results[f"db.get_all_health_data[{args.history}]"] = measure(
+            lambda: user_manager.get_all_health_data(USERNAME), args.repeats, 5)
+        results["db.add_health_data"] = measure(lambda: user_manager.add_health_data(USERNAME, *record), args.repeats, 20)
+        return results
+    finally:
+        user_manager.close_connections()
+
+
+def load_models(model_dir, work_dir):
+    """The seven pickles (copied into ``work_dir``), training stand-in disease forests if missing."""
+    paths = {}
+    for filename in (SMOKING_MODEL_PATH, DRINKING_MODEL_PATH, *DISEASE_MODEL_FILES.values()):
+        source = os.path.join(model_dir, filename)
+        if os.path.exists(source):
+            paths[filename] = shutil.copy(source, work_dir)
+    missing = [filename for filename in DISEASE_MODEL_FILES.values() if filename not in paths]
+    if missing:
+        print(f"training stand-in forests for {', '.join(missing)}", file=sys.stderr)
+        for filename, model in train_disease_models().items():
+            if filename in missing:
+                paths[filename] = os.path.join(work_dir, filename)
+                with open(paths[filename], "wb") as file:
+                    pickle.dump(model, file)
+    return paths
+
+
+def bench_predict(work_dir, args, environment):
+    paths = load_models(args.model_dir, work_dir)
+    environment["models"] = {filename: file_digest(path) for filename, path in paths.items()}
+
+    df = make_health_frame(args.batch, seed=2)
+    smoking_X, drinking_X = habit_inputs(df.assign(sex=df["sex"].map({"Male": "Pria", "Female": "Wanita"})))
+    disease_X = disease_features(df)
+    inputs = {SMOKING_MODEL_PATH: smoking_X, DRINKING_MODEL_PATH: drinking_X}
+    inputs.update({filename: disease_X for filename in DISEASE_MODEL_FILES.values()})
+
+    results = {}
+    for filename, path in paths.items():
+        with open(path, "rb") as file:
+            model = pickle.load(file)
+        name = os.path.splitext(filename)[0]
+        X = inputs[filename]
+        for engine, predictor in (("pkl", model), ("npz", export_models.compile_model(model))):
+            results[f"predict.{name}.{engine}.single"] = measure(lambda: predictor.predict(X.iloc[:1]), args.repeats, 20)
+            results[f"predict.{name}.{engine}.batch[{args.batch}]"] = measure(lambda: predictor.predict(X), args.repeats)
+    return results
+
+
+def bench_dashboard(work_dir, args):
+    results = {}
+    for n_rows in args.sizes:
+        csv_path = os.path.join(work_dir, f"health_{n_rows}.csv")
+        make_health_frame(n_rows, seed=3).to_csv(csv_path, index=False)
+        repeats = max(1, args.repeats // 5) if n_rows >= 1_000_000 else max(3, args.repeats // 2)
+        load_dataset(csv_path, cache_root=os.path.join(work_dir, ".cache"))  # builds the column cache
+        raw = prepare_global_frame(load_dataset(csv_path, cache_root=os.path.join(work_dir, ".cache")))
+        derived = add_derived_columns(raw.copy())
+        results.update({
+            f"dashboard.read_csv[{n_rows}]": measure(lambda: pd.read_csv(csv_path), repeats),
+            f"dashboard.load_dataset[{n_rows}]": measure(
+                lambda: load_dataset(csv_path, cache_root=os.path.join(work_dir, ".cache")), repeats),
+            f"dashboard.preprocess[{n_rows}]": measure(lambda: add_derived_columns(raw.copy()), repeats),
+            f"dashboard.summarize[{n_rows}]": measure(lambda: summarize(derived), repeats),
+        })
+        os.remove(csv_path)
+    return results
+
+
+def environment_info():
+    versions = {}
+    for library in LIBRARIES:
+        try:
+            versions[library] = metadata.version(library)
+        except metadata.PackageNotFoundError:
+            versions[library] = None
+    return {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "libraries": versions,
+        "schema_version": len(user_manager.MIGRATIONS),
+    }
+
+
+def run(args):
+    environment = environment_info()
+    environment["parameters"] = {key: getattr(args, key) for key in ("groups", "sizes", "batch", "history", "repeats")}
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        for group in args.groups:
+            started = time.perf_counter()
+            if group == "db":
+                results.update(bench_db(work_dir, args))
+            elif group == "predict":
+                results.update(bench_predict(work_dir, args, environment))
+            else:
+                results.update(bench_dashboard(work_dir, args))
+            print(f"{group}: {time.perf_counter() - started:.1f} s", file=sys.stderr)
+    return {"environment": environment, "results": results}
+
+
+# ---------- REPORTING ----------
+def print_results(report):
+    print(f"{'benchmark':<58}{'median ms':>12}{'min ms':>10}")
+    for name, result in report["results"].items():
+        print(f"{name:<58}{result['median'] * 1000:>12.3f}{result['min'] * 1000:>10.3f}")
+
+
+def compare(baseline, current, threshold):
+    """Prints the per-benchmark change; returns the names that regressed beyond ``threshold``."""
+    old_env, new_env = baseline["environment"], current["environment"]
+    for key in ("python", "cpus", "schema_version"):
+        if old_env.get(key) != new_env.get(key):
+            print(f"note: {key} changed: {old_env.get(key)} -> {new_env.get(key)}")
+    for library, version in new_env.get("libraries", {}).items():
+        if old_env.get("libraries", {}).get(library) != version:
+            print(f"note: {library} changed: {old_env.get('libraries', {}).get(library)} -> {version}")
+    for filename, digest in new_env.get("models", {}).items():
+        if filename in old_env.get("models", {}) and old_env["models"][filename] != digest:
+            print(f"note: model {filename} changed")
+
+    regressions = []
+    print(f"{'benchmark':<58}{'baseline ms':>12}{'current ms':>12}{'change':>9}")
+    for name, result in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            print(f"{name:<58}{'-':>12}{result['median'] * 1000:>12.3f}{'new':>9}")
+            continue
+        change = result["median"] / old["median"] - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  SLOWER"
+        print(f"{name:<58}{old['median'] * 1000:>12.3f}{result['median'] * 1000:>12.3f}{change:>+9.0%}{flag}")
+    groups_run = {name.split(".")[0] for name in current["results"]}
+    not_run = 0
+    for name, old in baseline["results"].items():
+        if name in current["results"]:
+            continue
+        if name.split(".")[0] in groups_run:
+            print(f"{name:<58}{old['median'] * 1000:>12.3f}{'-':>12}{'gone':>9}")
+        else:
+            not_run += 1
+    if not_run:
+        print(f"({not_run} baseline benchmarks from groups not run here)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--groups", nargs="+", choices=GROUPS, default=list(GROUPS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--batch", type=int, default=10_000)
+    parser.add_argument("--history", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=15)
+    parser.add_argument("--model-dir", default=ROOT)
+    parser.add_argument("-o", "--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", nargs="+", metavar="JSON",
+                        help="baseline results to compare against; with a second file, compare the two without running")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slow-down that counts as a regression (default: %(default)s)")
+    args = parser.parse_args(argv)
+    if args.compare and len(args.compare) > 2:
+        parser.error("--compare takes a baseline and at most one current results file")
+    warnings.filterwarnings("ignore")
+
+    if args.compare and len(args.compare) == 2:
+        with open(args.compare[1]) as f:
+            report = json.load(f)
+    else:
+        report = run(args)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+        print_results(report)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        print()
+        regressions = compare(baseline, report, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slower than the baseline by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Synthetic stand-ins for smoking_drinkin_100k.csv and the disease-risk models.
+
+The real dataset and the five RandomForest .pkl files are not checked in, so the
+benchmarks generate data with the same columns and value ranges and, when the
+.pkl files are missing, train forests on it the same way Train.ipynb does.
+"""
+import numpy as np
+import pandas as pd
+
+DISEASE_RISKS = {
+    'Hypertension_Risk': 'hypertension_risk_model.pkl',
+    'Diabetes_Risk': 'diabetes_risk_model.pkl',
+    'High_Cholesterol_Risk': 'high_cholesterol_risk_model.pkl',
+    'Anemia_Risk': 'anemia_risk_model.pkl',
+    'Fatty_Liver_Risk': 'fatty_liver_risk_model.pkl'
+}
+
+
+def make_health_frame(n_rows, seed=0):
+    """A DataFrame shaped like smoking_drinkin_100k.csv (raw, unencoded values)."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'sex': rng.choice(['Male', 'Female'], n_rows),
+        'age': rng.choice(np.arange(20, 90, 5), n_rows),
+        'height': rng.choice(np.arange(140, 195, 5), n_rows),
+        'weight': rng.choice(np.arange(35, 120, 5), n_rows),
+        'waistline': np.round(rng.normal(81, 10, n_rows), 1),
+        'sight_left': np.round(rng.uniform(0.1, 2.0, n_rows), 1),
+        'sight_right': np.round(rng.uniform(0.1, 2.0, n_rows), 1),
+        'hear_left': rng.choice([1.0, 2.0], n_rows, p=[0.97, 0.03]),
+        'hear_right': rng.choice([1.0, 2.0], n_rows, p=[0.97, 0.03]),
+        'SBP': np.round(rng.normal(122, 14, n_rows)),
+        'DBP': np.round(rng.normal(76, 10, n_rows)),
+        'BLDS': np.round(rng.normal(100, 22, n_rows)),
+        'tot_chole': np.round(rng.normal(195, 38, n_rows)),
+        'HDL_chole': np.round(rng.normal(56, 15, n_rows)),
+        'LDL_chole': np.round(rng.normal(113, 35, n_rows)),
+        'triglyceride': np.round(rng.lognormal(4.8, 0.5, n_rows)),
+        'hemoglobin': np.round(rng.normal(14.2, 1.6, n_rows), 1),
+        'urine_protein': rng.choice([1.0, 2.0, 3.0, 4.0], n_rows, p=[0.94, 0.03, 0.02, 0.01]),
+        'serum_creatinine': np.round(rng.normal(0.86, 0.2, n_rows), 1),
+        'SGOT_AST': np.round(rng.lognormal(3.2, 0.35, n_rows)),
+        'SGOT_ALT': np.round(rng.lognormal(3.1, 0.5, n_rows)),
+        'gamma_GTP': np.round(rng.lognormal(3.3, 0.7, n_rows)),
+        'smoking': rng.choice([1.0, 2.0, 3.0], n_rows, p=[0.6, 0.18, 0.22]),
+        'drinking': rng.choice(['Y', 'N'], n_rows),
+    })
+
+
+def disease_training_frame(df):
+    """Adds the five *_Risk labels and encodes sex/drinking, as in Train.ipynb."""
+    df = df.copy()
+    df['Hypertension_Risk'] = ((df['SBP'] >= 140) | (df['DBP'] >= 90)).astype(int)
+    df['Diabetes_Risk'] = (df['BLDS'] >= 126).astype(int)
+    df['High_Cholesterol_Risk'] = (
+        (df['tot_chole'] >= 193) | (df['LDL_chole'] >= 116) | (df['triglyceride'] >= 150)
+        | ((df['sex'] == 'Male') & (df['HDL_chole'] < 40))
+        | ((df['sex'] == 'Female') & (df['HDL_chole'] < 50))
+    ).astype(int)
+    df['Anemia_Risk'] = (
+        ((df['sex'] == 'Male') & (df['hemoglobin'] < 13)) | ((df['sex'] == 'Female') & (df['hemoglobin'] < 12))
+    ).astype(int)
+    bmi = df['weight'] / ((df['height'] / 100) ** 2)
+    high_waistline = ((df['sex'] == 'Male') & (df['waistline'] >= 94)) | ((df['sex'] == 'Female') & (df['waistline'] >= 80))
+    metabolic_risk_count = ((bmi >= 25).astype(int) + high_waistline.astype(int)
+                            + df['Hypertension_Risk'] + df['Diabetes_Risk'] + df['High_Cholesterol_Risk'])
+    elevated_liver_enzymes = (df['SGOT_AST'] > 40) | (df['SGOT_ALT'] > 40) | (df['gamma_GTP'] > 60)
+    df['Fatty_Liver_Risk'] = (elevated_liver_enzymes & (metabolic_risk_count >= 2)).astype(int)
+
+    df['sex'] = df['sex'].map({'Male': 0, 'Female': 1})
+    df['drinking'] = df['drinking'].map({'N': 0, 'Y': 1})
+    return df
+
+
+def disease_features(df):
+    """Encoded feature matrix in the column order the disease models expect."""
+    encoded = disease_training_frame(df)
+    return encoded[[col for col in encoded.columns if col not in DISEASE_RISKS]]
+
+
+def train_disease_models(n_rows=30000, n_estimators=100, seed=42):
+    """Trains stand-in forests; returns ``{pkl_filename: model}``."""
+    from sklearn.ensemble import RandomForestClassifier
+
+    df = disease_training_frame(make_health_frame(n_rows, seed=seed))
+    X = df[[col for col in df.columns if col not in DISEASE_RISKS]]
+    return {
+        filename: RandomForestClassifier(n_estimators=n_estimators, random_state=seed).fit(X, df[disease])
+        for disease, filename in DISEASE_RISKS.items()
+    }
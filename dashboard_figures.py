@@ -0,0 +1,62 @@
+"""Plotly figures for the Dashboard, built from precomputed statistics instead of raw rows."""
+from dashboard_stats import sample_sorted
+from instrumentation import timed
+from lazy_import import lazy_import
+
+go = lazy_import('plotly.graph_objects')
+
+MAX_BOX_POINTS = 200  # outlier points drawn per box; None draws every stored point
+
+
+def _habit_name(value):
+    # px.box/px.histogram show a missing habit label as 'nan'
+    return 'nan' if value is None else value
+
+
+@timed('figure.box')
+def box_figure(groups, metric_label, max_points=MAX_BOX_POINTS):
+    """Grouped box plot (x: smoking, colour: drinking) from ``summary['box'][metric]``."""
+    fig = go.Figure()
+    for drinking_status in dict.fromkeys(group['drinking'] for group in groups):
+        boxes = [group for group in groups if group['drinking'] == drinking_status]
+        # y holds the sampled outliers of each box; the quartiles and whiskers are given directly
+        points = [sample_sorted(group.get('outliers', []), max_points) for group in boxes]
+        fig.add_trace(go.Box(
+            name=_habit_name(drinking_status),
+            x=[group['smoking'] for group in boxes],
+            y=points if any(points) else None,
+            boxpoints='outliers' if any(points) else False,
+            q1=[group['q1'] for group in boxes],
+            median=[group['median'] for group in boxes],
+            q3=[group['q3'] for group in boxes],
+            lowerfence=[group['lowerfence'] for group in boxes],
+            upperfence=[group['upperfence'] for group in boxes],
+            mean=[group['mean'] for group in boxes],
+        ))
+    fig.update_layout(
+        title=f'Distribusi {metric_label} berdasarkan Kebiasaan Merokok dan Minum',
+        xaxis_title='Merokok', yaxis_title=metric_label, legend_title='Minum', boxmode='group'
+    )
+    return fig
+
+
+def box_points_shown(groups, max_points=MAX_BOX_POINTS):
+    """(outlier points drawn, outliers in the data) for a ``box_figure`` of ``groups``."""
+    shown = sum(len(sample_sorted(group.get('outliers', []), max_points)) for group in groups)
+    return shown, sum(group.get('n_outliers', 0) for group in groups)
+
+
+@timed('figure.histogram')
+def histogram_figure(histogram, metric_label):
+    """Stacked histogram per smoking status from ``summary['histogram'][metric]``."""
+    edges = histogram['edges']
+    centers = [(left + right) / 2 for left, right in zip(edges, edges[1:])]
+    fig = go.Figure()
+    for group in histogram['groups']:
+        fig.add_trace(go.Bar(name=_habit_name(group['smoking']), x=centers, y=group['counts'],
+                             width=edges[1] - edges[0]))
+    fig.update_layout(
+        title=f'Histogram {metric_label} berdasarkan Kebiasaan Merokok',
+        xaxis_title=metric_label, yaxis_title='Jumlah', legend_title='Merokok', barmode='stack', bargap=0
+    )
+    return fig
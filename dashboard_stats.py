@@ -0,0 +1,372 @@
+"""Aggregates behind the Dashboard charts, plus the precomputed store for the global dataset.
+
+    python dashboard_stats.py smoking_drinkin_100k.csv -o global_stats.json
+"""
+import argparse
+import bisect
+import collections
+import json
+import math
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data_cache import load_dataset
+from instrumentation import timed
+
+DATASET_CSV = 'smoking_drinkin_100k.csv'
+STORE_PATH = 'global_stats.json'
+STORE_VERSION = 2
+
+AGE_BINS = [0, 18, 30, 45, 60, 100]
+AGE_LABELS = ['<18', '18-30', '31-45', '46-60', '>60']
+SMOKING_LABELS = {1: 'Tidak', 2: 'Tidak', 3: 'Ya'}
+DRINKING_LABELS = {'Y': 'Tidak', 'N': 'Ya'}
+SEX_LABELS = {'Male': 'Laki-laki', 'Female': 'Perempuan'}
+
+MEAN_COLUMNS = ['BLDS', 'bmi', 'SBP', 'DBP', 'gamma_GTP', 'tot_chole']
+PERCENTAGE_COLUMNS = ['smoking', 'drinking']
+HEALTH_METRICS = ['SBP', 'DBP', 'BLDS', 'bmi', 'gamma_GTP', 'tot_chole']
+MAX_OUTLIERS = 200  # outlier points kept per box
+HISTOGRAM_BINS = 40
+
+
+# ---------- PREPROCESSING ----------
+def prepare_global_frame(df):
+    """Renames/maps the raw CSV columns to the names the dashboard uses."""
+    if 'total_cholesterol' in df.columns:
+        df = df.rename(columns={'total_cholesterol': 'tot_chole'})
+    if 'sex' in df.columns:
+        df['sex'] = df['sex'].map(SEX_LABELS)
+    return df
+
+
+def add_derived_columns(df):
+    """Habit labels, BMI and age groups (shared by user and global data)."""
+    if 'smoking' in df.columns:
+        df['smoking'] = df['smoking'].map(SMOKING_LABELS)
+    if 'drinking' in df.columns:
+        df['drinking'] = df['drinking'].map(DRINKING_LABELS)
+    if 'height' in df.columns and 'weight' in df.columns:
+        df['height_m'] = df['height'] / 100
+        df['bmi'] = df['weight'] / (df['height_m'] ** 2)
+    if 'age' in df.columns:
+        df['age_group'] = pd.cut(df['age'], bins=AGE_BINS, labels=AGE_LABELS, right=False)
+    return df
+
+
+# ---------- SHARED GLOBAL FRAME ----------
+def _lean_values(series):
+    """The column as float32, int16 (whole numbers that fit, no missing values) or a categorical."""
+    if isinstance(series.dtype, pd.CategoricalDtype) or series.dtype == object:
+        categorical = pd.Categorical(series)
+        codes = categorical.codes.copy()
+        codes.flags.writeable = False
+        return pd.Categorical.from_codes(codes, dtype=categorical.dtype)
+    values = series.to_numpy()
+    if values.dtype.kind in 'iuf' and values.size:
+        low, high = np.iinfo(np.int16).min, np.iinfo(np.int16).max
+        whole = values.dtype.kind in 'iu' or (np.isfinite(values).all() and (values == np.round(values)).all())
+        lean = values.astype(np.int16 if whole and low <= values.min() and values.max() <= high else np.float32)
+    else:
+        lean = values.copy()
+    lean.flags.writeable = False
+    return lean
+
+
+def lean_frame(df):
+    """A copy of ``df`` with float32/int16 numbers and categorical text columns, all read-only.
+
+    In-place writes to it raise ValueError, so it can be shared between sessions.
+    """
+    return pd.DataFrame({name: _lean_values(df[name]) for name in df.columns}, copy=False)
+
+
+_global_frames = {}  # csv path -> (source signature, frame)
+_global_frames_lock = threading.Lock()
+
+
+@timed('stats.global_frame')
+def shared_global_frame(csv_path=DATASET_CSV):
+    """The global dataset, prepared and with derived columns, as one ``lean_frame`` per process.
+
+    Every session gets the same object: do not modify it (or add columns);
+    take a copy first if needed. Rebuilt when the CSV changes; raises
+    FileNotFoundError if it does not exist.
+    """
+    signature = _source_signature(csv_path)
+    with _global_frames_lock:
+        cached = _global_frames.get(csv_path)
+        if cached is None or cached[0] != signature:
+            df = add_derived_columns(prepare_global_frame(load_dataset(csv_path, as_category=True)))
+            cached = _global_frames[csv_path] = (signature, lean_frame(df))
+        return cached[1]
+
+
+# ---------- AGGREGATION ----------
+def _number(value):
+    if value is None:
+        return None
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+def _label(value):
+    return None if pd.isna(value) else value
+
+
+def _finite(values):
+    values = np.asarray(values, dtype=float)
+    return values[~np.isnan(values)]
+
+
+def sample_sorted(values, max_points):
+    """At most ``max_points`` of the sorted ``values``, evenly spaced so both extremes are kept.
+
+    ``max_points=None`` keeps everything.
+    """
+    if max_points is None or len(values) <= max_points:
+        return list(values)
+    if max_points <= 0:
+        return []
+    return [values[i] for i in np.linspace(0, len(values) - 1, max_points).round().astype(int)]
+
+
+def _box_stats(values):
+    """Box-plot statistics matching plotly's default (linear quartiles, 1.5 IQR whiskers),
+    with up to MAX_OUTLIERS of the points beyond the whiskers."""
+    values = _finite(values)
+    if values.size == 0:
+        return None
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    lowerfence = values[values >= q1 - 1.5 * iqr].min()
+    upperfence = values[values <= q3 + 1.5 * iqr].max()
+    outliers = np.sort(values[(values < lowerfence) | (values > upperfence)])
+    return {
+        'q1': float(q1),
+        'median': float(median),
+        'q3': float(q3),
+        'lowerfence': float(lowerfence),
+        'upperfence': float(upperfence),
+        'mean': float(values.mean()),
+        'count': int(values.size),
+        'n_outliers': int(outliers.size),
+        'outliers': [float(value) for value in sample_sorted(outliers, MAX_OUTLIERS)],
+    }
+
+
+def _group_counts(df, keys, count_name):
+    grouped = df.groupby(keys, observed=True).size().reset_index(name=count_name)
+    return [
+        {key: (str(row[key]) if key == 'age_group' else row[key]) for key in keys} | {count_name: int(row[count_name])}
+        for _, row in grouped.iterrows()
+    ]
+
+
+@timed('stats.summarize')
+def summarize(df):
+    """Everything the dashboard charts need, as plain JSON-serialisable data."""
+    summary = {
+        'rows': int(len(df)),
+        'means': {},
+        'percentage_yes': {},
+        'counts': {},
+        'sex_behavior': [],
+        'age_behavior': [],
+        'box': {},
+        'histogram': {},
+    }
+    for column in MEAN_COLUMNS:
+        if column in df.columns and not df[column].isnull().all():
+            summary['means'][column] = _number(df[column].mean())
+    for column in PERCENTAGE_COLUMNS:
+        if column in df.columns and not df[column].isnull().all():
+            labels = df[column].unique()
+            if 'Ya' in labels or 'Tidak' in labels:
+                summary['percentage_yes'][column] = float((df[column] == 'Ya').mean() * 100)
+            summary['counts'][column] = {str(k): int(v) for k, v in df[column].value_counts().items()}
+
+    habit_columns = {'smoking', 'drinking'}
+    if habit_columns.issubset(df.columns) and not df.empty:
+        if 'sex' in df.columns and df['sex'].nunique() > 0:
+            summary['sex_behavior'] = _group_counts(df, ['sex', 'smoking', 'drinking'], 'Count')
+        if 'age_group' in df.columns and df['age_group'].nunique() > 0:
+            summary['age_behavior'] = _group_counts(df, ['age_group', 'smoking', 'drinking'], 'Jumlah')
+        summary['box'] = summarize_box(df)
+        summary['histogram'] = summarize_histogram(df)
+    return summary
+
+
+def summarize_box(df):
+    """Box-plot statistics per habit group for each health metric (the ``box`` part of ``summarize``)."""
+    box = {}
+    for metric in HEALTH_METRICS:
+        if metric not in df.columns or df[metric].isnull().all():
+            continue
+        groups = []
+        # Like px.box, rows with a missing habit label still get their own box.
+        for (smoking, drinking), values in df.groupby(['smoking', 'drinking'], dropna=False)[metric]:
+            stats = _box_stats(values)
+            if stats is not None:
+                groups.append({'smoking': _label(smoking), 'drinking': _label(drinking)} | stats)
+        box[metric] = groups
+    return box
+
+
+@timed('stats.summarize_histogram')
+def summarize_histogram(df, bins=HISTOGRAM_BINS):
+    """Histogram bin counts per smoking status for each health metric (the ``histogram`` part of ``summarize``).
+
+    The bins span the whiskers of the whole column; ``below``/``above`` count
+    the outliers left out (they are drawn as box-plot points instead).
+    """
+    histogram = {}
+    # Habit codes are computed once for every metric (in groupby order, missing label last).
+    codes, habits = pd.factorize(df['smoking'], sort=True, use_na_sentinel=False)
+    for metric in HEALTH_METRICS:
+        if metric not in df.columns or df[metric].isnull().all():
+            continue
+        values = df[metric].to_numpy(dtype=float)
+        finite = ~np.isnan(values)
+        values = values[finite]
+        q1, q3 = np.percentile(values, [25, 75])
+        low = values[values >= q1 - 1.5 * (q3 - q1)].min()
+        high = values[values <= q3 + 1.5 * (q3 - q1)].max()
+        if low == high:
+            low, high = low - 0.5, high + 0.5
+        metric_codes = codes[finite]
+        groups = []
+        for code, habit in enumerate(habits):
+            # bins=int with a range takes numpy's uniform-bin path, much faster than explicit edges
+            counts, _ = np.histogram(values[metric_codes == code], bins=bins, range=(low, high))
+            groups.append({'smoking': _label(habit), 'counts': counts.tolist()})
+        histogram[metric] = {
+            'edges': np.linspace(low, high, bins + 1).tolist(),
+            'below': int((values < low).sum()),
+            'above': int((values > high).sum()),
+            'groups': groups,
+        }
+    return histogram
+
+
+def _age_group(age):
+    """The AGE_LABELS entry pd.cut(..., AGE_BINS, right=False) assigns to ``age``, or None."""
+    if age is None or not AGE_BINS[0] <= age < AGE_BINS[-1]:
+        return None
+    return AGE_LABELS[bisect.bisect_right(AGE_BINS, age) - 1]
+
+
+@timed('stats.summarize_cells')
+def summarize_cells(cells):
+    """``summarize`` of a user's whole history, built from user_manager.get_health_summary cells.
+
+    Gives the same means, percentages and counts as summarizing the rows, in
+    time proportional to the number of cells rather than rows. ``box`` and
+    ``histogram`` need the rows themselves and are left empty; fill them with
+    ``summarize_box`` and ``summarize_histogram``.
+    """
+    summary = {'rows': 0, 'means': {}, 'percentage_yes': {}, 'counts': {},
+               'sex_behavior': [], 'age_behavior': [], 'box': {}, 'histogram': {}}
+    counts = {column: collections.Counter() for column in PERCENTAGE_COLUMNS}
+    sex_behavior, age_behavior = collections.Counter(), collections.Counter()
+    moments = collections.defaultdict(lambda: [0, 0.0])
+    for cell in cells:
+        n_rows = cell['n_rows']
+        summary['rows'] += n_rows
+        smoking = SMOKING_LABELS.get(cell['smoking_prediction'])
+        drinking = DRINKING_LABELS.get(cell['drinking_prediction'])
+        counts['smoking'][smoking] += n_rows
+        counts['drinking'][drinking] += n_rows
+        if smoking is not None and drinking is not None:
+            if cell['sex'] is not None:
+                sex_behavior[(cell['sex'], smoking, drinking)] += n_rows
+            age_group = _age_group(cell['age'])
+            if age_group is not None:
+                age_behavior[(AGE_LABELS.index(age_group), smoking, drinking)] += n_rows
+        for metric in MEAN_COLUMNS:
+            if f'{metric}_count' in cell:
+                total = moments[metric]
+                total[0] += cell[f'{metric}_count']
+                total[1] += cell[f'{metric}_sum']
+
+    for metric, (count, total) in moments.items():
+        if count:
+            summary['means'][metric] = total / count
+    for column, counter in counts.items():
+        labelled = {label: count for label, count in counter.items() if label is not None}
+        if labelled:
+            summary['percentage_yes'][column] = labelled.get('Ya', 0) / summary['rows'] * 100
+            # value_counts order: most frequent first.
+            summary['counts'][column] = dict(sorted(labelled.items(), key=lambda item: (-item[1], item[0])))
+    summary['sex_behavior'] = [{'sex': sex, 'smoking': smoking, 'drinking': drinking, 'Count': count}
+                               for (sex, smoking, drinking), count in sorted(sex_behavior.items())]
+    summary['age_behavior'] = [{'age_group': AGE_LABELS[index], 'smoking': smoking, 'drinking': drinking, 'Jumlah': count}
+                               for (index, smoking, drinking), count in sorted(age_behavior.items())]
+    return summary
+
+
+# ---------- STORE ----------
+def _source_signature(csv_path):
+    stat = os.stat(csv_path)
+    return {'path': os.path.basename(csv_path), 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+@timed('stats.build_store')
+def build_store(csv_path=DATASET_CSV, store_path=STORE_PATH):
+    """Aggregates the dataset once and writes the result to ``store_path``."""
+    df = add_derived_columns(prepare_global_frame(load_dataset(csv_path)))
+    store = {'version': STORE_VERSION, 'source': _source_signature(csv_path), 'summary': summarize(df)}
+    tmp_path = f"{store_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(store, f, separators=(',', ':'))
+    os.replace(tmp_path, store_path)
+    return store
+
+
+_loaded = {}
+_loaded_lock = threading.Lock()
+
+
+@timed('stats.load_global')
+def load_global_stats(csv_path=DATASET_CSV, store_path=STORE_PATH):
+    """Returns the global summary, rebuilding the store if the CSV changed since it was built.
+
+    A store without its CSV is used as-is; raises FileNotFoundError if neither exists.
+    """
+    with _loaded_lock:
+        store = None
+        if os.path.exists(store_path):
+            store_mtime = os.stat(store_path).st_mtime_ns
+            cached = _loaded.get(store_path)
+            if cached is not None and cached[0] == store_mtime:
+                store = cached[1]
+            else:
+                with open(store_path) as f:
+                    store = json.load(f)
+                _loaded[store_path] = (store_mtime, store)
+
+        csv_exists = os.path.exists(csv_path)
+        stale = store is None or store.get('version') != STORE_VERSION or (
+            csv_exists and store.get('source') != _source_signature(csv_path))
+        if stale:
+            if not csv_exists:
+                raise FileNotFoundError(csv_path)
+            store = build_store(csv_path, store_path)
+            _loaded[store_path] = (os.stat(store_path).st_mtime_ns, store)
+        return store['summary']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the Dashboard's global statistics store.")
+    parser.add_argument('csv', nargs='?', default=DATASET_CSV)
+    parser.add_argument('-o', '--output', default=STORE_PATH)
+    args = parser.parse_args()
+    store = build_store(args.csv, args.output)
+    print(f"Wrote {args.output} ({os.path.getsize(args.output)} bytes, {store['summary']['rows']} rows summarised)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""Columnar ``.npy`` cache of the health CSV, one immutable directory per CSV version."""
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import timed
+
+DATASET_CSV = 'smoking_drinkin_100k.csv'
+CACHE_ROOT = '.cache'
+CACHE_VERSION = 2
+
+_build_lock = threading.Lock()
+
+
+def _cache_parent(csv_path, cache_root=None):
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    root = cache_root or os.path.join(os.path.dirname(os.path.abspath(csv_path)), CACHE_ROOT)
+    return os.path.join(root, stem)
+
+
+def _version_dir(parent, signature):
+    return os.path.join(parent, f"v{CACHE_VERSION}-{signature['mtime_ns']}-{signature['size']}")
+
+
+def cache_dir_for(csv_path, cache_root=None):
+    """The cache directory for the current version of ``csv_path``."""
+    return _version_dir(_cache_parent(csv_path, cache_root), _source_signature(csv_path))
+
+
+def _source_signature(csv_path):
+    stat = os.stat(csv_path)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def _read_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, 'meta.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _is_fresh(meta, csv_path):
+    return (meta is not None and meta.get('version') == CACHE_VERSION
+            and meta.get('source') == _source_signature(csv_path))
+
+
+def _prune(parent, current):
+    """Removes cache versions other than ``current`` and the newest one before it."""
+    older = []
+    for entry in os.scandir(parent):
+        if entry.name.startswith('tmp-') or entry.path == current:
+            continue  # another build in progress, or the version just built
+        try:
+            if entry.is_dir():
+                older.append((entry.stat().st_mtime_ns, entry.path))
+            else:
+                os.remove(entry.path)  # files from the single-directory layout of CACHE_VERSION 1
+        except FileNotFoundError:
+            pass  # removed by a concurrent build
+    for _, path in sorted(older, reverse=True)[1:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def build_cache(csv_path=DATASET_CSV, cache_root=None):
+    """Parses ``csv_path`` and writes the cache for its current version; returns the cache metadata."""
+    parent = _cache_parent(csv_path, cache_root)
+    signature = _source_signature(csv_path)
+    cache_dir = _version_dir(parent, signature)
+    with timed('csv.parse', file=os.path.basename(csv_path)):
+        df = pd.read_csv(csv_path)
+
+    tmp_dir = os.path.join(parent, f"tmp-{os.getpid()}-{threading.get_ident()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    columns = []
+    for index, name in enumerate(df.columns):
+        series = df[name]
+        filename = f"{index:03d}.npy"
+        entry = {'name': name, 'file': filename}
+        if series.dtype == object:
+            codes, categories = pd.factorize(series)
+            codes = codes.astype(np.int8 if len(categories) < 127 else np.int32)
+            np.save(os.path.join(tmp_dir, filename), codes)
+            entry['categories'] = [str(value) for value in categories]
+        else:
+            np.save(os.path.join(tmp_dir, filename), series.to_numpy())
+        columns.append(entry)
+    meta = {'version': CACHE_VERSION, 'source': signature, 'rows': len(df), 'columns': columns}
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+    # A version is never modified once renamed into place, so readers of the previous one keep working.
+    try:
+        os.rename(tmp_dir, cache_dir)
+    except OSError:
+        # Another process built this version first; its files are the same.
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        meta = _read_meta(cache_dir)
+        if meta is None or meta.get('source') != signature:
+            raise
+    _prune(parent, cache_dir)
+    return meta
+
+
+def ensure_cache(csv_path=DATASET_CSV, cache_root=None):
+    """Returns ``(cache_dir, meta)``, building the cache first if it is missing or stale."""
+    cache_dir = cache_dir_for(csv_path, cache_root)
+    meta = _read_meta(cache_dir)
+    if not _is_fresh(meta, csv_path):
+        with _build_lock:
+            cache_dir = cache_dir_for(csv_path, cache_root)
+            meta = _read_meta(cache_dir)
+            if not _is_fresh(meta, csv_path):
+                meta = build_cache(csv_path, cache_root)
+                cache_dir = _version_dir(_cache_parent(csv_path, cache_root), meta['source'])
+    return cache_dir, meta
+
+
+@timed('dataset.load')
+def load_dataset(csv_path=DATASET_CSV, columns=None, mmap=False, as_category=False, cache_root=None):
+    """Loads the dataset (or just ``columns``) from the binary cache.
+
+    With ``mmap=True`` numeric columns are read-only memory-mapped views instead of
+    in-memory copies. Text columns come back as strings, like ``pd.read_csv``, or
+    as pandas categoricals when ``as_category=True``.
+    Raises FileNotFoundError if the CSV does not exist.
+    """
+    while True:
+        cache_dir, meta = ensure_cache(csv_path, cache_root)
+        try:
+            return _read_columns(csv_path, cache_dir, meta, columns, mmap, as_category)
+        except FileNotFoundError:
+            if cache_dir == cache_dir_for(csv_path, cache_root):
+                raise
+            # Two rebuilds finished while reading and removed this version; read the current one.
+
+
+def _read_columns(csv_path, cache_dir, meta, columns, mmap, as_category):
+    entries = {entry['name']: entry for entry in meta['columns']}
+    if columns is None:
+        columns = list(entries)
+    missing = [name for name in columns if name not in entries]
+    if missing:
+        raise KeyError(f"Columns not in {os.path.basename(csv_path)}: {missing}")
+
+    data = {}
+    for name in columns:
+        entry = entries[name]
+        values = np.load(os.path.join(cache_dir, entry['file']), mmap_mode='r' if mmap else None)
+        if 'categories' in entry:
+            categorical = pd.Categorical.from_codes(np.asarray(values), categories=entry['categories'])
+            data[name] = categorical if as_category else np.asarray(categorical, dtype=object)
+        else:
+            data[name] = values
+    return pd.DataFrame(data, columns=columns, copy=False)
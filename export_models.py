@@ -0,0 +1,93 @@
+"""Exports the pickled models to NumPy-only ``.npz`` files next to them; re-run after retraining.
+
+    python export_models.py [--model-dir .] [--check-rows 20000]
+"""
+import argparse
+import os
+import pickle
+import sys
+
+import numpy as np
+import pandas as pd
+
+from batch_predict import DRINKING_MODEL_PATH, SMOKING_MODEL_PATH
+from features import DISEASE_MODEL_FILES
+from tree_engine import BoostedTrees, ForestEnsemble, compiled_path
+
+MODEL_FILES = [SMOKING_MODEL_PATH, DRINKING_MODEL_PATH, *DISEASE_MODEL_FILES.values()]
+
+
+def compile_model(model):
+    if hasattr(model, "get_booster"):
+        compiled = BoostedTrees.from_xgboost(model)
+        compiled.build_table()
+        return compiled
+    if hasattr(model, "estimators_"):
+        return ForestEnsemble.from_forests({None: model})
+    raise TypeError(f"Don't know how to compile {type(model).__name__}")
+
+
+def probe_rows(compiled, n_rows, seed=0):
+    """Rows whose values sit on, just below and just above the model's thresholds."""
+    rng = np.random.default_rng(seed)
+    internal = compiled.left != np.arange(len(compiled.left))
+    columns = {}
+    for index in range(compiled.n_features):
+        thresholds = np.unique(compiled.threshold[internal & (compiled.feature == index)]).astype(np.float32)
+        if thresholds.size == 0:
+            thresholds = np.zeros(1, dtype=np.float32)
+        pool = np.concatenate([
+            thresholds,
+            np.nextafter(thresholds, np.float32(-np.inf)),
+            np.nextafter(thresholds, np.float32(np.inf)),
+            rng.uniform(thresholds.min() - 1, thresholds.max() + 1, thresholds.size).astype(np.float32),
+        ])
+        columns[index] = rng.choice(pool, n_rows)
+        if isinstance(compiled, BoostedTrees):
+            columns[index][rng.random(n_rows) < 0.02] = np.nan
+    X = np.column_stack([columns[index] for index in range(compiled.n_features)])
+    return pd.DataFrame(X, columns=compiled.feature_names)
+
+
+def check(model, compiled, X):
+    """Returns ``(labels_equal, max_abs_proba_difference)``."""
+    expected_labels, expected_proba = model.predict(X), model.predict_proba(X)
+    if isinstance(compiled, ForestEnsemble):
+        labels, proba = compiled.predict_with_proba(X)
+        labels, proba = labels[None], proba[None]
+    else:
+        labels, proba = compiled.predict(X), compiled.predict_proba(X)
+    return np.array_equal(labels, expected_labels), float(np.abs(proba - expected_proba).max())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the pickled models to NumPy-only .npz files.")
+    parser.add_argument('--model-dir', default='.')
+    parser.add_argument('--check-rows', type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    failed = False
+    print(f"{'model':<36}{'nodes':>9}{'pkl KB':>10}{'npz KB':>10}{'max |dp|':>11}  status")
+    for filename in MODEL_FILES:
+        path = os.path.join(args.model_dir, filename)
+        if not os.path.exists(path):
+            print(f"{filename:<36}{'':>40}  skipped (not found)")
+            continue
+        with open(path, 'rb') as file:
+            model = pickle.load(file)
+        compiled = compile_model(model)
+        labels_equal, proba_diff = check(model, compiled, probe_rows(compiled, args.check_rows))
+        status = "ok"
+        if labels_equal:
+            compiled.save(compiled_path(path))
+        else:
+            status = "FAILED: predictions differ, not written"
+            failed = True
+        npz_kb = os.path.getsize(compiled_path(path)) / 1024 if labels_equal else 0
+        print(f"{filename:<36}{len(compiled.left):>9}{os.path.getsize(path) / 1024:>10.0f}{npz_kb:>10.0f}"
+              f"{proba_diff:>11.2g}  {status}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
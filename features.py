@@ -0,0 +1,87 @@
+"""Feature encoding shared by the prediction pages and the batch/CLI scorers."""
+from lazy_import import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+SMOKING_FEATURES = ['sex', 'age']
+DRINKING_FEATURES = ['sex', 'age', 'height', 'gamma_GTP']
+DISEASE_FEATURES = ['sex', 'age', 'height', 'weight', 'waistline', 'sight_left',
+                    'sight_right', 'hear_left', 'hear_right', 'SBP', 'DBP', 'BLDS',
+                    'tot_chole', 'HDL_chole', 'LDL_chole', 'triglyceride', 'hemoglobin',
+                    'urine_protein', 'serum_creatinine', 'SGOT_AST', 'SGOT_ALT',
+                    'gamma_GTP', 'smoking', 'drinking']
+
+DISEASE_MODEL_FILES = {
+    "Risiko Hipertensi": 'hypertension_risk_model.pkl',
+    "Risiko Diabetes": 'diabetes_risk_model.pkl',
+    "Risiko Kolesterol Tinggi": 'high_cholesterol_risk_model.pkl',
+    "Risiko Anemia": 'anemia_risk_model.pkl',
+    "Risiko Perlemakan Hati": 'fatty_liver_risk_model.pkl'
+}
+
+# The habit (XGBoost) models were trained with Pria = 1, Wanita = 0.
+HABIT_SEX_ENCODING = {'Pria': 1, 'Wanita': 0, 'Male': 1, 'Female': 0, 'M': 1, 'F': 0, 'L': 1, 'P': 0}
+# The disease-risk (RandomForest) models were trained with Pria = 0, Wanita = 1,
+# smoking as the dataset's 1/2/3 codes and drinking as 0/1. Codes are accepted as-is.
+DISEASE_SEX_ENCODING = {'Pria': 0, 'Wanita': 1, 'Male': 0, 'Female': 1, 'M': 0, 'F': 1, 'L': 0, 'P': 1}
+SMOKING_ENCODING = {'Tidak Merokok': 1, 'Mantan Perokok': 2, 'Perokok': 3, 1: 1, 2: 2, 3: 3}
+DRINKING_ENCODING = {'Tidak': 0, 'Ya': 1, 'N': 0, 'Y': 1, 0: 0, 1: 1}
+SEX_LABELS = {'Male': 'Pria', 'Female': 'Wanita', 'M': 'Pria', 'F': 'Wanita', 'L': 'Pria', 'P': 'Wanita'}
+
+
+def normalize_sex(values):
+    """Maps Male/Female-style labels onto the Pria/Wanita labels the app stores."""
+    return pd.Series(values).map(lambda value: SEX_LABELS.get(value, value))
+
+
+def _encode(values, encoding, description):
+    """Looks every value up in ``encoding``; raises ValueError naming the unrecognised labels.
+
+    A plain dict lookup per value: far cheaper than ``Series.map`` for the
+    one-row inputs the pages and the prediction server send.
+    """
+    values = np.asarray(values, dtype=object)
+    codes = [encoding.get(value) for value in values]
+    if None in codes:
+        unknown = sorted({str(value) for value, code in zip(values, codes) if code is None})
+        raise ValueError(f"{description} tidak dikenali: {', '.join(unknown)}")
+    return np.array(codes, dtype=np.int64)
+
+
+def encode_habit_sex(values):
+    """Pria/Wanita (or Male/Female, M/F, L/P) to the 1/0 code used by the habit models.
+
+    Raises ValueError naming the unrecognised labels.
+    """
+    return _encode(values, HABIT_SEX_ENCODING, "Jenis kelamin")
+
+
+def habit_inputs(df):
+    """Model inputs for the smoking and drinking models from a frame with
+    sex, age, height and gamma_GTP columns. Returns ``(smoking_X, drinking_X)``."""
+    encoded = pd.DataFrame({
+        'sex': encode_habit_sex(df['sex']),
+        'age': df['age'].to_numpy(),
+        'height': df['height'].to_numpy(),
+        'gamma_GTP': df['gamma_GTP'].to_numpy(),
+    })
+    return encoded[SMOKING_FEATURES], encoded[DRINKING_FEATURES]
+
+
+def disease_inputs(df):
+    """Model input for the disease-risk models from a frame with the DISEASE_FEATURES
+    columns, where sex, smoking and drinking may still be labels (Pria, Perokok, Ya)."""
+    encoded = {name: df[name].to_numpy() for name in DISEASE_FEATURES}
+    encoded['sex'] = _encode(df['sex'], DISEASE_SEX_ENCODING, "Jenis kelamin")
+    encoded['smoking'] = _encode(df['smoking'], SMOKING_ENCODING, "Status merokok")
+    encoded['drinking'] = _encode(df['drinking'], DRINKING_ENCODING, "Status minum alkohol")
+    return pd.DataFrame(encoded)
+
+
+def smoking_status(prediction):
+    return "Perokok" if prediction == 1 else "Bukan Perokok"
+
+
+def drinking_status(prediction):
+    return "Peminum" if prediction == 1 else "Bukan Peminum"
@@ -0,0 +1,240 @@
+"""Latency histograms for the app's hot paths, plus opt-in cProfile profiles of slow reruns."""
+import bisect
+import cProfile
+import functools
+import os
+import re
+import threading
+import time
+
+# Upper bounds in seconds; the last bucket is +Inf.
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_NAME = "app_operation_seconds"
+ERRORS_METRIC_NAME = "app_operation_errors_total"
+
+PROFILE_DIR = os.environ.get("APP_PROFILE_DIR")
+PROFILE_THRESHOLD_MS = float(os.environ.get("APP_PROFILE_THRESHOLD_MS", 500))
+
+
+class Histogram:
+    """Thread-safe latency histogram over BUCKETS."""
+
+    __slots__ = ("counts", "count", "sum", "max", "errors", "_lock")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, error=False):
+        index = bisect.bisect_left(BUCKETS, seconds)  # first bucket with seconds <= le
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+            if error:
+                self.errors += 1
+
+    def clear(self):
+        with self._lock:
+            self.counts = [0] * (len(BUCKETS) + 1)
+            self.count = 0
+            self.sum = 0.0
+            self.max = 0.0
+            self.errors = 0
+
+    def quantile(self, q):
+        """Estimated ``q`` quantile in seconds, interpolated within its bucket like
+        Prometheus' histogram_quantile (capped at the largest value seen)."""
+        with self._lock:
+            counts, count, largest = list(self.counts), self.count, self.max
+        if not count:
+            return 0.0
+        rank, seen = q * count, 0
+        for index, bucket_count in enumerate(counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = BUCKETS[index - 1] if index else 0.0
+                upper = BUCKETS[index] if index < len(BUCKETS) else largest
+                return min(lower + (upper - lower) * (rank - seen) / bucket_count, largest)
+            seen += bucket_count
+        return largest
+
+
+_histograms = {}  # (operation, ((label, value), ...)) -> Histogram
+_histograms_lock = threading.Lock()
+
+
+def histogram(operation, **labels):
+    """The histogram for ``operation`` with ``labels``, created on first use."""
+    key = (operation, tuple(sorted(labels.items())))
+    found = _histograms.get(key)
+    if found is None:
+        with _histograms_lock:
+            found = _histograms.setdefault(key, Histogram())
+    return found
+
+
+def observe(operation, seconds, error=False, **labels):
+    histogram(operation, **labels).observe(seconds, error)
+
+
+class timed:
+    """Times a block (``with timed(...)``) or every call of a function (``@timed(...)``).
+
+    Calls that raise are counted too, and as errors.
+    """
+
+    def __init__(self, operation, **labels):
+        self.histogram = histogram(operation, **labels)
+        self._local = threading.local()
+
+    def __enter__(self):
+        try:
+            self._local.starts.append(time.perf_counter())
+        except AttributeError:  # first use on this thread
+            self._local.starts = [time.perf_counter()]
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        started = self._local.starts.pop()
+        self.histogram.observe(time.perf_counter() - started, exc_type is not None)
+        return False
+
+    def __call__(self, fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            error = True
+            try:
+                result = fn(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                self.histogram.observe(time.perf_counter() - started, error)
+        return wrapper
+
+
+def snapshot():
+    """Per-operation calls, errors and latency percentiles (ms), slowest total first."""
+    with _histograms_lock:
+        items = list(_histograms.items())
+    rows = []
+    for (operation, labels), hist in items:
+        if not hist.count:
+            continue
+        rows.append({
+            "operation": operation,
+            "labels": ", ".join(f"{name}={value}" for name, value in labels),
+            "calls": hist.count,
+            "errors": hist.errors,
+            "total_s": hist.sum,
+            "mean_ms": hist.sum / hist.count * 1000,
+            "p50_ms": hist.quantile(0.50) * 1000,
+            "p95_ms": hist.quantile(0.95) * 1000,
+            "p99_ms": hist.quantile(0.99) * 1000,
+            "max_ms": hist.max * 1000,
+        })
+    return sorted(rows, key=lambda row: row["total_s"], reverse=True)
+
+
+def reset():
+    """Forgets every recorded observation (in place: ``@timed`` functions hold their histogram)."""
+    with _histograms_lock:
+        histograms = list(_histograms.values())
+    for hist in histograms:
+        hist.clear()
+
+
+_LABEL_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n"})
+
+
+def _label_text(labels):
+    return ",".join(f'{name}="{str(value).translate(_LABEL_ESCAPES)}"' for name, value in labels)
+
+
+def prometheus_text():
+    """All histograms in the Prometheus text exposition format (version 0.0.4)."""
+    with _histograms_lock:
+        items = sorted(_histograms.items(), key=lambda item: (item[0][0], repr(item[0][1])))
+    lines = [f"# HELP {METRIC_NAME} Latency of instrumented operations.", f"# TYPE {METRIC_NAME} histogram"]
+    errors = [f"# HELP {ERRORS_METRIC_NAME} Instrumented calls that raised.",
+              f"# TYPE {ERRORS_METRIC_NAME} counter"]
+    for (operation, labels), hist in items:
+        with hist._lock:
+            counts, count, total, failed = list(hist.counts), hist.count, hist.sum, hist.errors
+        base = _label_text((("operation", operation),) + labels)
+        cumulative = 0
+        for bound, bucket_count in zip(BUCKETS + ("+Inf",), counts):
+            cumulative += bucket_count
+            lines.append(f'{METRIC_NAME}_bucket{{{base},le="{bound}"}} {cumulative}')
+        lines.append(f"{METRIC_NAME}_sum{{{base}}} {total!r}")
+        lines.append(f"{METRIC_NAME}_count{{{base}}} {count}")
+        errors.append(f"{ERRORS_METRIC_NAME}{{{base}}} {failed}")
+    return "\n".join(lines + errors) + "\n"
+
+
+# ---------- RERUN PROFILES ----------
+_rerun = threading.local()
+
+
+# cProfile profiles every thread from Python 3.12 on, so only one rerun is profiled at a time;
+# _profiling is (thread ident, profiler) of that rerun.
+_profile_lock = threading.Lock()
+_profiling = None
+
+
+def _start_profile():
+    global _profiling
+    with _profile_lock:
+        if _profiling is not None:
+            owner, profiler = _profiling
+            if owner != threading.get_ident() and any(t.ident == owner for t in threading.enumerate()):
+                return None  # another rerun is being profiled
+            profiler.disable()  # left behind by a rerun that stopped early
+            _profiling = None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # some other profiler is active
+            return None
+        _profiling = (threading.get_ident(), profiler)
+        return profiler
+
+
+def _stop_profile(profiler):
+    global _profiling
+    with _profile_lock:
+        if _profiling is not None and _profiling[1] is profiler:
+            profiler.disable()
+            _profiling = None
+
+
+def start_rerun(page):
+    """Starts timing (and with APP_PROFILE_DIR, profiling) this thread's rerun of ``page``."""
+    profiler = _start_profile() if PROFILE_DIR else None
+    _rerun.current = (page, time.perf_counter(), profiler)
+
+
+def finish_rerun():
+    """Records the rerun started by ``start_rerun``; returns the profile path if one was written."""
+    current = getattr(_rerun, "current", None)
+    if current is None:
+        return None
+    _rerun.current = None
+    page, started, profiler = current
+    if profiler is not None:
+        _stop_profile(profiler)
+    seconds = time.perf_counter() - started
+    observe("page.rerun", seconds, page=page)
+    if profiler is None or seconds * 1000 < PROFILE_THRESHOLD_MS:
+        return None
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    safe_page = re.sub(r"[^\w.-]+", "_", page)
+    path = os.path.join(PROFILE_DIR, f"{safe_page}-{time.strftime('%Y%m%d-%H%M%S')}-{seconds * 1000:.0f}ms.prof")
+    profiler.dump_stats(path)
+    return path
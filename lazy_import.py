@@ -0,0 +1,26 @@
+"""Deferred imports, so a page that stops early never loads pandas, plotly or the models."""
+import importlib
+import sys
+import types
+
+
+class _LazyModule(types.ModuleType):
+    """Stands in for a module until one of its attributes is first read."""
+
+    def __getattr__(self, attr):
+        # importlib holds a per-module lock, so concurrent sessions import once.
+        module = importlib.import_module(self.__name__)
+        # Copy the namespace so later lookups skip __getattr__ entirely.
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+    def __dir__(self):
+        return dir(importlib.import_module(self.__name__))
+
+
+def lazy_import(name):
+    """Returns module ``name``: the real one if it is already imported, else a lazy stand-in."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return _LazyModule(name)
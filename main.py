@@ -1,13 +1,10 @@
 import streamlit as st
-from user_manager import login, logout, init_db
+from user_manager import is_authenticated, login, logout, init_db
 
 def main():
-    # Initialize login state
-    if "authenticated" not in st.session_state:
-        st.session_state.authenticated = False
-
     # MAIN SECTION
-    if not st.session_state.authenticated:
+    # Login menyimpan token sesi bertanda tangan; rerun cukup memeriksa token itu
+    if not is_authenticated():
         st.title("🔒 Login Required")
         init_db()
         if login():
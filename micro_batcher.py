@@ -0,0 +1,188 @@
+"""Coalesces concurrent small predict calls into one batched call."""
+import collections
+import threading
+import time
+from concurrent.futures import Future
+
+from instrumentation import observe
+from lazy_import import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+LATENCY_SAMPLES = 1000
+
+
+def _concat(parts):
+    if len(parts) == 1:
+        return parts[0]
+    if isinstance(parts[0], pd.DataFrame):
+        return pd.concat(parts, ignore_index=True)
+    return np.concatenate(parts)
+
+
+def _take(result, start, stop):
+    """Rows ``start:stop`` of a predict result: an array, or a dict/tuple of them."""
+    if isinstance(result, dict):
+        return {key: _take(value, start, stop) for key, value in result.items()}
+    if isinstance(result, tuple):
+        return tuple(_take(value, start, stop) for value in result)
+    return result[start:stop]
+
+
+class _Request:
+    __slots__ = ("X", "future", "submitted")
+
+    def __init__(self, X):
+        self.X = X
+        self.future = Future()
+        self.submitted = time.perf_counter()
+
+
+class MicroBatcher:
+    """Runs ``predict_fn`` on batches of queued requests.
+
+    ``predict_fn`` takes a DataFrame (or array) of rows and returns an array
+    with one entry per row, or a dict/tuple of such arrays. A batch closes when
+    it holds ``max_batch_size`` rows or when its oldest request has waited
+    ``max_wait_ms``.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=2.0, name=None):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.name = name
+        self._queue = collections.deque()
+        self._condition = threading.Condition()
+        self._worker = None
+        self._closed = False
+        self._batches = 0
+        self._requests = 0
+        self._rows = 0
+        self._largest_batch = 0
+        self._queue_latencies = collections.deque(maxlen=LATENCY_SAMPLES)
+
+    def submit(self, X):
+        """Queues ``X``; returns a Future resolving to this caller's part of the result."""
+        request = _Request(X)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name=f"MicroBatcher-{self.name}", daemon=True)
+                self._worker.start()
+            self._queue.append(request)
+            self._condition.notify()
+        return request.future
+
+    def predict(self, X, timeout=None):
+        """Blocking ``submit``: returns the rows of the result belonging to ``X``."""
+        return self.submit(X).result(timeout)
+
+    def close(self):
+        """Stops the worker once the queued requests have been served."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._worker is not None:
+            self._worker.join()
+
+    def _next_batch(self):
+        with self._condition:
+            while not self._queue:
+                if self._closed:
+                    return None
+                self._condition.wait()
+            deadline = self._queue[0].submitted + self.max_wait
+            while True:
+                rows = sum(len(request.X) for request in self._queue)
+                remaining = deadline - time.perf_counter()
+                if rows >= self.max_batch_size or remaining <= 0 or self._closed:
+                    break
+                self._condition.wait(remaining)
+            batch, rows = [], 0
+            while self._queue and (not batch or rows + len(self._queue[0].X) <= self.max_batch_size):
+                request = self._queue.popleft()
+                batch.append(request)
+                rows += len(request.X)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            started = time.perf_counter()
+            rows = sum(len(request.X) for request in batch)
+            with self._condition:
+                self._batches += 1
+                self._requests += len(batch)
+                self._rows += rows
+                self._largest_batch = max(self._largest_batch, rows)
+                self._queue_latencies.extend(started - request.submitted for request in batch)
+            outcomes = [(batch, *self._predict(batch))]
+            if outcomes[0][2] is not None and len(batch) > 1:
+                # Rerun each request on its own, so one bad request only fails its own caller
+                outcomes = [([request], *self._predict([request])) for request in batch]
+            for requests, result, error in outcomes:
+                if error is not None:
+                    for request in requests:
+                        request.future.set_exception(error)
+                    continue
+                start = 0
+                for request in requests:
+                    stop = start + len(request.X)
+                    request.future.set_result(_take(result, start, stop))
+                    start = stop
+
+    def _predict(self, requests):
+        """Runs ``predict_fn`` on the rows of ``requests``; returns ``(result, exception)``."""
+        started = time.perf_counter()
+        try:
+            result = self.predict_fn(_concat([request.X for request in requests]))
+        except BaseException as exc:
+            observe("predict.batch", time.perf_counter() - started, error=True, batcher=self.name or "")
+            return None, exc
+        observe("predict.batch", time.perf_counter() - started, batcher=self.name or "")
+        return result, None
+
+    def stats(self):
+        """Batch-size (in rows) and queue-latency metrics since the batcher was created."""
+        with self._condition:
+            latencies = np.array(self._queue_latencies) * 1000
+            return {
+                "batcher": self.name,
+                "batches": self._batches,
+                "requests": self._requests,
+                "rows": self._rows,
+                "mean_batch_rows": self._rows / self._batches if self._batches else 0.0,
+                "largest_batch_rows": self._largest_batch,
+                "queue_ms_p50": float(np.percentile(latencies, 50)) if latencies.size else 0.0,
+                "queue_ms_p95": float(np.percentile(latencies, 95)) if latencies.size else 0.0,
+                "queued": len(self._queue),
+            }
+
+
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+
+def shared_batcher(name, predict_fn, **options):
+    """Returns the process-wide batcher called ``name``, creating it on first use.
+
+    Later calls get the existing batcher whatever ``predict_fn`` they pass, so
+    ``predict_fn`` should look its model up (e.g. from the registry) on every call.
+    """
+    with _batchers_lock:
+        batcher = _batchers.get(name)
+        if batcher is None:
+            batcher = _batchers[name] = MicroBatcher(predict_fn, name=name, **options)
+        return batcher
+
+
+def batcher_stats():
+    """``stats()`` of every shared batcher."""
+    with _batchers_lock:
+        batchers = list(_batchers.values())
+    return [batcher.stats() for batcher in batchers]
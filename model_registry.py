@@ -0,0 +1,181 @@
+import os
+import pickle
+import threading
+import time
+
+from instrumentation import observe
+from tree_engine import compiled_path, load_compiled
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _current_rss():
+    """Resident set size of this process in bytes (0 if it cannot be read)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is not None:
+        # ru_maxrss is the peak, in kilobytes on Linux and bytes on macOS.
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if os.uname().sysname == "Darwin" else rss * 1024
+    return 0
+
+
+def _source(path):
+    """The file to load for ``path`` and its stat: the compiled ``.npz`` when it
+    exists and is at least as new as the pickle, otherwise the pickle itself."""
+    compiled = compiled_path(path)
+    if compiled != path:
+        try:
+            compiled_stat = os.stat(compiled)
+        except FileNotFoundError:
+            pass
+        else:
+            try:
+                if compiled_stat.st_mtime_ns >= os.stat(path).st_mtime_ns:
+                    return compiled, compiled_stat
+            except FileNotFoundError:
+                return compiled, compiled_stat
+    return path, os.stat(path)
+
+
+def model_version(path):
+    """``(source file, mtime_ns, size)`` of what ``ModelRegistry.get(path)`` would load,
+    or None if the model is missing. Costs a stat or two; nothing is loaded."""
+    try:
+        source, stat = _source(os.path.abspath(path))
+    except FileNotFoundError:
+        return None
+    return source, stat.st_mtime_ns, stat.st_size
+
+
+class _Entry:
+    __slots__ = ("model", "source", "mtime_ns", "size", "load_seconds", "rss_bytes", "loads")
+
+    def __init__(self):
+        self.model = None
+        self.source = None
+        self.mtime_ns = None
+        self.size = None
+        self.load_seconds = 0.0
+        self.rss_bytes = 0
+        self.loads = 0
+
+
+class ModelRegistry:
+    """Process-wide cache of pickled models.
+
+    Each model is unpickled once and shared by every session. ``get`` stats the
+    file on each call and reloads the model when its mtime or size changes.
+    When export_models.py has written a ``.npz`` next to the pickle and it is
+    not older than the pickle, that NumPy-only copy is loaded instead.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """Registers ``callback(path)``, called after a model is reloaded because its
+        file changed or after ``invalidate`` (with ``path=None`` when everything was dropped)."""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def _notify(self, path):
+        with self._lock:
+            listeners = list(self._listeners)
+        for callback in listeners:
+            callback(path)
+
+    def get(self, path):
+        """Returns the model stored at ``path``, loading or reloading it if needed.
+
+        Raises FileNotFoundError if neither the file nor its compiled copy exists.
+        """
+        path = os.path.abspath(path)
+        source, stat = _source(path)
+        replaced = False
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                entry = self._entries[path] = _Entry()
+            if (entry.model is None or entry.source != source
+                    or entry.mtime_ns != stat.st_mtime_ns or entry.size != stat.st_size):
+                replaced = entry.model is not None
+                # Drop the stale model first so both copies are never resident together.
+                entry.model = None
+                rss_before = _current_rss()
+                start = time.perf_counter()
+                if source == path:
+                    with open(path, "rb") as file:
+                        entry.model = pickle.load(file)
+                else:
+                    entry.model = load_compiled(source)
+                entry.source = source
+                entry.load_seconds = time.perf_counter() - start
+                entry.rss_bytes = max(_current_rss() - rss_before, 0)
+                entry.mtime_ns = stat.st_mtime_ns
+                entry.size = stat.st_size
+                entry.loads += 1
+                observe("model.load", entry.load_seconds, model=os.path.basename(source))
+            model = entry.model
+        if replaced:
+            self._notify(path)
+        return model
+
+    def available(self, path):
+        """True when ``path`` (or its compiled copy) exists; nothing is loaded."""
+        try:
+            _source(os.path.abspath(path))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def get_many(self, paths):
+        """Loads several models; returns a dict keyed by the given paths."""
+        return {path: self.get(path) for path in paths}
+
+    def invalidate(self, path=None):
+        """Frees one model (or all of them); the next ``get`` reloads from disk."""
+        if path is not None:
+            path = os.path.abspath(path)
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(path, None)
+        self._notify(path)
+
+    def stats(self):
+        """Load time, resident memory delta and file size for each loaded model."""
+        with self._lock:
+            return [
+                {
+                    "model": os.path.basename(entry.source),
+                    "load_seconds": entry.load_seconds,
+                    "rss_bytes": entry.rss_bytes,
+                    "file_bytes": entry.size,
+                    "loads": entry.loads,
+                }
+                for path, entry in self._entries.items()
+                if entry.model is not None
+            ]
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Returns the registry shared by all Streamlit sessions in this process."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
@@ -1,12 +1,20 @@
 import streamlit as st
-import pandas as pd
+from user_manager import require_login
+require_login('Smoking & Alcohol Prediction')
+
+from instrumentation import finish_rerun, timed
+
 import datetime
-import pickle
-from user_manager import add_health_data # Import the new function
+from lazy_import import lazy_import
+from user_manager import add_health_data_bulk, log_action, queue_health_data, report_failed_writes, sync_writes, track_writes
+from model_registry import get_registry
+from features import drinking_status, habit_inputs, smoking_status
+from batch_predict import DRINKING_MODEL_PATH, SMOKING_MODEL_PATH, REQUIRED_COLUMNS, OPTIONAL_COLUMNS, score_csv
+from micro_batcher import shared_batcher
+from prediction_cache import feature_key, shared_cache
 
-if not st.session_state.get('authenticated'):
-    st.warning('Silahkan login terlebih dahulu.')
-    st.stop()
+# pandas baru dimuat saat prediksi pertama dijalankan
+pd = lazy_import('pandas')
 
 # --- PAGE CONFIGURATION ---
 st.set_page_config(
@@ -15,31 +23,44 @@ st.set_page_config(
     layout="wide"
 )
 
+# Data disimpan di latar belakang; penyimpanan yang gagal sejak rerun sebelumnya dilaporkan di sini
+report_failed_writes()
+
 # --- MODEL LOADING ---
-@st.cache_data
 def load_models():
     """
     Loads the pickled models for smoking and drinking prediction.
-    This is cached to improve performance.
+    They are shared through the process-wide registry; only batch scoring needs them here.
     """
+    registry = get_registry()
     try:
         # Menggunakan path relatif. Pastikan file .pkl berada di folder yang sama.
-        with open('xgb_best_model_smk.pkl', 'rb') as file:
-            smoking_model = pickle.load(file)
-        with open('xgb_best_model_drink.pkl', 'rb') as file:
-            drinking_model = pickle.load(file)
+        smoking_model = registry.get('xgb_best_model_smk.pkl')
+        drinking_model = registry.get('xgb_best_model_drink.pkl')
         return smoking_model, drinking_model
     except FileNotFoundError:
         return None, None
 
-smoking_model, drinking_model = load_models()
+# Model baru dimuat saat dibutuhkan; di sini cukup dicek bahwa filenya ada
+models_available = all(get_registry().available(path) for path in (SMOKING_MODEL_PATH, DRINKING_MODEL_PATH))
+
+# Prediksi satu baris dari semua sesi digabung menjadi satu panggilan predict per model
+smoking_batcher = shared_batcher('smoking', lambda X: get_registry().get(SMOKING_MODEL_PATH).predict(X))
+drinking_batcher = shared_batcher('drinking', lambda X: get_registry().get(DRINKING_MODEL_PATH).predict(X))
+# Input terenkode yang sama dijawab dari cache; cache dikosongkan saat file model diganti
+habit_cache = shared_cache('habits', [SMOKING_MODEL_PATH, DRINKING_MODEL_PATH])
+
+def predict_habits(input_smoking, input_drinking):
+    smoking_future = smoking_batcher.submit(input_smoking)
+    drinking_future = drinking_batcher.submit(input_drinking)
+    return int(smoking_future.result()[0]), int(drinking_future.result()[0])
 
 # --- MAIN PAGE ---
 st.sidebar.title("Sistem Prediksi Kesehatan")
 st.sidebar.info("Aplikasi ini hanya berisi halaman Prediksi Kesehatan.")
 
 # --- PAGE ROUTING ---
-if smoking_model is None or drinking_model is None:
+if not models_available:
     st.error("Gagal memuat file model. Pastikan file `xgb_best_model_smk.pkl` dan `xgb_best_model_drink.pkl` berada di direktori yang sama dengan aplikasi.")
 else:
     st.title("🔎 Prediksi Status Merokok & Minum")
@@ -82,20 +103,23 @@ else:
         if empty_fields:
             st.error(f"Data tidak lengkap. Harap isi kolom berikut: {', '.join(empty_fields)}", icon="🚨")
         else:
-            sex_encoded = 1 if sex == "Pria" else 0
-
-            input_smoking = pd.DataFrame([[sex_encoded, age]], columns=['sex', 'age'])
-            input_drinking = pd.DataFrame([[sex_encoded, age, height, gamma_gtp]], columns=['sex', 'age', 'height', 'gamma_GTP'])
+            input_smoking, input_drinking = habit_inputs(pd.DataFrame({
+                'sex': [sex], 'age': [age], 'height': [height], 'gamma_GTP': [gamma_gtp]
+            }))
 
-            prediction_smoking = smoking_model.predict(input_smoking)[0]
-            prediction_drinking = drinking_model.predict(input_drinking)[0]
+            # Fitur model merokok adalah bagian dari fitur model minum, jadi satu kunci cukup
+            with timed('predict.habits'):
+                prediction_smoking, prediction_drinking = habit_cache.get_or_compute(
+                    feature_key(input_drinking), lambda: predict_habits(input_smoking, input_drinking))
 
-            smoking_result_text = "Perokok" if prediction_smoking == 1 else "Bukan Perokok"
-            drinking_result_text = "Peminum" if prediction_drinking == 1 else "Bukan Peminum"
+            smoking_result_text = smoking_status(prediction_smoking)
+            drinking_result_text = drinking_status(prediction_drinking)
 
-            # Store the data in the database
+            # Simpan ke database lewat antrean tulis; Dashboard menunggu antrean sebelum membaca
             current_user = st.session_state.user
-            add_health_data(current_user, age, sex, height, weight, gamma_gtp, prediction_smoking, prediction_drinking, sbp, dbp, blds)
+            track_writes("health data",
+                         queue_health_data(current_user, age, sex, height, weight, gamma_gtp, prediction_smoking, prediction_drinking, sbp, dbp, blds),
+                         log_action(current_user, 'predict_habits', smoking=prediction_smoking, drinking=prediction_drinking))
 
             # Store the data in session state for pre-filling Health Recommendation
             st.session_state.latest_prediction_data = {
@@ -116,3 +140,55 @@ else:
             res_col1, res_col2 = st.columns(2)
             res_col1.metric(label="Status Merokok", value=smoking_result_text)
             res_col2.metric(label="Status Minum", value=drinking_result_text)
+
+    # --- BATCH PREDICTION ---
+    st.markdown("---")
+    with st.expander("📁 Prediksi Batch (Unggah CSV)"):
+        st.markdown(
+            f"Unggah file CSV dengan kolom **{', '.join(REQUIRED_COLUMNS)}** "
+            f"(opsional: {', '.join(OPTIONAL_COLUMNS)}). Kolom `sex` berisi Pria/Wanita atau Male/Female."
+        )
+        uploaded_file = st.file_uploader("File CSV", type="csv", key="batch_csv")
+        save_batch = st.checkbox("Simpan hasil ke riwayat data kesehatan saya", value=False)
+
+        if uploaded_file is not None and st.button("Proses Batch", type="primary"):
+            csv_chunks = []
+            scored_chunks = []
+            preview = None
+            rows_scored = 0
+            progress = st.progress(0.0, text="Memproses...")
+            smoking_model, drinking_model = load_models()
+            try:
+                for index, scored in enumerate(score_csv(uploaded_file, smoking_model, drinking_model)):
+                    csv_chunks.append(scored.to_csv(index=False, header=index == 0))
+                    if save_batch:
+                        scored_chunks.append(scored)
+                    if preview is None:
+                        preview = scored.head(20)
+                    rows_scored += len(scored)
+                    progress.progress(min(uploaded_file.tell() / max(uploaded_file.size, 1), 1.0),
+                                      text=f"{rows_scored} baris diproses...")
+            except ValueError as e:
+                st.error(f"Gagal memproses file: {e}", icon="🚨")
+            else:
+                if save_batch and scored_chunks:
+                    # Baris dari antrean lebih dulu, agar urutan timestamp tetap sesuai urutan input
+                    try:
+                        report_failed_writes(sync_writes(st.session_state.user))
+                    except TimeoutError:
+                        st.warning("Data sebelumnya masih dalam antrean penyimpanan; urutan waktu hasil batch bisa tercampur.")
+                    add_health_data_bulk(st.session_state.user, pd.concat(scored_chunks))
+                track_writes("batch history",
+                             log_action(st.session_state.user, 'predict_habits_batch', rows=rows_scored, saved=save_batch))
+                progress.progress(1.0, text=f"Selesai: {rows_scored} baris diproses.")
+                st.success(f"Prediksi batch selesai untuk {rows_scored} baris." + (" Hasil disimpan ke riwayat Anda." if save_batch else ""))
+                if preview is not None:
+                    st.dataframe(preview, hide_index=True)
+                st.download_button(
+                    label="Unduh Hasil Prediksi (.csv)",
+                    data="".join(csv_chunks).encode('utf-8'),
+                    file_name=f"prediksi_batch_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                    mime="text/csv"
+                )
+
+finish_rerun()
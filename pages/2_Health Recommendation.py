@@ -1,10 +1,9 @@
 import streamlit as st
-import pandas as pd
+from user_manager import require_login
 # from user_manager import get_latest_health_data # No longer directly fetching from DB for initial pre-fill
+require_login('Health Recommendation')
 
-if not st.session_state.get('authenticated'):
-    st.warning('Silahkan login terlebih dahulu.')
-    st.stop()
+from instrumentation import finish_rerun
 
 
 def calculate_bmi(tinggi, berat):
@@ -185,3 +184,5 @@ if submitted:
                     st.markdown(f"**{news['title']}**")
                     st.write(news['summary'])
                     st.page_link(news['link'], label="Baca Selengkapnya...", icon="➡️")
+
+finish_rerun()
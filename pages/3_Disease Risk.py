@@ -1,40 +1,41 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-
-# Cek autentikasi
-if not st.session_state.get('authenticated'):
-    st.warning('Silahkan login terlebih dahulu.')
-    st.stop()
-    
-# Muat model yang telah dilatih
-import pickle
-try:
-    with open('hypertension_risk_model.pkl', 'rb') as file:
-        hypertension_model = pickle.load(file)
-    with open('diabetes_risk_model.pkl', 'rb') as file:
-        diabetes_model = pickle.load(file)
-    with open('high_cholesterol_risk_model.pkl', 'rb') as file:
-        high_cholesterol_model = pickle.load(file)
-    with open('anemia_risk_model.pkl', 'rb') as file:
-        anemia_model = pickle.load(file)
-    with open('fatty_liver_risk_model.pkl', 'rb') as file:
-        fatty_liver_model = pickle.load(file)
-except FileNotFoundError:
-    st.error("Error: Satu atau lebih file model (.pkl) tidak ditemukan. Pastikan file-file tersebut berada di direktori yang sama dengan aplikasi.")
-    st.stop()
-
-# Definisikan kolom fitur
-feature_columns = ['sex', 'age', 'height', 'weight', 'waistline', 'sight_left',
-                   'sight_right', 'hear_left', 'hear_right', 'SBP', 'DBP', 'BLDS',
-                   'tot_chole', 'HDL_chole', 'LDL_chole', 'triglyceride', 'hemoglobin',
-                   'urine_protein', 'serum_creatinine', 'SGOT_AST', 'SGOT_ALT',
-                   'gamma_GTP', 'smoking', 'drinking']
+from user_manager import log_action, report_failed_writes, require_login, track_writes
+require_login('Disease Risk')
+
+from instrumentation import finish_rerun, timed
+
+from lazy_import import lazy_import
+from model_registry import get_registry
+from tree_engine import compiled_forests
+from features import DISEASE_FEATURES, DISEASE_MODEL_FILES, disease_inputs
+from micro_batcher import batcher_stats, shared_batcher
+from prediction_cache import cache_stats, feature_key, shared_cache
+import risk_rules
+
+pd = lazy_import('pandas')
+
+METHOD_MODEL = "Model Machine Learning"
+METHOD_RULES = "Aturan Klinis"
+
+# Model dimuat sekali per proses dan dibagi ke semua sesi, baru pada prediksi pertama;
+# di sini cukup dicek bahwa filenya ada
+registry = get_registry()
+models_available = all(registry.available(path) for path in DISEASE_MODEL_FILES.values())
+
+# Prediksi dari semua sesi yang datang bersamaan dinilai dalam satu batch
+disease_batcher = shared_batcher('disease-risk', lambda X: compiled_forests(
+    {name: registry.get(path) for name, path in DISEASE_MODEL_FILES.items()}).predict_with_proba(X))
+# Input terenkode yang sama dijawab dari cache; cache dikosongkan saat file model diganti
+disease_cache = shared_cache('disease-risk', DISEASE_MODEL_FILES.values())
 
 st.set_page_config(layout="wide", page_title="Prediktor Risiko Penyakit")
 
 st.title("Prediktor Risiko Penyakit Komprehensif")
+report_failed_writes()  # riwayat disimpan di latar belakang; kegagalan dari rerun sebelumnya
 st.markdown("Masukkan informasi kesehatan Anda untuk mendapatkan prediksi risiko penyakit yang dipersonalisasi.")
+if not models_available:
+    # Tanpa file model, prediksi tetap bisa dihitung langsung dari aturan klinis
+    st.warning("Satu atau lebih file model (.pkl) tidak ditemukan. Prediksi hanya menggunakan aturan klinis (lihat 'Memahami Baseline Risiko').")
 
 # Inisialisasi session state untuk kolom input jika belum ada
 # SEMUA KUNCI HARUS BERAKHIR DENGAN '_input_main' AGAR FUNGSI TOMBOL CLEAR BEKERJA DENGAN ANDAL
@@ -193,6 +194,11 @@ with st.form("form_kesehatan"):
             current_drinking_index = drinking_options.index(st.session_state['drinking_input_main'])
         st.radio("Status Minum Alkohol", drinking_options, index=current_drinking_index, key="drinking_input_main")
 
+    # Aturan klinis: label yang sama dengan data latih model, dihitung langsung tanpa model
+    st.radio("Metode Prediksi", [METHOD_MODEL, METHOD_RULES] if models_available else [METHOD_RULES],
+             horizontal=True, key="prediction_method",
+             help="Model memberi probabilitas; aturan klinis menerapkan ambang batas pada 'Memahami Baseline Risiko' secara persis.")
+
     # Tambahkan tombol Prediksi dan Bersihkan berdampingan
     col_buttons = st.columns(2)
     with col_buttons[0]:
@@ -244,44 +250,40 @@ if predict_button:
     if None in required_inputs:
         st.warning("Mohon lengkapi semua data kesehatan yang diperlukan sebelum memprediksi.")
     else:
-        # Petakan input kategorikal ke nilai numerik seperti yang digunakan dalam pelatihan
-        sex_encoded = 0 if sex_input == "Pria" else 1 # Pria: 0, Wanita: 1
-        drinking_encoded = 0 if drinking_input == "Tidak" else 1 # Tidak: 0, Ya: 1
-        smoking_encoded = 0
-        if smoking_input == "Tidak Merokok":
-            smoking_encoded = 1
-        elif smoking_input == "Mantan Perokok":
-            smoking_encoded = 2
-        elif smoking_input == "Perokok":
-            smoking_encoded = 3
-
-        # Buat DataFrame dari input, pastikan urutan kolom
-        input_data = pd.DataFrame([[
-            sex_encoded, age_input, height_input, weight_input, waistline_input,
+        # Buat DataFrame dari input, pastikan urutan kolom; jenis kelamin, merokok dan
+        # minum dipetakan ke kode numerik yang sama seperti saat pelatihan
+        input_data = disease_inputs(pd.DataFrame([[
+            sex_input, age_input, height_input, weight_input, waistline_input,
             sight_left_input, sight_right_input, hear_left_input, hear_right_input,
             sbp_input, dbp_input, blds_input, tot_chole_input, hdl_chole_input,
             ldl_chole_input, triglyceride_input, hemoglobin_input, urine_protein_input,
             serum_creatinine_input, sgot_ast_input, sgot_alt_input, gamma_gtp_input,
-            smoking_encoded, drinking_encoded
-        ]], columns=feature_columns)
+            smoking_input, drinking_input
+        ]], columns=DISEASE_FEATURES))
 
         st.subheader("Hasil Prediksi")
 
         # Prediksi dan tampilkan untuk setiap penyakit
-        models = {
-            "Risiko Hipertensi": hypertension_model,
-            "Risiko Diabetes": diabetes_model,
-            "Risiko Kolesterol Tinggi": high_cholesterol_model,
-            "Risiko Anemia": anemia_model,
-            "Risiko Perlemakan Hati": fatty_liver_model
-        }
-
-        for disease_name, model in models.items():
-            prediction = model.predict(input_data)[0]
+        if st.session_state.get('prediction_method') == METHOD_MODEL and models_available:
+            # Kelima model dinilai sekaligus dalam satu lintasan pohon
+            with timed('predict.disease', method='model'):
+                predictions, probabilities = disease_cache.get_or_compute(
+                    feature_key(input_data), lambda: disease_batcher.predict(input_data))
+        else:
+            with timed('predict.disease', method='rules'):
+                predictions, probabilities = risk_rules.predict(input_data), None
+        track_writes("prediction history", log_action(
+            st.session_state.user, 'predict_disease_risk',
+            method='model' if probabilities is not None else 'rules',
+            high_risk=[name for name in DISEASE_MODEL_FILES if predictions[name][0] == 1]))
+        for disease_name in DISEASE_MODEL_FILES:
+            prediction = predictions[disease_name][0]
+            detail = ("menurut aturan klinis" if probabilities is None
+                      else f"probabilitas {probabilities[disease_name][0, -1]:.0%}")
             if prediction == 1:
-                st.error(f"🔴 **{disease_name}: RISIKO TINGGI**")
+                st.error(f"🔴 **{disease_name}: RISIKO TINGGI** ({detail})")
             else:
-                st.success(f"🟢 **{disease_name}: RISIKO RENDAH**")
+                st.success(f"🟢 **{disease_name}: RISIKO RENDAH** ({detail})")
 
         st.markdown("---")
         st.markdown(
@@ -297,21 +299,32 @@ if predict_button:
 # --- BLOK elif clear_button LAMA DIHAPUS ---
 # Logika pembersihan sekarang ditangani oleh fungsi callback _clear_inputs().
 
-# Memahami Baseline Risiko
+# Memahami Baseline Risiko (ambang batas diambil dari risk_rules, aturan yang sama untuk pelatihan dan prediksi)
+male, female = risk_rules.MALE, risk_rules.FEMALE
 with st.expander("Memahami Baseline Risiko"):
-    st.markdown("""
+    st.markdown(f"""
     **Risiko Hipertensi (Tekanan Darah Tinggi):**
-    Didefinisikan jika Tekanan Darah Sistolik (SBP) >= 140 mmHg atau Tekanan Darah Diastolik (DBP) >= 90 mmHg, sesuai pedoman WHO.
+    Didefinisikan jika Tekanan Darah Sistolik (SBP) >= {risk_rules.SBP_HIGH} mmHg atau Tekanan Darah Diastolik (DBP) >= {risk_rules.DBP_HIGH} mmHg, sesuai pedoman WHO.
 
     **Risiko Diabetes:**
-    Diidentifikasi jika Glukosa Plasma Puasa (BLDS) >= 126 mg/dL, berdasarkan pedoman WHO dan American Diabetes Association.
+    Diidentifikasi jika Glukosa Plasma Puasa (BLDS) >= {risk_rules.BLDS_HIGH} mg/dL, berdasarkan pedoman WHO dan American Diabetes Association.
 
     **Risiko Kolesterol Tinggi (Dislipidemia):**
-    Ditentukan oleh berbagai tingkat lipid: Kolesterol Total >= 193 mg/dL, ATAU Kolesterol LDL >= 116 mg/dL, ATAU Trigliserida >= 150 mg/dL. Juga, Kolesterol HDL < 40 mg/dL untuk pria atau < 50 mg/dL untuk wanita.
+    Ditentukan oleh berbagai tingkat lipid: Kolesterol Total >= {risk_rules.TOT_CHOLE_HIGH} mg/dL, ATAU Kolesterol LDL >= {risk_rules.LDL_HIGH} mg/dL, ATAU Trigliserida >= {risk_rules.TRIGLYCERIDE_HIGH} mg/dL. Juga, Kolesterol HDL < {risk_rules.HDL_LOW[male]} mg/dL untuk pria atau < {risk_rules.HDL_LOW[female]} mg/dL untuk wanita.
 
     **Risiko Anemia:**
-    Ditunjukkan oleh kadar hemoglobin: < 13 g/dL untuk pria dan < 12 g/dL untuk wanita tidak hamil, sesuai pedoman WHO.
+    Ditunjukkan oleh kadar hemoglobin: < {risk_rules.HEMOGLOBIN_LOW[male]} g/dL untuk pria dan < {risk_rules.HEMOGLOBIN_LOW[female]} g/dL untuk wanita tidak hamil, sesuai pedoman WHO.
 
     **Risiko Perlemakan Hati (Risiko NAFLD):**
-    Indikator risiko sederhana berdasarkan peningkatan enzim hati (SGOT_AST > 40, SGOT_ALT > 40, atau Gamma GTP > 60) DAN adanya setidaknya dua faktor risiko metabolik, yang meliputi obesitas/kelebihan berat badan (BMI >= 25 atau >= 30), lingkar pinggang tinggi (>= 94 cm untuk pria, >= 80 cm untuk wanita), hipertensi, diabetes, dan kolesterol tinggi.
+    Indikator risiko sederhana berdasarkan peningkatan enzim hati (SGOT_AST > {risk_rules.AST_HIGH}, SGOT_ALT > {risk_rules.ALT_HIGH}, atau Gamma GTP > {risk_rules.GAMMA_GTP_HIGH}) DAN adanya setidaknya {risk_rules.METABOLIC_FACTORS_MIN} faktor risiko metabolik, yang meliputi obesitas/kelebihan berat badan (BMI >= {risk_rules.BMI_OVERWEIGHT}), lingkar pinggang tinggi (>= {risk_rules.WAISTLINE_HIGH[male]} cm untuk pria, >= {risk_rules.WAISTLINE_HIGH[female]} cm untuk wanita), hipertensi, diabetes, dan kolesterol tinggi.
     """)
+
+# Informasi pemuatan model; isi expander tetap dijalankan walau tertutup, jadi tabel
+# (dan pandas yang dipakai st.dataframe) baru dibuat setelah toggle dinyalakan
+with st.expander("Informasi Model"):
+    if st.toggle("Tampilkan statistik model, batcher, dan cache", key="show_model_info"):
+        st.dataframe(registry.stats(), hide_index=True)
+        st.dataframe(batcher_stats(), hide_index=True)
+        st.dataframe(cache_stats(), hide_index=True)
+
+finish_rerun()
@@ -1,18 +1,28 @@
 import streamlit as st
+from user_manager import require_login
+require_login('Dashboard')
+
+from instrumentation import finish_rerun, timed
+
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from user_manager import get_all_health_data, delete_all_health_data # Import fungsi untuk mendapatkan data kesehatan
+from lazy_import import lazy_import
+from user_manager import get_health_data_bounds, get_health_data_range, get_health_summary, delete_all_health_data, get_history, log_action, report_failed_writes, sync_writes, track_writes, WRITE_SYNC_TIMEOUT_SECONDS # Import fungsi untuk mendapatkan data kesehatan
+from dashboard_stats import (AGE_LABELS, DATASET_CSV, add_derived_columns, load_global_stats, shared_global_frame,
+                             summarize, summarize_box, summarize_cells, summarize_histogram)
+from dashboard_figures import box_figure, box_points_shown, histogram_figure
+from data_export import EXPORT_FORMATS, available_formats, export_frame, export_key, get_export_cache
 
-import io
+import datetime
+import os
 
-if not st.session_state.get('authenticated'):
-    st.warning('Silahkan login terlebih dahulu.')
-    st.stop()
+# plotly baru dimuat saat grafik pertama digambar
+px = lazy_import('plotly.express')
+go = lazy_import('plotly.graph_objects')
 
 st.set_page_config(layout="wide")
 
 st.title("Dashboard Kebiasaan Merokok dan Minum")
+report_failed_writes()  # riwayat disimpan di latar belakang; kegagalan dari rerun sebelumnya
 
 # --- Pemilihan Cakupan Data ---
 data_scope = st.radio(
@@ -26,23 +36,22 @@ current_user = st.session_state.user
 df_filtered = pd.DataFrame() # Inisialisasi df_filtered
 
 if data_scope == "Statistik Pengguna":
-    user_health_data_raw = get_all_health_data(current_user) # Dapatkan data untuk pengguna saat ini
+    # Tunggu data yang masih di antrean tulis milik pengguna ini, agar prediksi terbaru langsung terlihat
+    try:
+        report_failed_writes(sync_writes(current_user, timeout=WRITE_SYNC_TIMEOUT_SECONDS))
+    except TimeoutError:
+        st.warning("Sebagian data terbaru Anda masih dalam antrean penyimpanan dan mungkin belum tampil. Muat ulang halaman sebentar lagi.")
+    # Hanya batas waktu (min/max) yang dibaca untuk mengisi filter tanggal
+    bounds = get_health_data_bounds(current_user)
 
-    if not user_health_data_raw:
+    if bounds is None:
         st.info("Tidak ada riwayat data kesehatan untuk ditampilkan. Silakan masukkan data Anda di halaman 'Smoking and Alcohol Prediction' terlebih dahulu.")
         st.stop() # Hentikan eksekusi lebih lanjut jika tidak ada data spesifik pengguna
 
-    # Definisikan kolom untuk data spesifik pengguna
-    columns = ['age', 'sex', 'height', 'weight', 'gamma_GTP', 'smoking', 'drinking', 'SBP', 'DBP', 'BLDS', 'timestamp']
-    df = pd.DataFrame(user_health_data_raw, columns=columns)
-
-    # Konversi 'timestamp' menjadi objek datetime
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-
     # Sidebar Filter Tanggal (hanya untuk data spesifik pengguna)
     st.sidebar.header("Filter Data Berdasarkan Tanggal")
-    min_date = df['timestamp'].min().date()
-    max_date = df['timestamp'].max().date()
+    min_date = datetime.datetime.fromisoformat(bounds[0]).date()
+    max_date = datetime.datetime.fromisoformat(bounds[1]).date()
 
     date_range = st.sidebar.date_input(
         "Pilih Rentang Tanggal:",
@@ -52,14 +61,27 @@ if data_scope == "Statistik Pengguna":
         key="date_filter"
     )
 
-    if len(date_range) == 2:
-        start_date, end_date = date_range
-        # Filter DataFrame berdasarkan rentang tanggal yang dipilih
-        df_filtered = df[(df['timestamp'].dt.date >= start_date) & (df['timestamp'].dt.date <= end_date)]
-    else:
-        df_filtered = df.copy() # Tidak ada filter yang diterapkan jika rentang tanggal tidak lengkap
+    # Tanpa filter (seluruh riwayat), ringkasan dibaca dari tabel health_summary dan baris data
+    # hanya dimuat jika diminta, sehingga rerun tidak bergantung pada panjang riwayat
+    full_history = len(date_range) != 2 or tuple(date_range) == (min_date, max_date)
+    load_rows = not full_history or st.sidebar.checkbox("Muat data mentah (tabel, box plot, histogram & unduhan)",
+                                                        key="load_user_raw")
+    if load_rows:
+        if len(date_range) == 2:
+            start_date, end_date = date_range
+            # Filter rentang tanggal dijalankan di SQL; batas akhir eksklusif (hari berikutnya)
+            user_health_data_raw = get_health_data_range(current_user, start_date, end_date + datetime.timedelta(days=1))
+        else:
+            user_health_data_raw = get_health_data_range(current_user) # Tidak ada filter yang diterapkan jika rentang tanggal tidak lengkap
 
-    if df_filtered.empty:
+        # Definisikan kolom untuk data spesifik pengguna
+        columns = ['age', 'sex', 'height', 'weight', 'gamma_GTP', 'smoking', 'drinking', 'SBP', 'DBP', 'BLDS', 'timestamp']
+        df_filtered = pd.DataFrame(user_health_data_raw, columns=columns)
+
+        # Konversi 'timestamp' menjadi objek datetime
+        df_filtered['timestamp'] = pd.to_datetime(df_filtered['timestamp'], format='ISO8601')
+
+    if load_rows and df_filtered.empty:
         st.warning("Tidak ada data untuk rentang tanggal yang dipilih. Sesuaikan filter tanggal atau masukkan data baru.")
         st.stop() # Hentikan eksekusi lebih lanjut jika tidak ada data setelah pemfilteran
 
@@ -74,10 +96,15 @@ if data_scope == "Statistik Pengguna":
         st.sidebar.info("Anda yakin ingin menghapus semua riwayat data kesehatan?")
         col_confirm_yes, col_confirm_no = st.sidebar.columns(2)
         if col_confirm_yes.button("Ya, Hapus Sekarang", key="confirm_yes"):
-            delete_all_health_data(current_user)
-            st.session_state.confirm_delete = False
-            st.success("Semua riwayat data kesehatan telah dihapus.")
-            st.rerun()
+            try:
+                delete_all_health_data(current_user)
+            except TimeoutError:
+                st.sidebar.error("Data Anda masih dalam antrean penyimpanan. Coba hapus lagi sebentar lagi.")
+            else:
+                track_writes("delete history", log_action(current_user, 'delete_health_data'))
+                st.session_state.confirm_delete = False
+                st.success("Semua riwayat data kesehatan telah dihapus.")
+                st.rerun()
         if col_confirm_no.button("Tidak, Batalkan", key="confirm_no"):
             st.session_state.confirm_delete = False
             st.info("Penghapusan riwayat data dibatalkan.")
@@ -87,24 +114,13 @@ if data_scope == "Statistik Pengguna":
 else: # data_scope == "Semua Statistik Data"
     st.header("Statistik Data Global dari 'smoking_and_drinkin_100k.csv'")
     try:
-        # Membaca data dari file CSV
-        df = pd.read_csv('smoking_drinkin_100k.csv')
-
-        # Menyesuaikan nama kolom jika diperlukan (contoh: jika CSV memiliki 'sex_M' bukan 'sex')
-        # Jika CSV Anda memiliki 'total_cholesterol' dan Anda ingin menggunakannya untuk 'tot_chole' gauge:
-        if 'total_cholesterol' in df.columns:
-            df.rename(columns={'total_cholesterol': 'tot_chole'}, inplace=True)
-        # Jika kolom 'sex' di CSV adalah 0 dan 1, pastikan konsisten dengan 'Laki-laki'/'Perempuan'
-        if 'sex' in df.columns:
-             df['sex'] = df['sex'].map({'Male': 'Laki-laki', 'Female': 'Perempuan'}) # Sesuaikan jika nilai di CSV berbeda
+        # Agregat dibaca dari store yang sudah dihitung sebelumnya (dibangun ulang otomatis jika CSV berubah)
+        summary = load_global_stats()
 
         st.sidebar.markdown("---")
         st.sidebar.info("Filter tanggal, hapus riwayat, dan manajemen data spesifik pengguna tidak tersedia untuk 'Semua Statistik Data'.")
-        
-        # Karena tidak ada kolom timestamp di CSV, kita langsung gunakan df sebagai df_filtered
-        df_filtered = df.copy() 
 
-        if df_filtered.empty:
+        if summary['rows'] == 0:
             st.warning("Data global kosong. Harap periksa file CSV Anda.")
             st.stop()
 
@@ -115,42 +131,68 @@ else: # data_scope == "Semua Statistik Data"
         st.error(f"Terjadi kesalahan saat memuat data global: {e}")
         st.stop()
 
+    # Data mentah hanya dimuat jika diminta
+    st.sidebar.markdown("---")
+    if st.sidebar.checkbox("Muat data mentah (tabel & unduhan)", key="load_global_raw"):
+        # Satu frame hemat memori (float32/int16, kolom teks kategorikal, kolom turunan sudah ada)
+        # dibagi oleh semua sesi; frame ini hanya-baca, jadi jangan diubah di halaman ini
+        df_filtered = shared_global_frame(DATASET_CSV)
 
-# --- Pra-pemrosesan Umum (Berlaku untuk data pengguna dan semua data) ---
-# Konversi 'smoking' dan 'drinking' ke label yang lebih deskriptif (0/1 menjadi 'Tidak'/'Ya')
-# Asumsi 0 adalah "Tidak" dan 1 adalah "Ya"
-if 'smoking' in df_filtered.columns:
-    df_filtered['smoking'] = df_filtered['smoking'].map({1: 'Tidak', 2: 'Tidak', 3: 'Ya'})
-if 'drinking' in df_filtered.columns:
-    df_filtered['drinking'] = df_filtered['drinking'].map({'Y': 'Tidak', 'N': 'Ya'})
-
-# Hitung BMI menggunakan 'height' (cm) dan 'weight' (kg) untuk data yang difilter
-if 'height' in df_filtered.columns and 'weight' in df_filtered.columns:
-    df_filtered['height_m'] = df_filtered['height'] / 100 # Konversi cm ke meter
-    df_filtered['bmi'] = df_filtered['weight'] / (df_filtered['height_m'] ** 2)
-
-# Buat kelompok usia untuk data yang difilter
-if 'age' in df_filtered.columns:
-    bins = [0, 18, 30, 45, 60, 100]
-    labels = ['<18', '18-30', '31-45', '46-60', '>60']
-    df_filtered['age_group'] = pd.cut(df_filtered['age'], bins=bins, labels=labels, right=False)
-
-# --- Tombol Unduh sebagai CSV (Diperbarui untuk mencerminkan cakupan data) ---
-st.sidebar.markdown("---")
-st.sidebar.header("Unduh Data")
-csv_buffer = io.StringIO()
-df_filtered.to_csv(csv_buffer, index=False)
-csv_data = csv_buffer.getvalue().encode('utf-8')
-
-download_filename = f"{current_user if data_scope == 'Statistik Pengguna' else 'all_users'}_health_data_filtered_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv"
-st.sidebar.download_button(
-    label="Unduh Data yang Difilter (.csv)",
-    data=csv_data,
-    file_name=download_filename,
-    mime="text/csv",
-    help=f"Unduh data kesehatan yang saat ini ditampilkan dalam format CSV ({data_scope})."
-)
-# --- Akhir Tombol Unduh sebagai CSV ---
+
+# --- Pra-pemrosesan Data Pengguna (data global sudah diproses di shared_global_frame) ---
+# Label kebiasaan, BMI, dan kelompok usia (lihat dashboard_stats.add_derived_columns)
+if data_scope == "Statistik Pengguna":
+    if not df_filtered.empty:
+        df_filtered = add_derived_columns(df_filtered)
+    if full_history:
+        # Gauge, pie dan bar dari agregat yang diperbarui saat data disimpan; box plot & histogram butuh baris data
+        summary = summarize_cells(get_health_summary(current_user))
+        if not df_filtered.empty:
+            summary['box'] = summarize_box(df_filtered)
+            summary['histogram'] = summarize_histogram(df_filtered)
+    else:
+        summary = summarize(df_filtered)
+
+# --- Tombol Unduh (dibuat hanya saat diminta, lalu di-cache berdasarkan cakupan & filter) ---
+if not df_filtered.empty:
+    st.sidebar.markdown("---")
+    st.sidebar.header("Unduh Data")
+    export_format = st.sidebar.selectbox(
+        "Format Unduhan:",
+        options=available_formats(),
+        format_func=lambda fmt: {'csv': 'CSV', 'csv.gz': 'CSV terkompresi (gzip)', 'parquet': 'Parquet'}[fmt],
+        key="export_format"
+    )
+    extension, mime = EXPORT_FORMATS[export_format]
+    if data_scope == "Statistik Pengguna":
+        # Data baru selalu memperbarui batas waktu, sehingga kunci cache ikut berubah
+        data_version = {'user': current_user, 'bounds': bounds, 'date_range': [str(d) for d in date_range]}
+    else:
+        csv_stat = os.stat(DATASET_CSV)
+        data_version = {'csv_mtime_ns': csv_stat.st_mtime_ns, 'csv_size': csv_stat.st_size}
+    export_id = export_key(scope=data_scope, rows=len(df_filtered), format=export_format, **data_version)
+    export_cache = get_export_cache()
+    export = export_cache.get(export_id)
+
+    if export is None and st.sidebar.button("Siapkan Unduhan", key="prepare_export",
+                                             help="Data diserialisasi hanya saat tombol ini ditekan."):
+        with st.spinner("Menyiapkan file unduhan..."):
+            download_filename = f"{current_user if data_scope == 'Statistik Pengguna' else 'all_users'}_health_data_filtered_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}{extension}"
+            export = (download_filename, export_frame(df_filtered, export_format))
+            export_cache.put(export_id, *export)
+        track_writes("export history",
+                     log_action(current_user, 'export_data', scope=data_scope, format=export_format, rows=len(df_filtered)))
+
+    if export is not None:
+        download_filename, export_data = export
+        st.sidebar.download_button(
+            label=f"Unduh Data yang Difilter ({extension})",
+            data=export_data,
+            file_name=download_filename,
+            mime=mime,
+            help=f"Unduh data kesehatan yang saat ini ditampilkan ({data_scope}, {len(export_data) / 1024:,.0f} KB)."
+        )
+# --- Akhir Tombol Unduh ---
 
 
 # --- Tata Letak Aplikasi Streamlit (menggunakan df_filtered) ---
@@ -257,15 +299,14 @@ gauge_configs = {
     }
 }
 
-# Filter opsi gauge berdasarkan kolom yang tersedia di df_filtered
+# Filter opsi gauge berdasarkan metrik yang tersedia di ringkasan data
 available_gauge_options = {}
 for k, v in gauge_configs.items():
-    if v['column'] in df_filtered.columns and not df_filtered[v['column']].empty and not df_filtered[v['column']].isnull().all():
-        if v['value_type'] == 'percentage_yes':
-            if 'Ya' in df_filtered[v['column']].unique() or 'Tidak' in df_filtered[v['column']].unique():
-                available_gauge_options[k] = v
-        else:
+    if v['value_type'] == 'percentage_yes':
+        if v['column'] in summary['percentage_yes']:
             available_gauge_options[k] = v
+    elif v['column'] in summary['means']:
+        available_gauge_options[k] = v
 
 if available_gauge_options:
     selected_gauge_metric_name = st.selectbox(
@@ -280,31 +321,30 @@ if available_gauge_options:
     metric_value = None
 
     if config['value_type'] == 'mean':
-        if metric_column in df_filtered.columns and not df_filtered[metric_column].isnull().all():
-            metric_value = df_filtered[metric_column].mean()
+        metric_value = summary['means'].get(metric_column)
     elif config['value_type'] == 'percentage_yes':
-        if metric_column in df_filtered.columns and not df_filtered[metric_column].isnull().all():
-            metric_value = (df_filtered[metric_column] == 'Ya').mean() * 100
+        metric_value = summary['percentage_yes'].get(metric_column)
 
     if metric_value is not None:
-        fig_gauge = go.Figure(go.Indicator(
-            mode="gauge+number",
-            value=metric_value,
-            title={'text': config['title']},
-            domain={'x': [0, 1], 'y': [0, 1]},
-            gauge={
-                'axis': {'range': config['range'], 'tickwidth': 1, 'tickcolor': "darkblue"},
-                'bar': {'color': "darkblue"},
-                'steps': config['steps'],
-                'threshold': {
-                    'line': {'color': "red", 'width': 4},
-                    'thickness': 0.75,
-                    'value': metric_value
-                }
-            },
-            number={'suffix': config['unit']}
-        ))
-        fig_gauge.update_layout(height=450)
+        with timed('figure.gauge'):
+            fig_gauge = go.Figure(go.Indicator(
+                mode="gauge+number",
+                value=metric_value,
+                title={'text': config['title']},
+                domain={'x': [0, 1], 'y': [0, 1]},
+                gauge={
+                    'axis': {'range': config['range'], 'tickwidth': 1, 'tickcolor': "darkblue"},
+                    'bar': {'color': "darkblue"},
+                    'steps': config['steps'],
+                    'threshold': {
+                        'line': {'color': "red", 'width': 4},
+                        'thickness': 0.75,
+                        'value': metric_value
+                    }
+                },
+                number={'suffix': config['unit']}
+            ))
+            fig_gauge.update_layout(height=450)
         st.plotly_chart(fig_gauge, use_container_width=True)
     else:
         st.warning(f"Data untuk '{selected_gauge_metric_name}' tidak tersedia atau nol dalam rentang tanggal yang dipilih.")
@@ -316,33 +356,36 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.header("Distribusi Kebiasaan Merokok")
-    if 'smoking' in df_filtered.columns and not df_filtered['smoking'].empty and df_filtered['smoking'].nunique() > 0:
-        smoking_counts = df_filtered['smoking'].value_counts().reset_index()
-        smoking_counts.columns = ['Smoking Status', 'Count']
-        fig_smoking = px.pie(smoking_counts, values='Count', names='Smoking Status', title='Proporsi Perokok')
+    smoking_counts = summary['counts'].get('smoking')
+    if smoking_counts:
+        with timed('figure.pie'):
+            fig_smoking = px.pie(names=list(smoking_counts.keys()), values=list(smoking_counts.values()), title='Proporsi Perokok',
+                                 labels={'names': 'Smoking Status', 'values': 'Count'})
         st.plotly_chart(fig_smoking, use_container_width=True)
     else:
         st.warning("Kolom 'smoking' tidak ditemukan, kosong, atau tidak memiliki variasi data.")
 
 with col2:
     st.header("Distribusi Kebiasaan Minum")
-    if 'drinking' in df_filtered.columns and not df_filtered['drinking'].empty and df_filtered['drinking'].nunique() > 0:
-        drinking_counts = df_filtered['drinking'].value_counts().reset_index()
-        drinking_counts.columns = ['Drinking Status', 'Count']
-        fig_drinking = px.pie(drinking_counts, values='Count', names='Drinking Status', title='Proporsi Peminum')
+    drinking_counts = summary['counts'].get('drinking')
+    if drinking_counts:
+        with timed('figure.pie'):
+            fig_drinking = px.pie(names=list(drinking_counts.keys()), values=list(drinking_counts.values()), title='Proporsi Peminum',
+                                  labels={'names': 'Drinking Status', 'values': 'Count'})
         st.plotly_chart(fig_drinking, use_container_width=True)
     else:
         st.warning("Kolom 'drinking' tidak ditemukan, kosong, atau tidak memiliki variasi data.")
 
 # Baris 2: Bagan Batang Jenis Kelamin vs Merokok/Minum
 st.header("Merokok vs Minum berdasarkan Jenis Kelamin")
-if 'sex' in df_filtered.columns and 'smoking' in df_filtered.columns and 'drinking' in df_filtered.columns and not df_filtered.empty and df_filtered['sex'].nunique() > 0:
-    gender_behavior = df_filtered.groupby(['sex', 'smoking', 'drinking']).size().reset_index(name='Count')
-    fig_gender_behavior = px.bar(gender_behavior, x='sex', y='Count', color='smoking',
-                                    pattern_shape='drinking',
-                                    title='Merokok dan Minum berdasarkan Jenis Kelamin',
-                                    labels={'sex': 'Jenis Kelamin', 'Count': 'Jumlah Orang'},
-                                    barmode='group')
+if summary['sex_behavior']:
+    gender_behavior = pd.DataFrame(summary['sex_behavior'])
+    with timed('figure.bar'):
+        fig_gender_behavior = px.bar(gender_behavior, x='sex', y='Count', color='smoking',
+                                        pattern_shape='drinking',
+                                        title='Merokok dan Minum berdasarkan Jenis Kelamin',
+                                        labels={'sex': 'Jenis Kelamin', 'Count': 'Jumlah Orang'},
+                                        barmode='group')
     st.plotly_chart(fig_gender_behavior, use_container_width=True)
 else:
     st.warning("Kolom 'sex', 'smoking', atau 'drinking' tidak ditemukan, kosong, atau tidak memiliki variasi data yang cukup.")
@@ -354,9 +397,9 @@ health_metrics_options = [
     'SBP', 'DBP', 'BLDS', 'bmi', 'gamma_GTP', 'tot_chole' # Sertakan tot_chole
 ]
 
-available_metrics = [col for col in health_metrics_options if col in df_filtered.columns and not df_filtered[col].isnull().all() and not df_filtered[col].empty]
+available_metrics = [col for col in health_metrics_options if summary['box'].get(col)]
 
-if available_metrics and 'smoking' in df_filtered.columns and 'drinking' in df_filtered.columns and not df_filtered.empty:
+if available_metrics:
     selected_metric = st.selectbox(
         "Pilih Metrik Kesehatan:",
         options=available_metrics,
@@ -364,30 +407,61 @@ if available_metrics and 'smoking' in df_filtered.columns and 'drinking' in df_f
         key="health_metric_select"
     )
 
-    fig_health_metric = px.box(df_filtered, x='smoking', y=selected_metric, color='drinking',
-                                    title=f'Distribusi {selected_metric.replace("_", " ").title()} berdasarkan Kebiasaan Merokok dan Minum',
-                                    labels={'smoking': 'Merokok', selected_metric: selected_metric.replace('_', ' ').title(), 'drinking': 'Minum'})
-    st.plotly_chart(fig_health_metric, use_container_width=True)
+    chart_type = st.radio("Jenis Grafik:", options=["Box Plot", "Histogram"], horizontal=True, key="health_metric_chart")
+
+    # Grafik dibangun dari statistik yang sudah dihitung (kuartil, bin, sampel outlier), bukan dari seluruh titik data
+    metric_label = selected_metric.replace('_', ' ').title()
+    if chart_type == "Box Plot":
+        box_groups = summary['box'][selected_metric]
+        st.plotly_chart(box_figure(box_groups, metric_label), use_container_width=True)
+        points_shown, n_outliers = box_points_shown(box_groups)
+        if points_shown < n_outliers:
+            st.caption(f"Menampilkan sampel {points_shown} dari {n_outliers} outlier.")
+    elif summary['histogram'].get(selected_metric):
+        histogram = summary['histogram'][selected_metric]
+        st.plotly_chart(histogram_figure(histogram, metric_label), use_container_width=True)
+        if histogram['below'] or histogram['above']:
+            st.caption(f"{histogram['below'] + histogram['above']} nilai di luar whisker tidak ditampilkan (lihat Box Plot).")
+    else:
+        st.warning(f"Histogram untuk '{metric_label}' tidak tersedia.")
+elif data_scope == "Statistik Pengguna" and df_filtered.empty:
+    st.info("Centang 'Muat data mentah' di sidebar untuk menampilkan box plot dan histogram dari seluruh riwayat Anda.")
 else:
     st.warning("Tidak cukup kolom untuk menampilkan korelasi metrik kesehatan atau kolom kebiasaan dalam rentang tanggal yang dipilih.")
 
 st.header("Perilaku Merokok & Minum berdasarkan Kelompok Usia 📊")
 
-if 'age_group' in df_filtered.columns and 'smoking' in df_filtered.columns and 'drinking' in df_filtered.columns and not df_filtered.empty and df_filtered['age_group'].nunique() > 0:
-    age_behavior = df_filtered.groupby(['age_group', 'smoking', 'drinking']).size().reset_index(name='Jumlah')
-
-    fig_age_behavior = px.bar(
-        age_behavior,
-        x='age_group',
-        y='Jumlah',
-        color='smoking',
-        barmode='stack',
-        facet_col='drinking',
-        title="Distribusi Merokok Berdasarkan Usia dan Status Minum",
-        labels={'age_group': 'Kelompok Usia', 'smoking': 'Merokok', 'drinking': 'Minum'}
-    )
+if summary['age_behavior']:
+    age_behavior = pd.DataFrame(summary['age_behavior'])
+
+    with timed('figure.bar'):
+        fig_age_behavior = px.bar(
+            age_behavior,
+            x='age_group',
+            y='Jumlah',
+            color='smoking',
+            barmode='stack',
+            facet_col='drinking',
+            title="Distribusi Merokok Berdasarkan Usia dan Status Minum",
+            labels={'age_group': 'Kelompok Usia', 'smoking': 'Merokok', 'drinking': 'Minum'},
+            category_orders={'age_group': AGE_LABELS}
+        )
     st.plotly_chart(fig_age_behavior, use_container_width=True)
 else:
     st.warning("Kolom 'age_group', 'smoking', atau 'drinking' tidak ditemukan dalam rentang tanggal yang dipilih, kosong, atau tidak memiliki variasi data yang cukup. Tidak dapat menampilkan visualisasi kelompok usia.")
 
-st.write(df_filtered) # Tampilkan DataFrame yang difilter
+if not df_filtered.empty:
+    st.write(df_filtered) # Tampilkan DataFrame yang difilter
+
+if data_scope == "Statistik Pengguna":
+    with st.expander("Riwayat Aktivitas"):
+        activity = get_history(current_user)
+        if activity:
+            st.dataframe(pd.DataFrame(
+                [(timestamp, action, ", ".join(f"{key}={value}" for key, value in metadata.items()))
+                 for timestamp, action, metadata in activity],
+                columns=['Waktu', 'Aktivitas', 'Detail']), hide_index=True, use_container_width=True)
+        else:
+            st.write("Belum ada aktivitas yang tercatat.")
+
+finish_rerun()
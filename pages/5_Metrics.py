@@ -0,0 +1,58 @@
+import streamlit as st
+from user_manager import require_login
+require_login('Metrics')
+
+import pandas as pd
+from instrumentation import PROFILE_DIR, PROFILE_THRESHOLD_MS, finish_rerun, prometheus_text, snapshot
+from model_registry import get_registry
+from micro_batcher import batcher_stats
+from prediction_cache import cache_stats
+from user_manager import get_write_queue
+
+st.set_page_config(layout="wide")
+
+st.title("Metrik Kinerja Aplikasi ⏱️")
+st.write("Latensi dan jumlah panggilan untuk basis data, pemuatan model, prediksi, pembacaan CSV, "
+         "pembuatan grafik, dan setiap rerun halaman, sejak server dijalankan (dibagi oleh semua sesi).")
+
+rows = snapshot()
+if rows:
+    metrics = pd.DataFrame(rows)
+    operations = sorted(metrics['operation'].str.split('.').str[0].unique())
+    selected = st.multiselect("Filter Kategori:", options=operations, default=operations, key="metrics_categories")
+    metrics = metrics[metrics['operation'].str.split('.').str[0].isin(selected)]
+    st.dataframe(
+        metrics, hide_index=True, use_container_width=True,
+        column_config={
+            'operation': 'Operasi', 'labels': 'Label', 'calls': 'Panggilan', 'errors': 'Gagal',
+            'total_s': st.column_config.NumberColumn('Total (s)', format="%.3f"),
+            **{column: st.column_config.NumberColumn(column.replace('_ms', ' (ms)'), format="%.2f")
+               for column in ('mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'max_ms')},
+        },
+    )
+    st.caption("Persentil diperkirakan dari bucket histogram (seperti histogram_quantile di Prometheus).")
+else:
+    st.info("Belum ada operasi yang tercatat. Buka halaman lain terlebih dahulu.")
+
+with st.expander("Format Prometheus"):
+    st.caption("Teks yang sama disajikan prediction_server.py di GET /metrics.")
+    st.code(prometheus_text(), language="text")
+
+with st.expander("Profil Rerun"):
+    if PROFILE_DIR:
+        st.write(f"Rerun yang lebih lama dari {PROFILE_THRESHOLD_MS:.0f} ms disimpan sebagai file .prof di `{PROFILE_DIR}`.")
+        st.code(f"snakeviz {PROFILE_DIR}/<file>.prof", language="bash")
+    else:
+        st.write("Profil dinonaktifkan. Jalankan aplikasi dengan `APP_PROFILE_DIR=profiles` "
+                 "(dan opsional `APP_PROFILE_THRESHOLD_MS`) untuk menyimpan profil cProfile rerun yang lambat.")
+
+with st.expander("Model, Batcher, dan Cache Prediksi"):
+    st.dataframe(pd.DataFrame(get_registry().stats()), hide_index=True)
+    st.dataframe(pd.DataFrame(batcher_stats()), hide_index=True)
+    st.dataframe(pd.DataFrame(cache_stats()), hide_index=True)
+
+with st.expander("Antrean Tulis Basis Data"):
+    st.caption("Data kesehatan dan riwayat aktivitas disimpan per batch oleh satu thread latar belakang.")
+    st.dataframe(pd.DataFrame([get_write_queue().stats()]), hide_index=True)
+
+finish_rerun()
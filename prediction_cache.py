@@ -0,0 +1,154 @@
+"""LRU/TTL cache of model outputs keyed by the encoded feature vector."""
+import collections
+import os
+import threading
+import time
+
+from lazy_import import lazy_import
+from model_registry import get_registry, model_version
+
+np = lazy_import("numpy")
+
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_TTL_SECONDS = 600
+
+
+def feature_key(X):
+    """Hashable key for a one-row model input, in the input's column order.
+
+    Values are normalised to float, so 170, 170.0 and np.int64(170) share a key.
+    """
+    values = np.asarray(X, dtype=np.float64)
+    if values.ndim == 2:
+        if len(values) != 1:
+            raise ValueError(f"feature_key expects one row, got {len(values)}")
+        values = values[0]
+    return tuple(values.tolist())
+
+
+class PredictionCache:
+    """Thread-safe LRU cache holding at most ``max_entries`` results for ``ttl_seconds``.
+
+    With ``model_paths``, the cache empties itself as soon as one of those
+    models changes on disk (see ``model_registry.model_version``).
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS, name=None, model_paths=()):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.name = name
+        self.model_paths = [os.path.abspath(path) for path in model_paths]
+        self._version = None  # model versions the current entries were computed with
+        self._entries = collections.OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def _model_version(self):
+        return tuple(model_version(path) for path in self.model_paths)
+
+    def _check_version(self, version):
+        """Drops every entry if the models changed since they were cached. Call with the lock held."""
+        if version != self._version:
+            if self._entries:
+                self._entries.clear()
+                self._invalidations += 1
+            self._version = version
+
+    def get(self, key, default=None, version=None):
+        """The cached value for ``key``; ``version`` is a ``_model_version()`` the caller already took."""
+        if version is None:
+            version = self._model_version()
+        now = time.monotonic()
+        with self._lock:
+            self._check_version(version)
+            item = self._entries.get(key)
+            if item is None or item[0] <= now:
+                if item is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return item[1]
+
+    def put(self, key, value, version=None):
+        """Stores ``value``. Given the ``version`` taken before computing it, a value
+        from a model that has been replaced since is dropped instead."""
+        current = self._model_version() if version is None else None
+        with self._lock:
+            if current is not None:
+                self._check_version(current)
+            elif version != self._version:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Returns the cached value for ``key``, or stores and returns ``compute()``.
+
+        Two sessions missing on the same key at once may both compute it; the
+        results are identical, so the later ``put`` is harmless. A result is not
+        stored if a model file changed while it was being computed.
+        """
+        missing = object()
+        version = self._model_version()
+        value = self.get(key, missing, version)
+        if value is missing:
+            value = compute()
+            self.put(key, value, version)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "cache": self.name,
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def shared_cache(name, model_paths, **options):
+    """Returns the process-wide cache called ``name``, creating it on first use.
+
+    The cache is cleared whenever one of ``model_paths`` changes on disk, and
+    whenever the registry reloads or invalidates one of them.
+    """
+    with _caches_lock:
+        cache = _caches.get(name)
+        if cache is None:
+            cache = _caches[name] = PredictionCache(name=name, model_paths=model_paths, **options)
+            watched = {os.path.abspath(path) for path in model_paths}
+
+            def on_model_change(path, cache=cache):
+                if path is None or path in watched:
+                    cache.clear()
+
+            get_registry().add_listener(on_model_change)
+        return cache
+
+
+def cache_stats():
+    """``stats()`` of every shared cache."""
+    with _caches_lock:
+        caches = list(_caches.values())
+    return [cache.stats() for cache in caches]
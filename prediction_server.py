@@ -0,0 +1,190 @@
+"""Local HTTP API for the smoking/drinking and disease-risk models (endpoints in README.md).
+
+    python prediction_server.py [--host 127.0.0.1] [--port 8502] [--model-dir .]
+"""
+import argparse
+import json
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from batch_predict import DRINKING_MODEL_PATH, SMOKING_MODEL_PATH
+from features import (DISEASE_FEATURES, DISEASE_MODEL_FILES, DRINKING_FEATURES, SMOKING_FEATURES,
+                      disease_inputs, drinking_status, habit_inputs, smoking_status)
+from instrumentation import prometheus_text, timed
+from model_registry import get_registry
+from tree_engine import compiled_forests
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8502
+MAX_BODY_BYTES = 10 * 1024 * 1024
+HABIT_FIELDS = list(dict.fromkeys(SMOKING_FEATURES + DRINKING_FEATURES))
+MODEL_FILES = (SMOKING_MODEL_PATH, DRINKING_MODEL_PATH, *DISEASE_MODEL_FILES.values())
+
+
+def parse_instances(payload, fields):
+    """Turns a request payload into a DataFrame holding ``fields``."""
+    if isinstance(payload, dict):
+        payload = payload['instances'] if 'instances' in payload else [payload]
+    if not isinstance(payload, list) or not payload or not all(isinstance(item, dict) for item in payload):
+        raise ValueError("Body must be an object, a non-empty list of objects or {\"instances\": [...]}")
+    canonical = {name.lower(): name for name in fields}
+    columns = {name: [] for name in fields}
+    for index, item in enumerate(payload):
+        record = {canonical.get(str(key).lower(), key): value for key, value in item.items()}
+        missing = [name for name in fields if record.get(name) is None]
+        if missing:
+            raise ValueError(f"Instance {index} is missing {', '.join(missing)}")
+        for name in fields:
+            columns[name].append(record[name])
+    return pd.DataFrame(columns)
+
+
+class Predictor:
+    """Scores parsed instances with the current models from the registry."""
+
+    def __init__(self, model_dir='.', registry=None):
+        self.model_dir = model_dir
+        self.registry = registry or get_registry()
+
+    def _model(self, filename):
+        return self.registry.get(os.path.join(self.model_dir, filename))
+
+    def load(self):
+        """Loads every model that exists up front; returns the missing model files."""
+        missing = []
+        for filename in MODEL_FILES:
+            try:
+                self._model(filename)
+            except FileNotFoundError:
+                missing.append(filename)
+        return missing
+
+    def missing(self):
+        """Model files that are not (or no longer) available."""
+        return [filename for filename in MODEL_FILES if not self.registry.available(os.path.join(self.model_dir, filename))]
+
+    def disease_models(self):
+        return {name: self._model(filename) for name, filename in DISEASE_MODEL_FILES.items()}
+
+    def habits(self, df):
+        smoking_X, drinking_X = habit_inputs(df)
+        smoking = self._model(SMOKING_MODEL_PATH).predict(smoking_X)
+        drinking = self._model(DRINKING_MODEL_PATH).predict(drinking_X)
+        return [
+            {'smoking_prediction': int(s), 'smoking_status': smoking_status(s),
+             'drinking_prediction': int(d), 'drinking_status': drinking_status(d)}
+            for s, d in zip(smoking, drinking)
+        ]
+
+    def disease_risk(self, df):
+        X = disease_inputs(df)
+        labels, probabilities = compiled_forests(self.disease_models()).predict_with_proba(X)
+        return [
+            {name: {'prediction': int(labels[name][i]), 'probability': float(probabilities[name][i, -1])}
+             for name in labels}
+            for i in range(len(X))
+        ]
+
+
+class PredictionHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so clients can reuse one connection
+    disable_nagle_algorithm = True  # headers and body go out as separate writes
+    routes = {
+        '/predict/habits': ('habits', HABIT_FIELDS),
+        '/predict/disease-risk': ('disease_risk', DISEASE_FEATURES),
+    }
+
+    def _send_json(self, status, body):
+        self._send_text(status, json.dumps(body), 'application/json')
+
+    def _send_text(self, status, text, content_type):
+        data = text.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/metrics':
+            self._send_text(200, prometheus_text(), 'text/plain; version=0.0.4; charset=utf-8')
+            return
+        if self.path != '/health':
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+            return
+        predictor = self.server.predictor
+        models = [entry['model'] for entry in predictor.registry.stats()]
+        missing = predictor.missing()
+        self._send_json(200, {'status': 'degraded' if missing else 'ok', 'models': models, 'missing': missing})
+
+    def do_POST(self):
+        route = self.routes.get(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send_json(413, {'error': "Request body too large"})
+            return
+        body = self.rfile.read(length)
+        if route is None:
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+            return
+        method, fields = route
+        try:
+            with timed('http.predict', route=self.path):
+                df = parse_instances(json.loads(body), fields)
+                predictions = getattr(self.server.predictor, method)(df)
+        except (ValueError, TypeError) as exc:  # bad JSON, missing fields, unknown labels
+            self._send_json(400, {'error': str(exc)})
+        except FileNotFoundError as exc:
+            self._send_json(503, {'error': f"Model file not found: {exc.filename}"})
+        else:
+            self._send_json(200, {'predictions': predictions})
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def create_server(host=DEFAULT_HOST, port=DEFAULT_PORT, model_dir='.', quiet=False):
+    """Builds the server with the available models loaded; call ``serve_forever`` to run it.
+
+    ``server.missing_models`` lists the model files that were not found.
+    """
+    predictor = Predictor(model_dir)
+    missing = predictor.load()
+    server = ThreadingHTTPServer((host, port), PredictionHandler)
+    server.daemon_threads = True
+    server.predictor = predictor
+    server.quiet = quiet
+    server.missing_models = missing
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the prediction models over a local HTTP API.")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--model-dir', default='.')
+    parser.add_argument('--quiet', action='store_true', help="don't log every request")
+    args = parser.parse_args(argv)
+
+    server = create_server(args.host, args.port, args.model_dir, args.quiet)
+    if len(server.missing_models) == len(MODEL_FILES):
+        server.server_close()
+        sys.exit(f"No model files found in {os.path.abspath(args.model_dir)}")
+    if server.missing_models:
+        print(f"Missing {', '.join(server.missing_models)}; endpoints needing them answer 503", file=sys.stderr)
+    print(f"Serving predictions on http://{args.host}:{server.server_port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
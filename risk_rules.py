@@ -0,0 +1,84 @@
+"""The clinical rules that define the five disease-risk labels, vectorized with NumPy."""
+from features import DISEASE_FEATURES, DISEASE_MODEL_FILES, DISEASE_SEX_ENCODING, disease_inputs
+from lazy_import import lazy_import
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+RISK_LABELS = ['Hypertension_Risk', 'Diabetes_Risk', 'High_Cholesterol_Risk', 'Anemia_Risk', 'Fatty_Liver_Risk']
+# Page names (features.DISEASE_MODEL_FILES) of the same five risks, in the same order
+RISK_NAMES = dict(zip(DISEASE_MODEL_FILES, RISK_LABELS))
+
+MALE, FEMALE = DISEASE_SEX_ENCODING['Pria'], DISEASE_SEX_ENCODING['Wanita']
+
+# Thresholds, as defined in Train.ipynb (WHO / ADA guidelines)
+SBP_HIGH = 140                  # mmHg, >=
+DBP_HIGH = 90                   # mmHg, >=
+BLDS_HIGH = 126                 # mg/dL fasting glucose, >=
+TOT_CHOLE_HIGH = 193            # mg/dL, >=
+LDL_HIGH = 116                  # mg/dL, >=
+TRIGLYCERIDE_HIGH = 150         # mg/dL, >=
+HDL_LOW = {MALE: 40, FEMALE: 50}          # mg/dL, <
+HEMOGLOBIN_LOW = {MALE: 13, FEMALE: 12}   # g/dL, <
+AST_HIGH = 40                   # U/L, >
+ALT_HIGH = 40                   # U/L, >
+GAMMA_GTP_HIGH = 60             # U/L, >
+BMI_OVERWEIGHT = 25             # >=
+WAISTLINE_HIGH = {MALE: 94, FEMALE: 80}   # cm, >=
+METABOLIC_FACTORS_MIN = 2
+
+_COLUMN = {name: index for index, name in enumerate(DISEASE_FEATURES)}
+
+
+def risk_labels(X):
+    """0/1 labels of shape ``(n, 5)`` in RISK_LABELS order.
+
+    ``X`` is the encoded DISEASE_FEATURES matrix (a 2-D array or the DataFrame
+    from ``disease_inputs``). Missing values never trigger a rule, as in pandas.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    if X.ndim == 1:
+        X = X[np.newaxis, :]
+
+    def column(name):
+        return X[:, _COLUMN[name]]
+
+    sex = column('sex')
+    male, female = sex == MALE, sex == FEMALE
+
+    def by_sex(thresholds):
+        """Per-row threshold by sex; NaN (never triggers) for an unknown sex."""
+        return np.where(male, thresholds[MALE], np.where(female, thresholds[FEMALE], np.nan))
+
+    labels = np.empty((len(X), len(RISK_LABELS)), dtype=np.int8)
+    hypertension = (column('SBP') >= SBP_HIGH) | (column('DBP') >= DBP_HIGH)
+    diabetes = column('BLDS') >= BLDS_HIGH
+    cholesterol = ((column('tot_chole') >= TOT_CHOLE_HIGH) | (column('LDL_chole') >= LDL_HIGH)
+                   | (column('triglyceride') >= TRIGLYCERIDE_HIGH)
+                   | (column('HDL_chole') < by_sex(HDL_LOW)))
+    anemia = column('hemoglobin') < by_sex(HEMOGLOBIN_LOW)
+
+    # NAFLD: elevated liver enzymes and enough metabolic risk factors
+    bmi = column('weight') / ((column('height') / 100) ** 2)
+    metabolic_factors = ((bmi >= BMI_OVERWEIGHT).astype(np.int8)
+                         + (column('waistline') >= by_sex(WAISTLINE_HIGH))
+                         + hypertension + diabetes + cholesterol)
+    elevated_liver_enzymes = ((column('SGOT_AST') > AST_HIGH) | (column('SGOT_ALT') > ALT_HIGH)
+                              | (column('gamma_GTP') > GAMMA_GTP_HIGH))
+    fatty_liver = elevated_liver_enzymes & (metabolic_factors >= METABOLIC_FACTORS_MIN)
+
+    for index, label in enumerate((hypertension, diabetes, cholesterol, anemia, fatty_liver)):
+        labels[:, index] = label
+    return labels
+
+
+def risk_label_frame(df):
+    """RISK_LABELS columns for a frame with the DISEASE_FEATURES columns, where sex,
+    smoking and drinking may still be labels (Male/Female, Pria/Wanita, Y/N, ...)."""
+    return pd.DataFrame(risk_labels(disease_inputs(df)), columns=RISK_LABELS, index=df.index)
+
+
+def predict(X):
+    """``{page name: 0/1 array}`` for each risk, shaped like the forests' predictions."""
+    labels = risk_labels(X)
+    return {name: labels[:, index] for index, name in enumerate(RISK_NAMES)}
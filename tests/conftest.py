@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# The app's modules live at the repository root, next to main.py.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Points user_manager (and a fresh write-behind queue) at a new database file in ``tmp_path``; yields its path."""
+    import user_manager
+    monkeypatch.setattr(user_manager, "DB_PATH", str(tmp_path / "users.db"))
+    monkeypatch.setattr(user_manager, "_write_queue", None)
+    yield user_manager.DB_PATH
+    if user_manager._write_queue is not None:
+        user_manager._write_queue.close()
+    user_manager.close_connections()
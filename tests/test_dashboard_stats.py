@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import user_manager
+from dashboard_stats import add_derived_columns, summarize, summarize_cells
+
+USER_COLUMNS = ['age', 'sex', 'height', 'weight', 'gamma_GTP', 'smoking', 'drinking', 'SBP', 'DBP', 'BLDS', 'timestamp']
+
+
+def _random_records(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    sbp = rng.normal(122, 14, n_rows).round()
+    return pd.DataFrame({
+        'age': rng.choice([16, 25, 40, 50, 70, 120], n_rows),  # 120 falls outside every age group
+        'sex': rng.choice(['Laki-laki', 'Perempuan'], n_rows),
+        'height': rng.choice(np.arange(150, 190, 5), n_rows).astype(float),
+        'weight': rng.choice(np.arange(45, 100, 5), n_rows).astype(float),
+        'gamma_GTP': rng.lognormal(3.3, 0.6, n_rows).round(),
+        'smoking_prediction': rng.choice([0, 1, 2, 3], n_rows),  # 0 has no label
+        'drinking_prediction': rng.choice(['Y', 'N'], n_rows),
+        'SBP': np.where(rng.random(n_rows) < 0.2, np.nan, sbp),
+        'DBP': rng.normal(76, 10, n_rows).round(),
+    })
+
+
+def test_summary_cells_match_summarizing_the_rows(db):
+    user_manager.init_db()
+    records = _random_records(400)
+    user_manager.add_health_data_bulk('alice', records[:250])
+    user_manager.add_health_data_bulk('alice', records[250:])  # the upsert adds to existing cells
+    user_manager.add_health_data_bulk('bob', _random_records(50, seed=1))
+
+    rows = pd.DataFrame(user_manager.get_health_data_range('alice'), columns=USER_COLUMNS)
+    expected = summarize(add_derived_columns(rows))
+    actual = summarize_cells(user_manager.get_health_summary('alice'))
+
+    assert actual['rows'] == expected['rows'] == 400
+    assert actual['means'].keys() == expected['means'].keys()
+    for metric, mean in expected['means'].items():
+        assert actual['means'][metric] == pytest.approx(mean)
+    assert actual['percentage_yes'] == pytest.approx(expected['percentage_yes'])
+    assert actual['counts'] == expected['counts']
+    assert actual['sex_behavior'] == expected['sex_behavior']
+    assert actual['age_behavior'] == expected['age_behavior']
+
+
+def test_summary_follows_deletes(db):
+    user_manager.init_db()
+    user_manager.add_health_data_bulk('alice', _random_records(20))
+    user_manager.delete_all_health_data('alice')
+    assert user_manager.get_health_summary('alice') == []
+    assert summarize_cells([])['rows'] == 0
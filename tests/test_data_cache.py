@@ -0,0 +1,70 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+import data_cache
+
+
+def _write_csv(path, n_rows, mtime_ns):
+    tmp_path = f"{path}.tmp"
+    pd.DataFrame({'sex': ['Male', 'Female'] * (n_rows // 2), 'age': np.arange(n_rows)}).to_csv(tmp_path, index=False)
+    os.utime(tmp_path, ns=(mtime_ns, mtime_ns))
+    os.replace(tmp_path, path)
+
+
+def test_load_matches_csv(tmp_path):
+    csv_path = str(tmp_path / 'data.csv')
+    _write_csv(csv_path, 10, 1_000_000_000)
+    loaded = data_cache.load_dataset(csv_path, cache_root=str(tmp_path / '.cache'))
+    pd.testing.assert_frame_equal(loaded, pd.read_csv(csv_path), check_dtype=False)
+
+
+def test_rebuild_keeps_previous_version_readable(tmp_path):
+    csv_path = str(tmp_path / 'data.csv')
+    cache_root = str(tmp_path / '.cache')
+    _write_csv(csv_path, 10, 1_000_000_000)
+    first_dir, _ = data_cache.ensure_cache(csv_path, cache_root)
+    first_ages = data_cache.load_dataset(csv_path, columns=['age'], mmap=True, cache_root=cache_root)['age']
+
+    _write_csv(csv_path, 20, 2_000_000_000)
+    second_dir, meta = data_cache.ensure_cache(csv_path, cache_root)
+    assert second_dir != first_dir and meta['rows'] == 20
+    # The rebuild went to a new directory; the memory-mapped column of the old one still reads.
+    assert os.path.exists(os.path.join(first_dir, 'meta.json'))
+    assert list(first_ages) == list(range(10))
+
+    _write_csv(csv_path, 30, 3_000_000_000)
+    third_dir, _ = data_cache.ensure_cache(csv_path, cache_root)
+    assert sorted(os.listdir(os.path.dirname(third_dir))) == sorted(
+        [os.path.basename(second_dir), os.path.basename(third_dir)])
+
+
+def test_readers_never_see_a_missing_or_partial_cache(tmp_path):
+    csv_path = str(tmp_path / 'data.csv')
+    cache_root = str(tmp_path / '.cache')
+    _write_csv(csv_path, 1000, 1_000_000_000)
+    data_cache.ensure_cache(csv_path, cache_root)
+    errors = []
+    stop = threading.Event()
+
+    def read():
+        while not stop.is_set():
+            try:
+                frame = data_cache.load_dataset(csv_path, cache_root=cache_root)
+                assert len(frame) in (1000, 2000)
+            except Exception as exc:  # noqa: BLE001 - collected and reported below
+                errors.append(exc)
+                return
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for version in range(2, 12):
+        _write_csv(csv_path, 1000 if version % 2 else 2000, version * 1_000_000_000)
+        data_cache.build_cache(csv_path, cache_root)
+    stop.set()
+    for reader in readers:
+        reader.join()
+    assert errors == []
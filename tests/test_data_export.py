@@ -0,0 +1,57 @@
+import gzip
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_export import ExportCache, available_formats, export_frame, export_key
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({'age': np.arange(25), 'sex': ['Laki-laki', 'Perempuan'] * 12 + ['Laki-laki'],
+                         'SBP': np.where(np.arange(25) % 5, 120.5, np.nan)})
+
+
+def test_chunked_csv_equals_to_csv(frame):
+    expected = frame.to_csv(index=False).encode('utf-8')
+    assert export_frame(frame, 'csv', chunk_rows=7) == expected
+    assert gzip.decompress(export_frame(frame, 'csv.gz', chunk_rows=7)) == expected
+    assert export_frame(frame.iloc[:0], 'csv') == frame.iloc[:0].to_csv(index=False).encode('utf-8')
+
+
+def test_gzip_export_is_deterministic(frame):
+    assert export_frame(frame, 'csv.gz') == export_frame(frame, 'csv.gz')
+
+
+def test_parquet_round_trip(frame):
+    if 'parquet' not in available_formats():
+        pytest.skip("no parquet engine installed")
+    pd.testing.assert_frame_equal(pd.read_parquet(io.BytesIO(export_frame(frame, 'parquet'))), frame)
+
+
+def test_unknown_format_is_rejected(frame):
+    with pytest.raises(ValueError):
+        export_frame(frame, 'xlsx')
+
+
+def test_export_key_ignores_argument_order():
+    assert export_key(scope='user', start='2024-01-01', fmt='csv') == export_key(fmt='csv', start='2024-01-01', scope='user')
+    assert export_key(scope='user', fmt='csv') != export_key(scope='user', fmt='csv.gz')
+
+
+def test_cache_evicts_least_recently_used_by_size():
+    cache = ExportCache(max_bytes=10)
+    cache.put('a', 'a.csv', b'1234')
+    cache.put('b', 'b.csv', b'1234')
+    assert cache.get('a') == ('a.csv', b'1234')  # 'b' is now the least recently used
+    cache.put('c', 'c.csv', b'1234')
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert cache.stats()['bytes'] == 8 and cache.stats()['evictions'] == 1
+
+    cache.put('huge', 'huge.csv', b'x' * 11)  # larger than the whole cache: not kept
+    assert cache.get('huge') is None and cache.stats()['bytes'] == 8
+    cache.put('a', 'a.csv', b'12')  # replacing an entry updates the byte count
+    assert cache.stats()['bytes'] == 6
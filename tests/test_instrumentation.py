@@ -0,0 +1,39 @@
+import threading
+
+import pytest
+
+import instrumentation
+
+
+@pytest.fixture
+def profiling(tmp_path, monkeypatch):
+    monkeypatch.setattr(instrumentation, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(instrumentation, "PROFILE_THRESHOLD_MS", 0)
+    yield tmp_path
+    if instrumentation._profiling is not None:
+        instrumentation._stop_profile(instrumentation._profiling[1])
+
+
+def _in_thread(target):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(target()))
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def test_overlapping_reruns_profile_one_at_a_time(profiling):
+    instrumentation.start_rerun('first')
+    # A rerun on another thread while the first is profiled is timed but not profiled.
+    assert _in_thread(lambda: (instrumentation.start_rerun('second'), instrumentation.finish_rerun())[1]) is None
+    first = instrumentation.finish_rerun()
+    assert first is not None and first.startswith(str(profiling))
+
+    # Once the first is done, the next rerun is profiled again.
+    assert _in_thread(lambda: (instrumentation.start_rerun('third'), instrumentation.finish_rerun())[1]) is not None
+
+
+def test_rerun_that_stopped_early_does_not_block_profiling(profiling):
+    _in_thread(lambda: instrumentation.start_rerun('stopped'))  # its thread ends without finish_rerun
+    instrumentation.start_rerun('next')
+    assert instrumentation.finish_rerun() is not None
@@ -0,0 +1,79 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from micro_batcher import MicroBatcher
+
+
+def _submit_together(batcher, frames):
+    """Submits every frame before the worker's wait is over, so they share one batch."""
+    return [batcher.submit(frame) for frame in frames]
+
+
+def test_each_caller_gets_its_own_rows():
+    calls = []
+
+    def predict(X):
+        calls.append(len(X))
+        values = X['x'].to_numpy()
+        return {'double': values * 2, 'pair': (values, -values)}
+
+    batcher = MicroBatcher(predict, max_batch_size=100, max_wait_ms=200)
+    frames = [pd.DataFrame({'x': np.arange(start, start + size)}) for start, size in ((0, 1), (10, 3), (20, 2))]
+    futures = _submit_together(batcher, frames)
+    results = [future.result(5) for future in futures]
+    batcher.close()
+
+    assert calls == [6]
+    for frame, result in zip(frames, results):
+        np.testing.assert_array_equal(result['double'], frame['x'].to_numpy() * 2)
+        np.testing.assert_array_equal(result['pair'][1], -frame['x'].to_numpy())
+    assert batcher.stats()['batches'] == 1
+
+
+def test_batches_respect_max_batch_size():
+    sizes = []
+    batcher = MicroBatcher(lambda X: sizes.append(len(X)) or np.zeros(len(X)), max_batch_size=4, max_wait_ms=200)
+    futures = _submit_together(batcher, [np.zeros((1, 2))] * 10)
+    for future in futures:
+        future.result(5)
+    batcher.close()
+    assert sum(sizes) == 10 and max(sizes) <= 4
+
+
+def test_failing_request_does_not_fail_the_rest_of_its_batch():
+    def predict(X):
+        if (X['x'] < 0).any():
+            raise ValueError("negative input")
+        return X['x'].to_numpy() + 1
+
+    batcher = MicroBatcher(predict, max_batch_size=100, max_wait_ms=200)
+    good, bad, other = _submit_together(batcher, [pd.DataFrame({'x': [1, 2]}), pd.DataFrame({'x': [-1]}),
+                                                  pd.DataFrame({'x': [5]})])
+    np.testing.assert_array_equal(good.result(5), [2, 3])
+    np.testing.assert_array_equal(other.result(5), [6])
+    with pytest.raises(ValueError, match="negative input"):
+        bad.result(5)
+    batcher.close()
+
+
+def test_concurrent_callers_from_many_threads():
+    batcher = MicroBatcher(lambda X: X[:, 0] * 10, max_batch_size=16, max_wait_ms=5)
+    mismatches = []
+
+    def caller(value):
+        for _ in range(20):
+            result = batcher.predict(np.full((2, 1), value), timeout=5)
+            if list(result) != [value * 10, value * 10]:
+                mismatches.append((value, result))
+
+    threads = [threading.Thread(target=caller, args=(value,)) for value in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    batcher.close()
+    assert mismatches == []
+    assert batcher.stats()['requests'] == 160
@@ -0,0 +1,40 @@
+import glob
+import os
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import user_manager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = sorted(glob.glob(os.path.join(ROOT, 'pages', '*.py')))
+
+
+@pytest.mark.parametrize("path", PAGES, ids=os.path.basename)
+def test_page_stops_without_a_valid_session(path):
+    at = AppTest.from_file(path, default_timeout=30)
+    at.session_state['user'] = 'alice'
+    at.session_state['session_token'] = user_manager.issue_session_token('mallory')
+    at.run()
+    assert not at.exception
+    assert [warning.value for warning in at.warning] == ['Silahkan login terlebih dahulu.']
+    assert not at.title  # nothing after require_login ran
+
+
+def test_habit_prediction_is_saved_as_integers(db, monkeypatch):
+    monkeypatch.chdir(ROOT)  # the model files are opened relative to the app directory
+    user_manager.init_db()
+    at = AppTest.from_file(os.path.join(ROOT, 'pages', '1_Smoking & Alcohol Prediction.py'), default_timeout=60)
+    at.session_state['user'] = 'alice'
+    at.session_state['session_token'] = user_manager.issue_session_token('alice')
+    at.run()
+    for number_input, value in zip(at.number_input, [45, 170, 120, 70, 30, 80, 90]):
+        number_input.set_value(value)
+    at.button[0].click().run()
+    assert not at.exception
+
+    user_manager.sync_writes('alice', timeout=5)
+    with user_manager.get_connection() as conn:
+        types = conn.execute("""SELECT typeof(smoking_prediction), typeof(drinking_prediction)
+                                FROM health_data WHERE username = 'alice'""").fetchall()
+    assert types == [('integer', 'integer')]
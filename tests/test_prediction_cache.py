@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from prediction_cache import PredictionCache, feature_key
+
+
+def _write_model(path, content, mtime_ns):
+    with open(path, 'wb') as file:
+        file.write(content)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_feature_key_normalises_numbers():
+    frame = pd.DataFrame({'age': [np.int64(45)], 'height': [170]})
+    assert feature_key(frame) == feature_key([[45.0, 170.0]]) == feature_key(np.array([45, 170]))
+    with pytest.raises(ValueError):
+        feature_key([[1, 2], [3, 4]])
+
+
+def test_lru_eviction_and_ttl():
+    cache = PredictionCache(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1  # 'b' is now the least recently used
+    cache.put('c', 3)
+    assert cache.get('b') is None and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+    expired = PredictionCache(ttl_seconds=0)
+    expired.put('a', 1)
+    assert expired.get('a', 'missing') == 'missing'
+
+
+def test_get_or_compute_computes_once():
+    cache = PredictionCache()
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_compute('key', lambda: calls.append(1) or 'value') == 'value'
+    assert len(calls) == 1
+    assert (cache.stats()['hits'], cache.stats()['misses']) == (2, 1)
+
+
+def test_replaced_model_invalidates_cached_results(tmp_path):
+    model = str(tmp_path / 'model.pkl')
+    _write_model(model, b'v1', 1_000_000_000)
+    cache = PredictionCache(model_paths=[model])
+    assert cache.get_or_compute('key', lambda: 'old') == 'old'
+
+    _write_model(model, b'v2', 2_000_000_000)
+    assert cache.get('key') is None
+    assert cache.get_or_compute('key', lambda: 'new') == 'new'
+    assert cache.stats()['invalidations'] == 1
+
+    # A compiled .npz at least as new as the pickle is what gets loaded, so it counts too.
+    _write_model(str(tmp_path / 'model.npz'), b'npz', 3_000_000_000)
+    assert cache.get('key') is None
+
+
+def test_result_computed_while_the_model_changed_is_not_stored(tmp_path):
+    model = str(tmp_path / 'model.pkl')
+    _write_model(model, b'v1', 1_000_000_000)
+    cache = PredictionCache(model_paths=[model])
+
+    def compute_while_replacing():
+        _write_model(model, b'v2', 2_000_000_000)
+        return 'from v1'
+
+    assert cache.get_or_compute('key', compute_while_replacing) == 'from v1'
+    assert cache.get('key') is None
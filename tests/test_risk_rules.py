@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+import risk_rules
+from features import DISEASE_FEATURES, disease_inputs
+
+
+def notebook_labels(df):
+    """The labelling cell of the original Train.ipynb, unchanged apart from working on a copy."""
+    df = df.copy()
+    df['Hypertension_Risk'] = ((df['SBP'] >= 140) | (df['DBP'] >= 90)).astype(int)
+    df['Diabetes_Risk'] = (df['BLDS'] >= 126).astype(int)
+    df['High_Cholesterol_Risk'] = 0
+    df.loc[(df['tot_chole'] >= 193) |
+           (df['LDL_chole'] >= 116) |
+           (df['triglyceride'] >= 150), 'High_Cholesterol_Risk'] = 1
+    df.loc[(df['sex'] == 'Male') & (df['HDL_chole'] < 40), 'High_Cholesterol_Risk'] = 1
+    df.loc[(df['sex'] == 'Female') & (df['HDL_chole'] < 50), 'High_Cholesterol_Risk'] = 1
+    df['Anemia_Risk'] = 0
+    df.loc[(df['sex'] == 'Male') & (df['hemoglobin'] < 13), 'Anemia_Risk'] = 1
+    df.loc[(df['sex'] == 'Female') & (df['hemoglobin'] < 12), 'Anemia_Risk'] = 1
+    df['BMI'] = df['weight'] / ((df['height'] / 100)**2)
+    df['Fatty_Liver_Risk'] = 0
+    elevated_liver_enzymes = (df['SGOT_AST'] > 40) | (df['SGOT_ALT'] > 40) | (df['gamma_GTP'] > 60)
+    df['Obesity_Risk'] = (df['BMI'] >= 30).astype(int)
+    df['Overweight_Risk'] = (df['BMI'] >= 25).astype(int)
+    df['High_Waistline_Risk'] = 0
+    df.loc[(df['sex'] == 'Male') & (df['waistline'] >= 94), 'High_Waistline_Risk'] = 1
+    df.loc[(df['sex'] == 'Female') & (df['waistline'] >= 80), 'High_Waistline_Risk'] = 1
+    df['Metabolic_Risk_Count'] = (df['Obesity_Risk'] | df['Overweight_Risk']).astype(int) + \
+                                 df['High_Waistline_Risk'] + \
+                                 df['Hypertension_Risk'] + \
+                                 df['Diabetes_Risk'] + \
+                                 df['High_Cholesterol_Risk']
+    df.loc[(elevated_liver_enzymes) & (df['Metabolic_Risk_Count'] >= 2), 'Fatty_Liver_Risk'] = 1
+    return df[risk_rules.RISK_LABELS]
+
+
+# Values on, just below and just above every threshold, plus missing values.
+BOUNDARY_VALUES = {
+    'SBP': [139, 140, 141, np.nan], 'DBP': [89, 90, 91], 'BLDS': [125, 126, 127, np.nan],
+    'tot_chole': [192, 193], 'LDL_chole': [115, 116], 'triglyceride': [149, 150, np.nan],
+    'HDL_chole': [39, 40, 45, 49, 50, np.nan], 'hemoglobin': [11.9, 12, 12.5, 12.9, 13, np.nan],
+    'SGOT_AST': [40, 41], 'SGOT_ALT': [40, 41], 'gamma_GTP': [60, 61, np.nan],
+    'waistline': [79.9, 80, 93.9, 94, np.nan], 'height': [160, 170, 180], 'weight': [60, 72.25, 75, 100],
+}
+
+
+def _health_frame(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({name: rng.uniform(0, 2, n_rows) for name in DISEASE_FEATURES})
+    for name, values in BOUNDARY_VALUES.items():
+        df[name] = rng.choice(values, n_rows)
+    df['sex'] = rng.choice(['Male', 'Female'], n_rows)
+    df['smoking'] = rng.choice([1, 2, 3], n_rows)
+    df['drinking'] = rng.choice(['Y', 'N'], n_rows)
+    return df
+
+
+def test_rules_match_the_notebook():
+    df = _health_frame(20_000)
+    expected = notebook_labels(df)
+    actual = risk_rules.risk_label_frame(df)
+    pd.testing.assert_frame_equal(actual.astype(int), expected.astype(int))
+    assert expected.to_numpy().min(axis=0).tolist() == [0] * 5  # every rule fires for some rows
+    assert expected.to_numpy().max(axis=0).tolist() == [1] * 5  # and not for others
+
+
+def test_predict_is_keyed_by_page_name():
+    df = _health_frame(50, seed=1)
+    predictions = risk_rules.predict(disease_inputs(df))
+    expected = notebook_labels(df)
+    for name, label in risk_rules.RISK_NAMES.items():
+        np.testing.assert_array_equal(predictions[name], expected[label].to_numpy())
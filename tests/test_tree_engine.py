@@ -0,0 +1,83 @@
+import os
+import pickle
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import export_models
+from batch_predict import DRINKING_MODEL_PATH, SMOKING_MODEL_PATH
+from tree_engine import compiled_forests, compiled_path, load_compiled
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _training_frame(n_rows=400, seed=0):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame({
+        'age': rng.integers(20, 90, n_rows).astype(float),
+        'SBP': np.round(rng.normal(122, 14, n_rows)),
+        'BLDS': np.round(rng.normal(100, 22, n_rows)),
+        'gamma_GTP': np.round(rng.lognormal(3.3, 0.6, n_rows)),
+    })
+    y = (X['SBP'] + rng.normal(0, 10, n_rows) > 125).astype(int)
+    return X, y
+
+
+def _round_trip(compiled, tmp_path, name):
+    """Saves ``compiled`` as an .npz next to a (pretend) pickle and loads it back."""
+    path = compiled_path(str(tmp_path / name))
+    compiled.save(path)
+    return load_compiled(path)
+
+
+@pytest.fixture(scope="module")
+def forests():
+    from sklearn.ensemble import RandomForestClassifier
+    X, y = _training_frame()
+    first = RandomForestClassifier(n_estimators=25, max_depth=6, random_state=0).fit(X, y)
+    second = RandomForestClassifier(n_estimators=10, random_state=1).fit(X, X['age'] > 50)
+    return {'first': first, 'second': second}
+
+
+def test_npz_forest_matches_pickled_predict_proba(forests, tmp_path):
+    model = forests['first']
+    compiled = _round_trip(export_models.compile_model(model), tmp_path, 'forest.pkl')
+    X = export_models.probe_rows(compiled, 2000)
+    labels, proba = compiled.predict_with_proba(X)
+    np.testing.assert_array_equal(labels[None], model.predict(X))
+    np.testing.assert_allclose(proba[None], model.predict_proba(X), rtol=0, atol=1e-12)
+
+
+def test_compiled_forests_match_each_pickled_forest(forests):
+    X = _training_frame(seed=1)[0]
+    labels, proba = compiled_forests(forests).predict_with_proba(X)
+    for name, model in forests.items():
+        np.testing.assert_array_equal(labels[name], model.predict(X))
+        np.testing.assert_allclose(proba[name], model.predict_proba(X), rtol=0, atol=1e-12)
+
+
+def test_npz_xgboost_matches_pickled_predict_proba(tmp_path):
+    xgboost = pytest.importorskip("xgboost")
+    X, y = _training_frame()
+    model = xgboost.XGBClassifier(n_estimators=30, max_depth=4, random_state=0).fit(X, y)
+    compiled = _round_trip(export_models.compile_model(model), tmp_path, 'xgb.pkl')
+    labels_equal, proba_diff = export_models.check(model, compiled, export_models.probe_rows(compiled, 2000))
+    assert labels_equal
+    assert proba_diff < 1e-6
+
+
+@pytest.mark.parametrize("filename", [SMOKING_MODEL_PATH, DRINKING_MODEL_PATH])
+def test_npz_matches_shipped_model(filename, tmp_path):
+    path = os.path.join(ROOT, filename)
+    if not os.path.exists(path):
+        pytest.skip(f"{filename} is not checked out")
+    pytest.importorskip("xgboost")
+    with open(path, 'rb') as file, warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # xgboost's note about pickles from older versions
+        model = pickle.load(file)
+    compiled = _round_trip(export_models.compile_model(model), tmp_path, filename)
+    labels_equal, proba_diff = export_models.check(model, compiled, export_models.probe_rows(compiled, 5000))
+    assert labels_equal
+    assert proba_diff < 1e-6
@@ -0,0 +1,301 @@
+import datetime
+import hashlib
+import sqlite3
+import threading
+
+import pandas as pd
+import pytest
+
+import user_manager
+
+
+# ---------- SCHEMA MIGRATIONS ----------
+V1_ROWS = [
+    ('alice', '2024-01-01T08:00:00.000000', 45, 'Male', 170.0, 70.0, 30.0, 1, 0, 130.0, 85.0, 99.0),
+    ('alice', '2024-01-02T08:00:00.000000', 45, 'Male', 170.0, 72.0, 34.0, 1, 0, 128.0, 83.0, None),
+    ('alice', '2024-01-03T08:00:00.000000', 46, 'Male', 170.0, 71.0, 31.0, 0, 1, None, None, None),
+    ('bob', '2024-01-01T09:00:00.000000', None, 'Female', 160.0, 55.0, 18.0, 0, 0, 110.0, 70.0, 90.0),
+]
+
+
+def _v1_database(path):
+    conn = sqlite3.connect(path)
+    user_manager.migrate(conn, target=1)
+    conn.execute("INSERT INTO users VALUES ('alice', 'x'), ('bob', 'y')")
+    conn.executemany("INSERT INTO health_data VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", V1_ROWS)
+    conn.commit()
+    return conn
+
+
+def test_migrates_v1_database_keeping_rows(db):
+    conn = _v1_database(db)
+    assert user_manager.migrate(conn, target=3) == 3
+    assert conn.execute("SELECT * FROM health_data ORDER BY username, timestamp").fetchall() == V1_ROWS
+    assert conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 2
+    with pytest.raises(sqlite3.OperationalError):  # health_data is now WITHOUT ROWID
+        conn.execute("SELECT rowid FROM health_data")
+    indexes = {row[1] for row in conn.execute("PRAGMA index_list(history)")}
+    assert 'idx_history_username_timestamp' in indexes
+    conn.close()
+
+
+def test_init_db_brings_database_to_latest_version(db):
+    _v1_database(db).close()
+    user_manager.init_db()
+    user_manager.init_db()
+    with user_manager.get_connection() as conn:
+        assert user_manager.schema_version(conn) == len(user_manager.MIGRATIONS)
+
+
+def test_init_db_on_current_schema_does_not_wait_for_the_write_lock(db):
+    user_manager.init_db()
+    writer = sqlite3.connect(db)
+    writer.execute("BEGIN IMMEDIATE")  # another session holding the write lock
+    try:
+        done = threading.Event()
+        thread = threading.Thread(target=lambda: (user_manager.init_db(), done.set()), daemon=True)
+        thread.start()
+        assert done.wait(2), "init_db blocked on the write lock"
+    finally:
+        writer.rollback()
+        writer.close()
+
+
+def test_migration_backfills_health_summary(db):
+    _v1_database(db).close()
+    user_manager.init_db()
+
+    cells = {(cell['sex'], cell['age'], cell['smoking_prediction'], cell['drinking_prediction']): cell
+             for cell in user_manager.get_health_summary('alice')}
+    assert set(cells) == {('Male', 45, 1, 0), ('Male', 46, 0, 1)}
+    cell = cells[('Male', 45, 1, 0)]
+    assert (cell['n_rows'], cell['SBP_count'], cell['SBP_sum'], cell['SBP_sumsq']) == (2, 2, 258.0, 130.0 ** 2 + 128.0 ** 2)
+    assert (cell['BLDS_count'], cell['BLDS_sum']) == (1, 99.0)
+    assert cell['bmi_sum'] == pytest.approx(70.0 / 1.7 ** 2 + 72.0 / 1.7 ** 2)
+    assert cells[('Male', 46, 0, 1)]['SBP_count'] == 0
+    # Missing keys are stored as '' / -1 and come back as None.
+    assert [cell['age'] for cell in user_manager.get_health_summary('bob')] == [None]
+
+    # Rows added after the upgrade land in the backfilled cells.
+    user_manager.add_health_data('alice', 45, 'Male', 170.0, 70.0, 30.0, 1, 0, sbp=120.0)
+    cell = next(cell for cell in user_manager.get_health_summary('alice') if cell['age'] == 45)
+    assert (cell['n_rows'], cell['SBP_sum']) == (3, 378.0)
+
+
+# ---------- RANGE QUERIES & PAGINATION ----------
+def _insert_days(username, days):
+    """One row per day of January 2024, at 08:00; age is the day number."""
+    with user_manager.get_connection() as conn, conn:
+        conn.executemany(user_manager.HEALTH_DATA_INSERT, [
+            (username, f"2024-01-{day:02d}T08:00:00.000000", day, 'Male', 170.0, 70.0, 30.0, 0, 0, None, None, None)
+            for day in days])
+
+
+def test_range_is_half_open_and_per_user(db):
+    user_manager.init_db()
+    _insert_days('alice', range(1, 11))
+    _insert_days('bob', range(1, 11))
+    rows = user_manager.get_health_data_range('alice', start=datetime.date(2024, 1, 3),
+                                              end=datetime.datetime(2024, 1, 6, 8), columns=['age'])
+    assert rows == [(3,), (4,), (5,)]
+    assert len(user_manager.get_health_data_range('alice', start="2024-01-09")) == 2
+    assert len(user_manager.get_health_data_range('carol')) == 0
+    assert user_manager.get_health_data_bounds('alice') == (
+        "2024-01-01T08:00:00.000000", "2024-01-10T08:00:00.000000", 10)
+    assert user_manager.get_health_data_bounds('carol') is None
+
+
+def test_range_default_columns_match_get_all_health_data(db):
+    user_manager.init_db()
+    _insert_days('alice', range(1, 4))
+    assert user_manager.get_health_data_range('alice') == user_manager.get_all_health_data('alice')
+    with pytest.raises(ValueError):
+        user_manager.get_health_data_range('alice', columns=['age', 'password'])
+
+
+def test_pages_cover_the_range_once_in_order(db):
+    user_manager.init_db()
+    _insert_days('alice', range(1, 11))
+    pages, cursor = [], None
+    while True:
+        rows, cursor = user_manager.get_health_data_page('alice', start="2024-01-03", columns=['age'],
+                                                         after=cursor, limit=3)
+        pages.append([age for (age,) in rows])
+        if cursor is None:
+            break
+    assert pages == [[3, 4, 5], [6, 7, 8], [9, 10]]
+
+
+def test_full_last_page_is_followed_by_an_empty_one(db):
+    user_manager.init_db()
+    _insert_days('alice', range(1, 7))
+    rows, cursor = user_manager.get_health_data_page('alice', limit=3, after="2024-01-03T08:00:00.000000")
+    assert len(rows) == 3 and cursor == "2024-01-06T08:00:00.000000"
+    assert user_manager.get_health_data_page('alice', limit=3, after=cursor) == ([], None)
+
+
+# ---------- BULK INSERT ----------
+def test_bulk_insert_gives_every_row_a_later_unique_timestamp(db):
+    user_manager.init_db()
+    # An existing row dated in the future: new rows must still sort after it.
+    _insert_days('alice', [1])
+    with user_manager.get_connection() as conn, conn:
+        conn.execute("UPDATE health_data SET timestamp = '2999-01-01T00:00:00.000000'")
+    frame = pd.DataFrame({'AGE': range(500), 'sex': 'Male', 'height': 170.0, 'weight': 70.0, 'gamma_gtp': 30.0,
+                          'smoking_prediction': 1, 'drinking_prediction': 0})
+    assert user_manager.add_health_data_bulk('alice', frame) == 500
+
+    rows = user_manager.get_health_data_range('alice', start="2999-01-01T00:00:00.000001", columns=['age', 'SBP', 'timestamp'])
+    assert [age for age, _, _ in rows] == list(range(500))  # input order kept
+    assert len({timestamp for _, _, timestamp in rows}) == 500
+    assert {sbp for _, sbp, _ in rows} == {None}  # optional columns may be left out
+
+
+def test_bulk_insert_accepts_dicts_and_tuples(db):
+    user_manager.init_db()
+    records = [dict(age=40, sex='Female', height=160.0, weight=55.0, gamma_gtp=20.0,
+                    smoking_prediction=0, drinking_prediction=1, sbp=115.0),
+               (41, 'Female', 160.0, 56.0, 21.0, 0, 1)]
+    assert user_manager.add_health_data_bulk('bob', records) == 2
+    assert user_manager.get_health_data_range('bob', columns=['age', 'SBP']) == [(40, 115.0), (41, None)]
+    with pytest.raises(ValueError):
+        user_manager.add_health_data_bulk('bob', pd.DataFrame({'age': [1]}))
+
+
+def test_concurrent_bulk_inserts_do_not_collide(db):
+    user_manager.init_db()
+    records = [(40, 'Male', 170.0, 70.0, 30.0, 0, 0)] * 200
+    errors = []
+
+    def insert():
+        try:
+            user_manager.add_health_data_bulk('alice', records)
+        except Exception as exc:  # noqa: BLE001 - collected and reported below
+            errors.append(exc)
+
+    threads = [threading.Thread(target=insert) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert user_manager.get_health_data_bounds('alice')[2] == 800
+
+
+# ---------- PASSWORDS & SESSIONS ----------
+def _stored_password(username):
+    with user_manager.get_connection() as conn:
+        return conn.execute("SELECT password FROM users WHERE username = ?", (username,)).fetchone()[0]
+
+
+def test_legacy_sha256_password_is_rehashed_at_login(db):
+    user_manager.init_db()
+    legacy = hashlib.sha256(b"s3cret").hexdigest()
+    user_manager.add_user('alice', legacy)
+
+    assert not user_manager.authenticate_user('alice', 'wrong')
+    assert _stored_password('alice') == legacy
+
+    assert user_manager.authenticate_user('alice', 's3cret')
+    stored = _stored_password('alice')
+    assert stored.startswith(f"{user_manager.PASSWORD_ALGORITHM}${user_manager.PBKDF2_ITERATIONS}$")
+    assert user_manager.check_password('s3cret', stored) == (True, False)
+
+    # The upgraded hash keeps working and is left alone from then on.
+    assert user_manager.authenticate_user('alice', 's3cret')
+    assert _stored_password('alice') == stored
+
+
+def test_cheaper_pbkdf2_hash_is_upgraded_at_login(db):
+    user_manager.init_db()
+    user_manager.add_user('bob', user_manager.hash_password('pw', iterations=1000))
+    assert user_manager.authenticate_user('bob', 'pw')
+    assert _stored_password('bob').split('$')[1] == str(user_manager.PBKDF2_ITERATIONS)
+
+
+def test_unknown_user_is_rejected(db):
+    user_manager.init_db()
+    assert not user_manager.authenticate_user('nobody', 'pw')
+
+
+def test_session_token_round_trip_expiry_and_tampering():
+    token = user_manager.issue_session_token('alice')
+    assert user_manager.session_user(token) == 'alice'
+
+    assert user_manager.session_user(user_manager.issue_session_token('alice', ttl_seconds=-1)) is None
+    username, expires, signature = token.rsplit('|', 2)
+    assert user_manager.session_user(f"mallory|{expires}|{signature}") is None
+    assert user_manager.session_user(f"{username}|{int(expires) + 3600}|{signature}") is None
+    assert user_manager.session_user(f"{username}|{expires}|{'0' * len(signature)}") is None
+    for malformed in (None, '', 'alice', 'alice|soon|abc'):
+        assert user_manager.session_user(malformed) is None
+
+
+def test_usernames_containing_the_separator_still_verify():
+    token = user_manager.issue_session_token('a|b')
+    assert user_manager.session_user(token) == 'a|b'
+
+
+# ---------- WRITE-BEHIND QUEUE ----------
+def _queue_row(username, age=45):
+    return user_manager.queue_health_data(username, age, 'Male', 170.0, 70.0, 30.0, 1, 0, sbp=120.0)
+
+
+def test_sync_writes_commits_the_users_queued_writes(db, monkeypatch):
+    user_manager.init_db()
+    monkeypatch.setattr(user_manager, "_write_queue", user_manager.WriteBehindQueue(interval_ms=60_000))
+    futures = [_queue_row('alice', age) for age in (45, 46)] + [user_manager.log_action('alice', 'predict_habits', smoking=1)]
+    user_manager.track_writes("health data", *futures)
+
+    assert user_manager.sync_writes('alice', timeout=5) == []
+    assert [age for (age,) in user_manager.get_health_data_range('alice', columns=['age'])] == [45, 46]
+    assert user_manager.get_history('alice')[0][1:] == ('predict_habits', {'smoking': 1})
+    assert user_manager.get_write_queue().stats()['batches'] == 1  # all three in one transaction
+
+
+def test_failed_batch_is_retried_once_then_fails_together(db, monkeypatch):
+    user_manager.init_db()
+    calls = []
+
+    def failing_commit(conn, writes):
+        calls.append(len(writes))
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(user_manager, "_commit_writes", failing_commit)
+    monkeypatch.setattr(user_manager, "_write_queue", user_manager.WriteBehindQueue(interval_ms=60_000))
+    futures = [_queue_row('alice'), user_manager.log_action('alice', 'predict_habits')]
+    user_manager.track_writes("health data", *futures)
+
+    failures = user_manager.sync_writes('alice', timeout=5)
+    assert calls == [2, 2]
+    assert [description for description, _ in failures] == ["health data", "health data"]
+    assert all(isinstance(exc, sqlite3.OperationalError) for _, exc in failures)
+    assert user_manager.sync_writes('alice', timeout=5) == []  # each failure is reported once
+    assert user_manager.get_write_queue().stats()['failed'] == 2
+
+
+def test_batch_that_succeeds_on_retry_is_committed(db, monkeypatch):
+    user_manager.init_db()
+    commit_writes = user_manager._commit_writes
+    calls = []
+
+    def flaky_commit(conn, writes):
+        calls.append(len(writes))
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        commit_writes(conn, writes)
+
+    monkeypatch.setattr(user_manager, "_commit_writes", flaky_commit)
+    _queue_row('alice').result(5)
+    assert calls == [1, 1]
+    assert user_manager.get_health_data_bounds('alice')[2] == 1
+
+
+def test_delete_all_health_data_includes_queued_rows(db, monkeypatch):
+    user_manager.init_db()
+    monkeypatch.setattr(user_manager, "_write_queue", user_manager.WriteBehindQueue(interval_ms=60_000))
+    _queue_row('alice')
+    user_manager.delete_all_health_data('alice')
+    user_manager.get_write_queue().sync(timeout=5)
+    assert user_manager.get_health_data_bounds('alice') is None
+    assert user_manager.get_health_summary('alice') == []
@@ -0,0 +1,152 @@
+"""Trains the five disease-risk RandomForest models from the health CSV (the Train.ipynb pipeline).
+
+    python train_models.py smoking_drinkin_100k.csv [--out-dir .] [--jobs N] [--report training_report.json]
+"""
+import argparse
+import json
+import os
+import pickle
+import platform
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from data_cache import DATASET_CSV, load_dataset
+from features import DISEASE_FEATURES, DISEASE_MODEL_FILES, disease_inputs
+from risk_rules import RISK_NAMES, risk_labels
+
+# target label -> model file, in risk_labels column order
+DISEASE_TARGETS = {label: DISEASE_MODEL_FILES[name] for name, label in RISK_NAMES.items()}
+TEST_SIZE = 0.3
+RANDOM_STATE = 42
+REPORT_PATH = 'training_report.json'
+
+
+# ---------- FEATURES ----------
+def write_training_arrays(df, work_dir):
+    """Encodes ``df`` once and saves X (float32, the dtype the forests fit on) and the
+    risk_rules targets as ``.npy`` files in ``work_dir``; returns their paths."""
+    encoded = disease_inputs(df).to_numpy(dtype=np.float64)
+    # Labelled at full precision, exactly like the notebook's pandas comparisons
+    y = risk_labels(encoded)
+    X = np.ascontiguousarray(encoded, dtype=np.float32)
+    x_path, y_path = os.path.join(work_dir, 'X.npy'), os.path.join(work_dir, 'y.npy')
+    np.save(x_path, X)
+    np.save(y_path, y)
+    return x_path, y_path
+
+
+# ---------- TRAINING ----------
+def schedule(n_models, cores):
+    """``(processes, n_jobs per model)`` that uses ``cores`` without oversubscribing them."""
+    processes = max(1, min(n_models, cores))
+    return processes, max(1, cores // processes)
+
+
+def train_one(disease, target_index, x_path, y_path, model_path, n_jobs, n_estimators):
+    """Fits one forest on the memory-mapped arrays, saves it and returns its report entry."""
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import accuracy_score, classification_report
+    from sklearn.model_selection import train_test_split
+
+    X = np.load(x_path, mmap_mode='r')
+    y = np.load(y_path, mmap_mode='r')[:, target_index]
+    # Same split as train_test_split(X, y, ...) in the notebook: it depends only on len(y) and y
+    train, test = train_test_split(np.arange(len(y)), test_size=TEST_SIZE, random_state=RANDOM_STATE, stratify=y)
+
+    model = RandomForestClassifier(n_estimators=n_estimators, random_state=RANDOM_STATE, n_jobs=n_jobs)
+    start = time.perf_counter()
+    model.fit(X[train], y[train])
+    fit_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    y_pred = model.predict(X[test])
+    predict_seconds = time.perf_counter() - start
+
+    # As if fitted on the DataFrame, so the app can predict with named columns
+    model.feature_names_in_ = np.array(DISEASE_FEATURES, dtype=object)
+    model.n_jobs = None  # the app predicts one row at a time; don't ship the training thread count
+    with open(model_path, 'wb') as file:
+        pickle.dump(model, file)
+    return {
+        'disease': disease,
+        'model': os.path.basename(model_path),
+        'pid': os.getpid(),
+        'n_jobs': n_jobs,
+        'train_rows': int(len(train)),
+        'test_rows': int(len(test)),
+        'positive_rate': float(y.mean()),
+        'fit_seconds': fit_seconds,
+        'predict_seconds': predict_seconds,
+        'accuracy': float(accuracy_score(y[test], y_pred)),
+        'classification_report': classification_report(y[test], y_pred, output_dict=True, zero_division=0),
+        'model_bytes': os.path.getsize(model_path),
+        'n_nodes': int(sum(tree.tree_.node_count for tree in model.estimators_)),
+    }
+
+
+def train_models(df, out_dir='.', cores=None, n_estimators=100):
+    """Trains every DISEASE_TARGETS model on ``df`` and writes the pickles to ``out_dir``.
+
+    Returns the report as a dict.
+    """
+    cores = cores or os.cpu_count() or 1
+    processes, n_jobs = schedule(len(DISEASE_TARGETS), cores)
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory() as work_dir:
+        start = time.perf_counter()
+        x_path, y_path = write_training_arrays(df, work_dir)
+        features_seconds = time.perf_counter() - start
+
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [
+                pool.submit(train_one, disease, index, x_path, y_path,
+                            os.path.join(out_dir, filename), n_jobs, n_estimators)
+                for index, (disease, filename) in enumerate(DISEASE_TARGETS.items())
+            ]
+            models = [future.result() for future in futures]
+
+    wall_seconds = time.perf_counter() - started
+    fit_total = sum(model['fit_seconds'] for model in models)
+    return {
+        'rows': int(len(df)),
+        'features': DISEASE_FEATURES,
+        'n_estimators': n_estimators,
+        'cores': cores,
+        'processes': processes,
+        'n_jobs_per_model': n_jobs,
+        'python': platform.python_version(),
+        'features_seconds': features_seconds,
+        'wall_seconds': wall_seconds,
+        'fit_seconds_total': fit_total,
+        'models': models,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the disease-risk models (Train.ipynb) in parallel.")
+    parser.add_argument('csv', nargs='?', default=DATASET_CSV)
+    parser.add_argument('--out-dir', default='.')
+    parser.add_argument('--jobs', type=int, default=None, help="cores to use (default: all)")
+    parser.add_argument('--n-estimators', type=int, default=100)
+    parser.add_argument('--report', default=REPORT_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    df = load_dataset(args.csv, columns=DISEASE_FEATURES)
+    load_seconds = time.perf_counter() - start
+    report = train_models(df, args.out_dir, args.jobs, args.n_estimators)
+    report['load_seconds'] = load_seconds
+    with open(args.report, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{len(df)} rows, {report['processes']} processes x {report['n_jobs_per_model']} threads")
+    for model in report['models']:
+        print(f"{model['disease']:<24}acc {model['accuracy']:.4f}  fit {model['fit_seconds']:6.1f}s  "
+              f"{model['model_bytes'] / 2**20:6.1f} MB  -> {model['model']}")
+    print(f"wall {report['wall_seconds']:.1f}s (fits {report['fit_seconds_total']:.1f}s summed); report: {args.report}")
+
+
+if __name__ == '__main__':
+    main()
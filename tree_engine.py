@@ -0,0 +1,488 @@
+"""NumPy-only evaluators for the RandomForest and XGBoost models, exact to the library ``predict``."""
+import json
+import os
+import threading
+
+from lazy_import import lazy_import
+
+np = lazy_import("numpy")
+
+FORMAT_VERSION = 1
+# Largest threshold grid BoostedTrees precomputes margins for (float32 per cell and class).
+MAX_TABLE_CELLS = 1 << 20
+
+
+def compiled_path(path):
+    """``model.pkl`` -> ``model.npz``, where export_models.py writes its compiled form."""
+    return os.path.splitext(path)[0] + ".npz"
+
+
+class _FlatTrees:
+    """Node arrays shared by both model kinds. Leaves point back to themselves."""
+
+    def _as_matrix(self, X):
+        if hasattr(X, "columns") and self.feature_names is not None:
+            X = X[self.feature_names]
+        # sklearn and XGBoost both compare float32 inputs against the thresholds.
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[np.newaxis, :]
+        return X
+
+    def apply(self, X, chunk_size=2048):
+        """Leaf node index reached in every tree, shape ``(n_samples, n_trees)``."""
+        X = self._as_matrix(X)
+        if len(X) <= chunk_size:
+            return self._apply_chunk(X)
+        return np.concatenate([self._apply_chunk(X[i:i + chunk_size]) for i in range(0, len(X), chunk_size)])
+
+    def _apply_chunk(self, X):
+        n_samples, n_features = X.shape
+        n_trees = len(self.roots)
+        # Tree-major layout: neighbouring entries walk the same tree, which keeps
+        # that tree's nodes in cache.
+        node = np.repeat(self.roots, n_samples)
+        x_offset = np.tile(np.arange(n_samples, dtype=np.intp) * n_features, n_trees)
+        flat_X = X.ravel()
+        active = None
+        current, offset = node, x_offset
+        while True:
+            left = self.left[current]
+            internal = left != current
+            n_internal = np.count_nonzero(internal)
+            if n_internal == 0:
+                break
+            # A leaf's children are itself, so finished paths can keep walking in
+            # place; they are only dropped once they make up half the work.
+            if n_internal <= current.size // 2:
+                if active is None:
+                    node, active = current, np.flatnonzero(internal)
+                else:
+                    node[active] = current
+                    active = active[internal]
+                current, left, offset = current[internal], left[internal], x_offset[active]
+            go_left = self._go_left(flat_X[offset + self.feature[current]], current)
+            current = np.where(go_left, left, self.right[current])
+        if active is None:
+            node = current
+        else:
+            node[active] = current
+        return node.reshape(n_trees, n_samples).T
+
+    def save(self, path):
+        """Writes the compiled model to ``path`` (an ``.npz`` file)."""
+        arrays = {"kind": np.array(self.kind), "version": np.array(FORMAT_VERSION),
+                  "feature_names": np.array(self.feature_names if self.feature_names is not None else [], dtype=str),
+                  "n_features": np.array(self.n_features), "max_depth": np.array(self.max_depth),
+                  "roots": self.roots.astype(np.int32), "feature": self.feature.astype(np.int32),
+                  "threshold": self.threshold, "left": self.left.astype(np.int32),
+                  "right": self.right.astype(np.int32)}
+        if self.value is not self.threshold:
+            arrays["value"] = self.value
+        arrays.update(self._extra_arrays())
+        tmp_path = f"{path}.tmp-{os.getpid()}.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _node_arrays(data):
+        return dict(roots=data["roots"].astype(np.intp), feature=data["feature"].astype(np.intp),
+                    threshold=data["threshold"], left=data["left"].astype(np.intp),
+                    right=data["right"].astype(np.intp), max_depth=int(data["max_depth"]),
+                    # XGBoost leaves keep their value in the threshold slot.
+                    value=data["value"] if "value" in data.files else data["threshold"])
+
+
+class ForestEnsemble(_FlatTrees):
+    """Several fitted random forests flattened into one set of node arrays.
+
+    All trees of all forests are walked together, level by level, so one call
+    scores every forest for a whole batch.
+    """
+
+    kind = "forest"
+
+    def __init__(self, names, feature_names, n_features, classes, tree_slices, roots,
+                 feature, threshold, left, right, value, max_depth):
+        self.names = list(names)
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.n_features = n_features
+        self.classes = classes          # per forest: array of class labels
+        self.tree_slices = tree_slices  # per forest: (first_tree, end_tree) into roots
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value              # (n_nodes, max_classes) leaf class probabilities
+        self.max_depth = max_depth
+
+    @classmethod
+    def from_forests(cls, forests):
+        """Compiles a ``{name: model}`` mapping into one ensemble.
+
+        Each model is a fitted RandomForestClassifier or a single-forest
+        ForestEnsemble (e.g. one loaded from ``.npz``). Every forest must have
+        been fitted on the same feature columns.
+        """
+        parts = {}
+        for name, model in forests.items():
+            if not isinstance(model, ForestEnsemble):
+                model = cls._from_forest(model)
+            elif len(model.names) != 1:
+                raise ValueError(f"Model '{name}' holds {len(model.names)} forests, expected one.")
+            parts[name] = model
+        return cls._combine(parts)
+
+    @classmethod
+    def _from_forest(cls, forest):
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(offset, offset + n_nodes, dtype=np.int64)
+            is_leaf = tree.children_left == -1
+
+            # Same normalisation as DecisionTreeClassifier.predict_proba.
+            value = tree.value[:, 0, :]
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(tree.threshold)
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+            values.append(value / normalizer)
+            roots.append(offset)
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            [None], getattr(forest, "feature_names_in_", None), forest.n_features_in_,
+            [np.asarray(forest.classes_)], [(0, len(roots))], np.asarray(roots, dtype=np.intp),
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            value=np.concatenate(values).astype(np.float64),
+            max_depth=max_depth,
+        )
+
+    @classmethod
+    def _combine(cls, parts):
+        names = list(parts)
+        first = parts[names[0]]
+        for name in names[1:]:
+            part = parts[name]
+            if part.n_features != first.n_features:
+                raise ValueError(f"Model '{name}' expects {part.n_features} features, not {first.n_features}.")
+            if first.feature_names is not None and part.feature_names not in (None, first.feature_names):
+                raise ValueError(f"Model '{name}' was fitted on different feature columns.")
+        if len(parts) == 1:
+            return cls(names, first.feature_names, first.n_features, first.classes, first.tree_slices, first.roots,
+                       first.feature, first.threshold, first.left, first.right, first.value, first.max_depth)
+
+        max_classes = max(part.value.shape[1] for part in parts.values())
+        roots, lefts, rights, values, tree_slices = [], [], [], [], []
+        node_offset = tree_offset = 0
+        for part in parts.values():
+            roots.append(part.roots + node_offset)
+            lefts.append(part.left + node_offset)
+            rights.append(part.right + node_offset)
+            values.append(np.pad(part.value, ((0, 0), (0, max_classes - part.value.shape[1]))))
+            tree_slices.extend((start + tree_offset, end + tree_offset) for start, end in part.tree_slices)
+            node_offset += len(part.left)
+            tree_offset += len(part.roots)
+        return cls(
+            names, first.feature_names, first.n_features, [c for part in parts.values() for c in part.classes],
+            tree_slices, np.concatenate(roots),
+            feature=np.concatenate([part.feature for part in parts.values()]),
+            threshold=np.concatenate([part.threshold for part in parts.values()]),
+            left=np.concatenate(lefts), right=np.concatenate(rights), value=np.concatenate(values),
+            max_depth=max(part.max_depth for part in parts.values()),
+        )
+
+    def _go_left(self, values, nodes):
+        return values <= self.threshold[nodes]
+
+    def predict_proba(self, X):
+        """Class probabilities per forest: ``{name: (n_samples, n_classes)}``."""
+        leaves = self.apply(X)
+        probas = {}
+        for name, (start, end), classes in zip(self.names, self.tree_slices, self.classes):
+            leaf_values = self.value[leaves[:, start:end], :len(classes)]
+            # Sum trees in order, exactly as RandomForestClassifier accumulates them.
+            proba = np.cumsum(leaf_values, axis=1)[:, -1, :]
+            probas[name] = proba / (end - start)
+        return probas
+
+    def predict(self, X):
+        """Class labels per forest: ``{name: (n_samples,)}``."""
+        return self.predict_with_proba(X)[0]
+
+    def predict_with_proba(self, X):
+        """Returns ``(labels, probabilities)``, both keyed by forest name."""
+        probas = self.predict_proba(X)
+        labels = {
+            name: classes.take(np.argmax(probas[name], axis=1))
+            for name, classes in zip(self.names, self.classes)
+        }
+        return labels, probas
+
+    def _extra_arrays(self):
+        return {"names": np.array(["" if name is None else name for name in self.names], dtype=str),
+                "classes": np.concatenate(self.classes),
+                "class_counts": np.array([len(classes) for classes in self.classes]),
+                "tree_slices": np.array(self.tree_slices, dtype=np.int64).reshape(-1, 2)}
+
+    @classmethod
+    def _from_arrays(cls, data):
+        names = [str(name) or None for name in data["names"]]
+        classes = np.split(data["classes"], np.cumsum(data["class_counts"])[:-1])
+        feature_names = [str(name) for name in data["feature_names"]] or None
+        return cls(names, feature_names, int(data["n_features"]), classes,
+                   [tuple(map(int, pair)) for pair in data["tree_slices"]], **cls._node_arrays(data))
+
+
+class BoostedTrees(_FlatTrees):
+    """An XGBoost classifier (gbtree booster) flattened into node arrays.
+
+    Follows XGBoost's own arithmetic: a row goes left when ``x < split`` (missing
+    values take the node's default direction), leaf values are added to the
+    base margin tree by tree in float32, then the sigmoid/softmax is applied.
+
+    The split thresholds cut every feature into intervals, and all rows in the
+    same cell of that grid take the same path through every tree. When the grid
+    is small (the habit models use 2 and 4 features) the margin of each cell is
+    computed once, and scoring becomes a per-feature ``searchsorted`` plus a
+    table lookup instead of a tree walk.
+    """
+
+    kind = "xgboost"
+    OBJECTIVES = ("binary:logistic", "multi:softprob", "multi:softmax")
+
+    def __init__(self, feature_names, n_features, objective, classes, base_margin, tree_group, roots,
+                 feature, threshold, left, right, default_left, value, max_depth,
+                 cut_points=None, margin_table=None):
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.n_features = n_features
+        self.objective = objective
+        self.classes_ = classes
+        self.base_margin = base_margin  # (n_groups,) float32
+        self.tree_group = tree_group    # output group (class) of each tree
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold      # float32 split conditions
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value              # float32 leaf values
+        self.max_depth = max_depth
+        self._group_trees = [np.flatnonzero(tree_group == group) for group in range(len(base_margin))]
+        self.cut_points = cut_points      # per feature: sorted split thresholds
+        self.margin_table = margin_table  # (n_cells, n_groups) float32, or None
+
+    def build_table(self, max_cells=MAX_TABLE_CELLS):
+        """Precomputes ``margin_table``; returns False when the grid has more than ``max_cells``."""
+        internal = self.left != np.arange(len(self.left))
+        cut_points = [np.unique(self.threshold[internal & (self.feature == index)])
+                      for index in range(self.n_features)]
+        if np.prod([_n_cells(cuts) for cuts in cut_points], dtype=np.float64) > max_cells:
+            return False
+        # One representative value per cell: below the first cut, each cut itself
+        # (``x < split`` is false there up to the next cut) and missing.
+        representatives = [
+            np.concatenate([np.nextafter(cuts[:1], np.float32(-np.inf)), cuts, [np.nan]]).astype(np.float32)
+            if cuts.size else np.zeros(1, dtype=np.float32)
+            for cuts in cut_points
+        ]
+        grid = np.stack(np.meshgrid(*representatives, indexing="ij"), axis=-1).reshape(-1, self.n_features)
+        self.cut_points, self.margin_table = None, None
+        margin_table = self.predict_margin(grid)
+        self.cut_points, self.margin_table = cut_points, margin_table
+        return True
+
+    def _cells(self, X):
+        index = np.zeros(len(X), dtype=np.intp)
+        for feature, cuts in enumerate(self.cut_points):
+            if cuts.size:
+                values = X[:, feature]
+                cell = np.searchsorted(cuts, values, side="right")
+                cell[np.isnan(values)] = cuts.size + 1
+                index = index * _n_cells(cuts) + cell
+        return index
+
+    @classmethod
+    def from_xgboost(cls, model):
+        """Compiles a fitted XGBClassifier (or its Booster)."""
+        booster = model.get_booster() if hasattr(model, "get_booster") else model
+        learner = json.loads(bytes(booster.save_raw("json")))["learner"]
+        objective = learner["objective"]["name"]
+        if objective not in cls.OBJECTIVES:
+            raise ValueError(f"Unsupported XGBoost objective '{objective}'.")
+        if learner["gradient_booster"]["name"] != "gbtree":
+            raise ValueError(f"Unsupported XGBoost booster '{learner['gradient_booster']['name']}'.")
+        params = learner["learner_model_param"]
+        n_groups = max(int(params["num_class"]), 1)
+        base_score = np.array(params["base_score"].strip("[]").split(","), dtype=np.float32)
+        base_score = np.broadcast_to(base_score, (n_groups,))
+        if objective == "binary:logistic":
+            one = np.float32(1)
+            base_margin = -np.log(one / base_score - one)
+        else:
+            base_margin = base_score.copy()
+
+        gbtree = learner["gradient_booster"]["model"]
+        trees, tree_group = gbtree["trees"], np.asarray(gbtree["tree_info"], dtype=np.intp)
+        best_iteration = getattr(model, "best_iteration", None)
+        if best_iteration is not None:  # XGBClassifier.predict stops there too
+            n_trees = (best_iteration + 1) * n_groups * int(gbtree["gbtree_model_param"]["num_parallel_tree"])
+            trees, tree_group = trees[:n_trees], tree_group[:n_trees]
+
+        features, thresholds, lefts, rights, defaults, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for tree in trees:
+            if any(tree["split_type"]):
+                raise ValueError("Categorical splits are not supported.")
+            children_left = np.asarray(tree["left_children"], dtype=np.int64)
+            is_leaf = children_left == -1
+            node_ids = np.arange(offset, offset + len(children_left), dtype=np.int64)
+            features.append(np.where(is_leaf, 0, tree["split_indices"]))
+            # A leaf keeps its value in split_conditions.
+            thresholds.append(np.asarray(tree["split_conditions"], dtype=np.float32))
+            lefts.append(np.where(is_leaf, node_ids, children_left + offset))
+            rights.append(np.where(is_leaf, node_ids, np.asarray(tree["right_children"]) + offset))
+            defaults.append(np.asarray(tree["default_left"], dtype=bool))
+            roots.append(offset)
+            offset += len(children_left)
+            max_depth = max(max_depth, _depth(tree["parents"]))
+
+        threshold = np.concatenate(thresholds)
+        classes = np.asarray(getattr(model, "classes_", np.arange(max(n_groups, 2))))
+        return cls(
+            booster.feature_names, int(params["num_feature"]), objective, classes, base_margin, tree_group,
+            np.asarray(roots, dtype=np.intp),
+            feature=np.concatenate(features).astype(np.intp), threshold=threshold,
+            left=np.concatenate(lefts).astype(np.intp), right=np.concatenate(rights).astype(np.intp),
+            default_left=np.concatenate(defaults), value=threshold, max_depth=max_depth,
+        )
+
+    def _go_left(self, values, nodes):
+        return np.where(np.isnan(values), self.default_left[nodes], values < self.threshold[nodes])
+
+    def predict_margin(self, X):
+        """Raw scores before the sigmoid/softmax, shape ``(n_samples, n_groups)``."""
+        X = self._as_matrix(X)
+        if self.margin_table is not None:
+            return self.margin_table[self._cells(X)]
+        leaf_values = self.value[self.apply(X)]
+        margins = np.empty((len(leaf_values), len(self.base_margin)), dtype=np.float32)
+        for group, trees in enumerate(self._group_trees):
+            base = np.full((len(leaf_values), 1), self.base_margin[group], dtype=np.float32)
+            # Sequential float32 sum starting from the base margin, as XGBoost adds them.
+            margins[:, group] = np.cumsum(np.hstack([base, leaf_values[:, trees]]), axis=1, dtype=np.float32)[:, -1]
+        return margins
+
+    def predict_proba(self, X):
+        """Class probabilities, shape ``(n_samples, n_classes)``, like XGBClassifier.
+
+        Softmax output is bit-identical; the sigmoid can differ from XGBoost's
+        by one float32 ulp where libm's expf is not correctly rounded.
+        """
+        margins = self.predict_margin(X)
+        if self.objective == "binary:logistic":
+            # XGBoost: 1 / (expf(min(-x, 88.7)) + 1 + 1e-16), all in float32.
+            exp = _expf(np.minimum(-margins[:, 0], np.float32(88.7)))
+            positive = np.float32(1) / (exp + np.float32(1) + np.float32(1e-16))
+            return np.column_stack([np.float32(1) - positive, positive])
+        exp = _expf(margins - margins.max(axis=1, keepdims=True))
+        # XGBoost sums the exponentials in double, one class after another.
+        total = np.zeros(len(exp), dtype=np.float64)
+        for group in range(exp.shape[1]):
+            total += exp[:, group]
+        return exp / total.astype(np.float32)[:, np.newaxis]
+
+    def predict(self, X):
+        """Class labels, shape ``(n_samples,)``."""
+        proba = self.predict_proba(X)
+        if self.objective == "binary:logistic":
+            return self.classes_.take((proba[:, 1] > 0.5).astype(np.intp))
+        return self.classes_.take(np.argmax(proba, axis=1))
+
+    def _extra_arrays(self):
+        arrays = {"objective": np.array(self.objective), "classes": self.classes_, "base_margin": self.base_margin,
+                "tree_group": self.tree_group.astype(np.int32), "default_left": self.default_left}
+        if self.margin_table is not None:
+            arrays.update(cut_points=np.concatenate(self.cut_points),
+                          cut_counts=np.array([cuts.size for cuts in self.cut_points]),
+                          margin_table=self.margin_table)
+        return arrays
+
+    @classmethod
+    def _from_arrays(cls, data):
+        feature_names = [str(name) for name in data["feature_names"]] or None
+        table = {}
+        if "margin_table" in data.files:
+            table = dict(cut_points=np.split(data["cut_points"], np.cumsum(data["cut_counts"])[:-1]),
+                         margin_table=data["margin_table"])
+        return cls(feature_names, int(data["n_features"]), str(data["objective"]), data["classes"],
+                   data["base_margin"], data["tree_group"].astype(np.intp),
+                   default_left=data["default_left"], **cls._node_arrays(data), **table)
+
+
+def _n_cells(cuts):
+    """Cells a feature contributes to the grid: the gaps between its cuts plus
+    one for missing values, or a single cell when no tree splits on it."""
+    return cuts.size + 2 if cuts.size else 1
+
+
+def _expf(x):
+    """float32 exp rounded from float64, which matches C's expf far more often
+    than NumPy's own float32 exp."""
+    return np.exp(x.astype(np.float64)).astype(np.float32)
+
+
+def _depth(parents):
+    """Depth of a tree given its parent array (the root's parent is 2**31 - 1)."""
+    depth = np.zeros(len(parents), dtype=np.int64)
+    for node, parent in enumerate(parents):
+        if node and parent < len(parents):
+            depth[node] = depth[parent] + 1
+    return int(depth.max())
+
+
+_KINDS = {cls.kind: cls for cls in (ForestEnsemble, BoostedTrees)}
+
+
+def load_compiled(path):
+    """Loads a ForestEnsemble or BoostedTrees saved with ``save``."""
+    with np.load(path, allow_pickle=False) as data:
+        if int(data["version"]) != FORMAT_VERSION:
+            raise ValueError(f"{os.path.basename(path)} has format version {int(data['version'])}, "
+                             f"expected {FORMAT_VERSION}; re-run export_models.py.")
+        return _KINDS[str(data["kind"])]._from_arrays(data)
+
+
+_compiled = {}
+_compiled_lock = threading.Lock()
+
+
+def compiled_forests(forests):
+    """Returns a ForestEnsemble for ``forests``, recompiling only when a model object changes.
+
+    Meant to sit behind the model registry: a reloaded model is a new object,
+    so the cached ensemble is rebuilt the first time it is seen.
+    """
+    names = tuple(forests)
+    identity = tuple(id(forests[name]) for name in names)
+    with _compiled_lock:
+        cached = _compiled.get(names)
+        if cached is not None and cached[0] == identity:
+            return cached[1]
+        engine = ForestEnsemble.from_forests(forests)
+        # Keep the source models referenced so their ids cannot be reused while cached.
+        _compiled[names] = (identity, engine, dict(forests))
+        return engine
@@ -1,98 +1,735 @@
 import streamlit as st
 import sqlite3
+import atexit
+import base64
+import collections
 import hashlib
+import hmac
 import datetime
+import itertools
+import json
+import os
+import queue
+import secrets
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
 
+from instrumentation import start_rerun, timed
+
+DB_PATH = "users.db"
+POOL_SIZE = 8
+
+# ---------- CONNECTION POOL ----------
+class ConnectionPool:
+    """Keeps a small set of long-lived SQLite connections for one database file.
+
+    Connections are opened in WAL mode with ``synchronous=NORMAL`` so readers
+    never block the writer and a commit does not wait for a full fsync.
+    """
+
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue(maxsize=size)
+
+    @timed("db.connect")
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(path=None):
+    path = path or DB_PATH
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = ConnectionPool(path)
+        return pool
+
+@contextmanager
+def get_connection():
+    """Borrows a pooled connection to ``DB_PATH``; use ``with conn:`` for a transaction."""
+    with get_pool().connection() as conn:
+        yield conn
+
+def close_connections():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close_all()
+
+# ---------- SCHEMA MIGRATIONS ----------
+# Each entry upgrades the schema by one version; PRAGMA user_version stores the
+# number of entries applied. Append new migrations, never edit released ones.
+MIGRATIONS = [
+    # 1: base tables
+    ['''CREATE TABLE IF NOT EXISTS users (
+           username TEXT PRIMARY KEY,
+           password TEXT)''',
+     '''CREATE TABLE IF NOT EXISTS history (
+           username TEXT,
+           action TEXT,
+           timestamp TEXT,
+           metadata TEXT)''',
+     '''CREATE TABLE IF NOT EXISTS health_data (
+           username TEXT,
+           timestamp TEXT,
+           age INTEGER,
+           sex TEXT,
+           height REAL,
+           weight REAL,
+           gamma_GTP REAL,
+           smoking_prediction INTEGER,
+           drinking_prediction INTEGER,
+           SBP REAL,
+           DBP REAL,
+           BLDS REAL,
+           PRIMARY KEY (username, timestamp))'''],
+    # 2: per-user history in time order
+    ["CREATE INDEX IF NOT EXISTS idx_history_username_timestamp ON history (username, timestamp)"],
+    # 3: store health_data clustered on its (username, timestamp) key, so a
+    #    user's rows are one contiguous, already sorted range that covers every column
+    ['''CREATE TABLE health_data_new (
+           username TEXT,
+           timestamp TEXT,
+           age INTEGER,
+           sex TEXT,
+           height REAL,
+           weight REAL,
+           gamma_GTP REAL,
+           smoking_prediction INTEGER,
+           drinking_prediction INTEGER,
+           SBP REAL,
+           DBP REAL,
+           BLDS REAL,
+           PRIMARY KEY (username, timestamp)) WITHOUT ROWID''',
+     "INSERT INTO health_data_new SELECT * FROM health_data",
+     "DROP TABLE health_data",
+     "ALTER TABLE health_data_new RENAME TO health_data"],
+    # 4: running per-user aggregates for the dashboard, one row per
+    #    (sex, age, smoking, drinking) cell; '' and -1 stand in for missing keys
+    ['''CREATE TABLE health_summary (
+           username TEXT NOT NULL,
+           sex TEXT NOT NULL,
+           age INTEGER NOT NULL,
+           smoking_prediction INTEGER NOT NULL,
+           drinking_prediction INTEGER NOT NULL,
+           n_rows INTEGER NOT NULL,
+           SBP_count INTEGER NOT NULL, SBP_sum REAL NOT NULL, SBP_sumsq REAL NOT NULL,
+           DBP_count INTEGER NOT NULL, DBP_sum REAL NOT NULL, DBP_sumsq REAL NOT NULL,
+           BLDS_count INTEGER NOT NULL, BLDS_sum REAL NOT NULL, BLDS_sumsq REAL NOT NULL,
+           gamma_GTP_count INTEGER NOT NULL, gamma_GTP_sum REAL NOT NULL, gamma_GTP_sumsq REAL NOT NULL,
+           bmi_count INTEGER NOT NULL, bmi_sum REAL NOT NULL, bmi_sumsq REAL NOT NULL,
+           PRIMARY KEY (username, sex, age, smoking_prediction, drinking_prediction)) WITHOUT ROWID''',
+     '''INSERT INTO health_summary
+        SELECT username, IFNULL(sex, ''), IFNULL(age, -1), IFNULL(smoking_prediction, -1),
+               IFNULL(drinking_prediction, -1), COUNT(*),
+               COUNT(SBP), TOTAL(SBP), TOTAL(SBP * SBP),
+               COUNT(DBP), TOTAL(DBP), TOTAL(DBP * DBP),
+               COUNT(BLDS), TOTAL(BLDS), TOTAL(BLDS * BLDS),
+               COUNT(gamma_GTP), TOTAL(gamma_GTP), TOTAL(gamma_GTP * gamma_GTP),
+               COUNT(bmi), TOTAL(bmi), TOTAL(bmi * bmi)
+        FROM (SELECT *, weight / ((height / 100.0) * (height / 100.0)) AS bmi FROM health_data)
+        GROUP BY 1, 2, 3, 4, 5'''],
+]
+
+def schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn, target=None):
+    """Applies pending migrations up to ``target`` (default: latest), one transaction each.
+
+    An up-to-date database is only read, so calling this on every rerun does not
+    take the write lock.
+    """
+    target = len(MIGRATIONS) if target is None else target
+    version = schema_version(conn)
+    if version >= target:
+        return version
+    while True:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Re-read inside the write lock in case another process migrated meanwhile.
+            version = schema_version(conn)
+            if version >= target:
+                conn.rollback()
+                return version
+            for statement in MIGRATIONS[version]:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {version + 1}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+@timed("db.init_db")
 def init_db():
-    conn = sqlite3.connect("users.db")
-    c = conn.cursor()
-
-    # Users table
-    c.execute('''CREATE TABLE IF NOT EXISTS users (
-                 username TEXT PRIMARY KEY,
-                 password TEXT)''')
-    # History table
-    c.execute('''CREATE TABLE IF NOT EXISTS history (
-                 username TEXT,
-                 action TEXT,
-                 timestamp TEXT,
-                 metadata TEXT)''')
-    # Health_data table
-    c.execute('''CREATE TABLE IF NOT EXISTS health_data (
-                 username TEXT,
-                 timestamp TEXT,
-                 age INTEGER,
-                 sex TEXT,
-                 height REAL,
-                 weight REAL,
-                 gamma_GTP REAL,
-                 smoking_prediction INTEGER,
-                 drinking_prediction INTEGER,
-                 SBP REAL,
-                 DBP REAL,
-                 BLDS REAL,
-                 PRIMARY KEY (username, timestamp))''')
-    conn.commit()
-    conn.close()
+    with get_connection() as conn:
+        migrate(conn)
+
+# ---------- PASSWORDS & SESSIONS ----------
+# Passwords are stored as "pbkdf2_sha256$<iterations>$<salt>$<hash>" (base64 salt
+# and hash). Rows still holding the old unsalted SHA-256 hex digest, or fewer
+# iterations than PBKDF2_ITERATIONS, are rehashed when their owner next logs in.
+PASSWORD_ALGORITHM = "pbkdf2_sha256"
+PBKDF2_ITERATIONS = 600_000
+SALT_BYTES = 16
+SESSION_TTL_SECONDS = 12 * 60 * 60
+# Session tokens live in st.session_state, which does not survive a restart,
+# so a key generated per process is enough to sign them.
+_SESSION_KEY = secrets.token_bytes(32)
 
+@timed("db.add_user")
 def add_user(username, password):
-    conn = sqlite3.connect("users.db")
-    c = conn.cursor()
-    c.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, password))
-    conn.commit()
-    conn.close()
+    """Stores ``password`` as given; pass it through ``hash_password`` first."""
+    with get_connection() as conn, conn:
+        conn.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, password))
 
+def hash_password(password, salt=None, iterations=PBKDF2_ITERATIONS):
+    salt = os.urandom(SALT_BYTES) if salt is None else salt
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, iterations)
+    return "$".join([PASSWORD_ALGORITHM, str(iterations),
+                     base64.b64encode(salt).decode("ascii"), base64.b64encode(digest).decode("ascii")])
+
+def check_password(password, stored):
+    """Returns ``(matches, needs_rehash)`` for a stored hash in either the current or the legacy format."""
+    if "$" not in stored:  # legacy unsalted SHA-256 hex digest
+        legacy = hashlib.sha256(password.encode()).hexdigest()
+        return hmac.compare_digest(legacy, stored), True
+    algorithm, iterations, salt, digest = stored.split("$", 3)
+    if algorithm != PASSWORD_ALGORITHM:
+        raise ValueError(f"Unknown password hash algorithm '{algorithm}'")
+    candidate = hashlib.pbkdf2_hmac("sha256", password.encode(), base64.b64decode(salt), int(iterations))
+    return hmac.compare_digest(candidate, base64.b64decode(digest)), int(iterations) < PBKDF2_ITERATIONS
+
+@timed("db.authenticate_user")
 def authenticate_user(username, password):
-    conn = sqlite3.connect("users.db")
-    c = conn.cursor()
-    c.execute("SELECT password FROM users WHERE username = ?", (username,))
-    data = c.fetchone()
-    conn.close()
-    if data and data[0] == password:
-        return True
-    return False
+    """Checks the plain-text ``password``; on success a legacy or cheaper hash is replaced."""
+    with get_connection() as conn:
+        data = conn.execute("SELECT password FROM users WHERE username = ?", (username,)).fetchone()
+    if data is None:
+        # Hash anyway so the response time does not reveal which usernames exist.
+        hashlib.pbkdf2_hmac("sha256", password.encode(), bytes(SALT_BYTES), PBKDF2_ITERATIONS)
+        return False
+    matches, needs_rehash = check_password(password, data[0])
+    if matches and needs_rehash:
+        with get_connection() as conn, conn:
+            # Only replace the hash that was checked, in case the password changed meanwhile.
+            conn.execute("UPDATE users SET password = ? WHERE username = ? AND password = ?",
+                         (hash_password(password), username, data[0]))
+    return matches
+
+def issue_session_token(username, ttl_seconds=SESSION_TTL_SECONDS):
+    """Signed ``username|expiry|signature`` token; checking it costs one HMAC instead of a password hash."""
+    payload = f"{username}|{int(time.time()) + ttl_seconds}"
+    signature = hmac.new(_SESSION_KEY, payload.encode(), hashlib.sha256).hexdigest()
+    return f"{payload}|{signature}"
+
+def session_user(token):
+    """The username a valid, unexpired token was issued for, otherwise None."""
+    try:
+        username, expires, signature = token.rsplit("|", 2)
+        expired = int(expires) < time.time()
+    except (AttributeError, ValueError):
+        return None
+    expected = hmac.new(_SESSION_KEY, f"{username}|{expires}".encode(), hashlib.sha256).hexdigest()
+    if expired or not hmac.compare_digest(signature, expected):
+        return None
+    return username
 
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
+def is_authenticated():
+    """True when this session holds a valid token for ``st.session_state.user``."""
+    username = session_user(st.session_state.get("session_token"))
+    return username is not None and username == st.session_state.get("user")
+
+def require_login(page):
+    """First call of every page: stops it unless logged in, then starts timing the rerun of ``page``.
+    Pages call it before their other imports, so a logged-out visit stays cheap."""
+    if not is_authenticated():
+        st.warning('Silahkan login terlebih dahulu.')
+        st.stop()
+    start_rerun(page)
 
 # ---------- HEALTH DATA ----------
+HEALTH_DATA_INSERT = """INSERT INTO health_data (username, timestamp, age, sex, height, weight, gamma_GTP,
+                        smoking_prediction, drinking_prediction, SBP, DBP, BLDS)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+# Record fields in add_health_data argument order; the last three are optional.
+HEALTH_RECORD_FIELDS = ('age', 'sex', 'height', 'weight', 'gamma_GTP', 'smoking_prediction',
+                        'drinking_prediction', 'SBP', 'DBP', 'BLDS')
+_OPTIONAL_RECORD_FIELDS = ('SBP', 'DBP', 'BLDS')
+# Metrics health_summary keeps a count, sum and sum of squares for.
+SUMMARY_METRICS = ('SBP', 'DBP', 'BLDS', 'gamma_GTP', 'bmi')
+# Adds the user's rows from a given timestamp on to health_summary. Run in the
+# inserting transaction right after the rows, whose timestamps are all newer
+# than anything stored before (see _allocate_timestamps).
+HEALTH_SUMMARY_UPSERT = """INSERT INTO health_summary
+        SELECT username, IFNULL(sex, ''), IFNULL(age, -1), IFNULL(smoking_prediction, -1),
+               IFNULL(drinking_prediction, -1), COUNT(*),
+               COUNT(SBP), TOTAL(SBP), TOTAL(SBP * SBP),
+               COUNT(DBP), TOTAL(DBP), TOTAL(DBP * DBP),
+               COUNT(BLDS), TOTAL(BLDS), TOTAL(BLDS * BLDS),
+               COUNT(gamma_GTP), TOTAL(gamma_GTP), TOTAL(gamma_GTP * gamma_GTP),
+               COUNT(bmi), TOTAL(bmi), TOTAL(bmi * bmi)
+        FROM (SELECT *, weight / ((height / 100.0) * (height / 100.0)) AS bmi FROM health_data)
+        WHERE username = ? AND timestamp >= ?
+        GROUP BY 1, 2, 3, 4, 5
+        ON CONFLICT (username, sex, age, smoking_prediction, drinking_prediction) DO UPDATE SET
+            n_rows = n_rows + excluded.n_rows,
+            """ + ",\n            ".join(
+                f"{metric}_{part} = {metric}_{part} + excluded.{metric}_{part}"
+                for metric in SUMMARY_METRICS for part in ('count', 'sum', 'sumsq'))
+
+@contextmanager
+def _write_transaction(conn):
+    """BEGIN IMMEDIATE takes the write lock up front, so reads inside see no concurrent writer."""
+    with timed("db.write_lock"):  # time spent waiting for other writers
+        conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+def _allocate_timestamps(conn, username, start=None):
+    """Returns an iterator of increasing ISO timestamps from ``start`` (default: now),
+    moved later if needed so they follow the user's newest row.
+
+    Must be called inside _write_transaction: holding the write lock is what
+    keeps another writer from taking the same (username, timestamp) keys.
+    """
+    start = start or datetime.datetime.now()
+    last = conn.execute("SELECT MAX(timestamp) FROM health_data WHERE username = ?", (username,)).fetchone()[0]
+    if last is not None:
+        last = datetime.datetime.fromisoformat(last)
+        if last >= start:
+            start = last + datetime.timedelta(microseconds=1)
+    return ((start + datetime.timedelta(microseconds=step)).isoformat(timespec='microseconds')
+            for step in itertools.count())
+
+def _record_tuples(records):
+    """Normalises a DataFrame, dicts or tuples into HEALTH_RECORD_FIELDS-ordered tuples."""
+    if hasattr(records, 'itertuples'):  # pandas DataFrame
+        lookup = {str(col).lower(): col for col in records.columns}
+        columns = {}
+        for field in HEALTH_RECORD_FIELDS:
+            col = lookup.get(field.lower())
+            if col is None and field not in _OPTIONAL_RECORD_FIELDS:
+                raise ValueError(f"Missing column '{field}'")
+            columns[field] = col
+        frame = records[[col for col in columns.values() if col is not None]]
+        # object dtype turns numpy scalars into Python ones and lets NaN become None.
+        frame = frame.astype(object).where(frame.notnull(), None)
+        values = iter(frame.itertuples(index=False, name=None))
+        present = [field for field, col in columns.items() if col is not None]
+        if len(present) == len(HEALTH_RECORD_FIELDS):
+            yield from values
+        else:
+            for row in values:
+                row = dict(zip(present, row))
+                yield tuple(row.get(field) for field in HEALTH_RECORD_FIELDS)
+        return
+    for record in records:
+        if isinstance(record, dict):
+            lookup = {key.lower(): value for key, value in record.items()}
+            yield tuple(lookup.get(field.lower()) for field in HEALTH_RECORD_FIELDS)
+        else:
+            record = tuple(record)
+            yield record + (None,) * (len(HEALTH_RECORD_FIELDS) - len(record))
+
+@timed("db.add_health_data")
 def add_health_data(username, age, sex, height, weight, gamma_gtp, smoking_prediction, drinking_prediction, sbp=None, dbp=None, blds=None):
-    conn = sqlite3.connect("users.db")
-    c = conn.cursor()
-    timestamp = datetime.datetime.now().isoformat()
-    c.execute("""INSERT INTO health_data (username, timestamp, age, sex, height, weight, gamma_GTP,
-                 smoking_prediction, drinking_prediction, SBP, DBP, BLDS)
-                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-              (username, timestamp, age, sex, height, weight, gamma_gtp,
-               smoking_prediction, drinking_prediction, sbp, dbp, blds))
-    conn.commit()
-    conn.close()
+    with get_connection() as conn, _write_transaction(conn):
+        timestamp = next(_allocate_timestamps(conn, username))
+        conn.execute(HEALTH_DATA_INSERT,
+                     (username, timestamp, age, sex, height, weight, gamma_gtp,
+                      smoking_prediction, drinking_prediction, sbp, dbp, blds))
+        conn.execute(HEALTH_SUMMARY_UPSERT, (username, timestamp))
+
+@timed("db.add_health_data_bulk")
+def add_health_data_bulk(username, records):
+    """Inserts many rows for one user with executemany in a single transaction.
+
+    ``records`` is a DataFrame (columns named like HEALTH_RECORD_FIELDS, any case),
+    an iterable of dicts with those keys, or an iterable of tuples in
+    add_health_data argument order. SBP, DBP and BLDS may be omitted. Every row
+    gets a distinct timestamp after the user's newest existing row. Returns the
+    number of rows inserted.
+    """
+    with get_connection() as conn, _write_transaction(conn):
+        timestamps = _allocate_timestamps(conn, username)
+        first = next(timestamps)
+        rows = ((username, timestamp, *record)
+                for timestamp, record in zip(itertools.chain([first], timestamps), _record_tuples(records)))
+        inserted = conn.executemany(HEALTH_DATA_INSERT, rows).rowcount
+        conn.execute(HEALTH_SUMMARY_UPSERT, (username, first))
+        return inserted
 
+@timed("db.get_latest_health_data")
 def get_latest_health_data(username):
-    conn = sqlite3.connect("users.db")
-    c = conn.cursor()
-    c.execute("""SELECT age, sex, height, weight, gamma_GTP, smoking_prediction, drinking_prediction, SBP, DBP, BLDS, timestamp
-                 FROM health_data WHERE username = ? ORDER BY timestamp DESC LIMIT 1""", (username,))
-    data = c.fetchone()
-    conn.close()
+    with get_connection() as conn:
+        data = conn.execute("""SELECT age, sex, height, weight, gamma_GTP, smoking_prediction, drinking_prediction, SBP, DBP, BLDS, timestamp
+                               FROM health_data WHERE username = ? ORDER BY timestamp DESC LIMIT 1""", (username,)).fetchone()
     return data # Returns a tuple or None
 
+@timed("db.get_all_health_data")
 def get_all_health_data(username):
-    conn = sqlite3.connect("users.db")
-    c = conn.cursor()
-    c.execute("""SELECT age, sex, height, weight, gamma_GTP, smoking_prediction, drinking_prediction, SBP, DBP, BLDS, timestamp
-                 FROM health_data WHERE username = ? ORDER BY timestamp ASC""", (username,))
-    data = c.fetchall()
-    conn.close()
+    with get_connection() as conn:
+        data = conn.execute("""SELECT age, sex, height, weight, gamma_GTP, smoking_prediction, drinking_prediction, SBP, DBP, BLDS, timestamp
+                               FROM health_data WHERE username = ? ORDER BY timestamp ASC""", (username,)).fetchall()
     return data # Returns a list of tuples
 
+HEALTH_DATA_COLUMNS = ('age', 'sex', 'height', 'weight', 'gamma_GTP', 'smoking_prediction',
+                       'drinking_prediction', 'SBP', 'DBP', 'BLDS', 'timestamp')
+
+def _timestamp_key(value):
+    """ISO string for a datetime/date/str bound; ISO strings sort chronologically."""
+    if value is None or isinstance(value, str):
+        return value
+    return value.isoformat()
+
+def _projection(columns):
+    columns = list(columns) if columns else list(HEALTH_DATA_COLUMNS)
+    unknown = [col for col in columns if col not in HEALTH_DATA_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown health_data columns: {unknown}")
+    return columns
+
+def _range_query(select_columns, start, end, after):
+    conditions = ["username = ?"]
+    params = []
+    for clause, value in (("timestamp >= ?", start), ("timestamp < ?", end), ("timestamp > ?", after)):
+        if value is not None:
+            conditions.append(clause)
+            params.append(_timestamp_key(value))
+    sql = f"SELECT {', '.join(select_columns)} FROM health_data WHERE {' AND '.join(conditions)} ORDER BY timestamp ASC"
+    return sql, params
+
+@timed("db.get_health_data_bounds")
+def get_health_data_bounds(username):
+    """Returns (first_timestamp, last_timestamp, row_count) for a user, or None if they have no data."""
+    with get_connection() as conn:
+        first, last, count = conn.execute("""SELECT MIN(timestamp), MAX(timestamp), COUNT(*)
+                                             FROM health_data WHERE username = ?""", (username,)).fetchone()
+    return (first, last, count) if count else None
+
+@timed("db.get_health_data_range")
+def get_health_data_range(username, start=None, end=None, columns=None):
+    """Rows with start <= timestamp < end (either bound optional), oldest first.
+
+    ``columns`` selects a subset of HEALTH_DATA_COLUMNS (default: all, in
+    get_all_health_data order). Returns a list of tuples.
+    """
+    sql, params = _range_query(_projection(columns), start, end, None)
+    with get_connection() as conn:
+        return conn.execute(sql, [username, *params]).fetchall()
+
+@timed("db.get_health_data_page")
+def get_health_data_page(username, start=None, end=None, columns=None, after=None, limit=500):
+    """One page of get_health_data_range, using keyset pagination on timestamp.
+
+    Pass the returned cursor back as ``after`` to fetch the next page.
+    Returns (rows, cursor); cursor is None after the last page.
+    """
+    columns = _projection(columns)
+    # The cursor needs each row's timestamp even when it is not projected.
+    with_timestamp = 'timestamp' not in columns
+    select_columns = columns + ['timestamp'] if with_timestamp else columns
+    sql, params = _range_query(select_columns, start, end, after)
+    with get_connection() as conn:
+        rows = conn.execute(sql + " LIMIT ?", [username, *params, limit]).fetchall()
+    cursor = rows[-1][select_columns.index('timestamp')] if len(rows) == limit else None
+    if with_timestamp:
+        rows = [row[:-1] for row in rows]
+    return rows, cursor
+
+@timed("db.get_health_summary")
+def get_health_summary(username):
+    """The user's running aggregates, one dict per (sex, age, smoking_prediction,
+    drinking_prediction) cell, with None for keys the rows did not have.
+
+    Each cell also holds ``n_rows`` and ``<metric>_count``, ``_sum`` and
+    ``_sumsq`` for every SUMMARY_METRICS entry. Reading it costs the same
+    however long the user's history is.
+    """
+    columns = ['n_rows'] + [f"{metric}_{part}" for metric in SUMMARY_METRICS for part in ('count', 'sum', 'sumsq')]
+    with get_connection() as conn:
+        cursor = conn.execute(f"""SELECT NULLIF(sex, ''), NULLIF(age, -1), NULLIF(smoking_prediction, -1),
+                                         NULLIF(drinking_prediction, -1), {', '.join(columns)}
+                                  FROM health_summary WHERE username = ?""", (username,))
+        names = ['sex', 'age', 'smoking_prediction', 'drinking_prediction'] + columns
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+@timed("db.delete_all_health_data")
 def delete_all_health_data(username):
-    """Deletes all health data entries for a specific user."""
-    conn = sqlite3.connect("users.db")
-    c = conn.cursor()
-    c.execute("DELETE FROM health_data WHERE username = ?", (username,))
-    conn.commit()
-    conn.close()
+    """Deletes all health data entries (and their summary) for a specific user.
+
+    Writes of the user still in the write-behind queue are committed first, so
+    they cannot reappear after the delete; raises TimeoutError like ``sync_writes``.
+    """
+    _drain_writes(username, WRITE_SYNC_TIMEOUT_SECONDS)
+    with get_connection() as conn, conn:
+        conn.execute("DELETE FROM health_data WHERE username = ?", (username,))
+        conn.execute("DELETE FROM health_summary WHERE username = ?", (username,))
+
+# ---------- WRITE-BEHIND QUEUE ----------
+# Pages queue health_data rows and history events instead of committing them
+# inside the rerun. One background thread commits whatever has queued up in a
+# single transaction (rows, their health_summary upsert and history events
+# together), at most WRITE_BEHIND_INTERVAL_MS after the first write arrived.
+# Anything reading a user's own writes calls sync_writes(username) first; the
+# queue is drained when the process exits. Pages hand the returned futures to
+# track_writes, so a failed commit is reported in that session afterwards.
+HISTORY_INSERT = "INSERT INTO history (username, action, timestamp, metadata) VALUES (?, ?, ?, ?)"
+WRITE_BEHIND_MAX_QUEUED = 10_000
+WRITE_BEHIND_MAX_BATCH = 500
+WRITE_BEHIND_INTERVAL_MS = 50
+WRITE_SYNC_TIMEOUT_SECONDS = 5
+
+class _Write:
+    __slots__ = ("kind", "username", "values", "submitted", "future")
+
+    def __init__(self, kind, username, values):
+        self.kind = kind  # 'health_data' or 'history'
+        self.username = username
+        self.values = values
+        self.submitted = datetime.datetime.now()
+        self.future = Future()
+
+def _commit_writes(conn, writes):
+    """Writes a batch inside the caller's _write_transaction. Rows keep their
+    submission time as timestamp (moved later only to stay unique per user)."""
+    first_timestamps = {}
+    for write in writes:
+        if write.kind == 'history':
+            conn.execute(HISTORY_INSERT, (write.username, write.values[0],
+                                          write.submitted.isoformat(timespec='microseconds'), write.values[1]))
+            continue
+        timestamp = next(_allocate_timestamps(conn, write.username, write.submitted))
+        conn.execute(HEALTH_DATA_INSERT, (write.username, timestamp, *write.values))
+        first_timestamps.setdefault(write.username, timestamp)
+    for username, first in first_timestamps.items():
+        conn.execute(HEALTH_SUMMARY_UPSERT, (username, first))
+
+class WriteBehindQueue:
+    """Commits queued writes in batches from one background thread.
+
+    ``put`` blocks while ``max_queued`` writes are already waiting, so a stalled
+    database slows the pages down instead of growing memory without bound.
+    """
+
+    def __init__(self, max_queued=WRITE_BEHIND_MAX_QUEUED, max_batch=WRITE_BEHIND_MAX_BATCH,
+                 interval_ms=WRITE_BEHIND_INTERVAL_MS):
+        self.max_queued = max_queued
+        self.max_batch = max_batch
+        self.interval = interval_ms / 1000
+        self._queue = collections.deque()
+        self._pending = collections.Counter()  # username -> writes queued or being committed
+        self._condition = threading.Condition()
+        self._flush_requested = False
+        self._worker = None
+        self._closed = False
+        self._batches = 0
+        self._written = 0
+        self._failed = 0
+        self._last_error = None
+
+    def put(self, kind, username, values):
+        """Queues one write; returns a Future that resolves once it is committed."""
+        write = _Write(kind, username, values)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("WriteBehindQueue is closed")
+            while len(self._queue) >= self.max_queued:
+                self._condition.wait()
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="WriteBehindQueue", daemon=True)
+                self._worker.start()
+            self._queue.append(write)
+            self._pending[username] += 1
+            self._condition.notify_all()
+        return write.future
+
+    def sync(self, username=None, timeout=None):
+        """Commits now and waits until no write of ``username`` (default: anyone) is
+        outstanding. Returns False if ``timeout`` seconds pass first."""
+        with self._condition:
+            self._flush_requested = True
+            self._condition.notify_all()
+            if username is None:
+                return self._condition.wait_for(lambda: not self._pending, timeout)
+            return self._condition.wait_for(lambda: username not in self._pending, timeout)
+
+    def close(self):
+        """Commits everything still queued, then stops the worker."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._worker is not None:
+            self._worker.join()
+
+    def _next_batch(self):
+        with self._condition:
+            while not self._queue:
+                if self._closed:
+                    return None
+                self._condition.wait()
+            deadline = time.monotonic() + self.interval
+            while len(self._queue) < self.max_batch and not (self._closed or self._flush_requested):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            self._flush_requested = False
+            batch = [self._queue.popleft() for _ in range(min(len(self._queue), self.max_batch))]
+            self._condition.notify_all()  # room for blocked put() calls
+            return batch
+
+    def _commit(self, batch):
+        """Commits ``batch`` in one transaction; returns the exception if it failed."""
+        try:
+            with timed("db.write_behind"), get_connection() as conn, _write_transaction(conn):
+                _commit_writes(conn, batch)
+        except Exception as exc:
+            return exc
+        return None
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            error = self._commit(batch)
+            if error is not None:
+                error = self._commit(batch)  # once more, e.g. after "database is locked"
+            with self._condition:
+                self._batches += 1
+                if error is None:
+                    self._written += len(batch)
+                else:
+                    self._failed += len(batch)
+                    self._last_error = f"{type(error).__name__}: {error}"
+                for write in batch:
+                    self._pending[write.username] -= 1
+                    if not self._pending[write.username]:
+                        del self._pending[write.username]
+                self._condition.notify_all()
+            for write in batch:
+                if error is None:
+                    write.future.set_result(None)
+                else:
+                    write.future.set_exception(error)
+
+    def stats(self):
+        with self._condition:
+            return {
+                "queued": len(self._queue),
+                "pending_users": len(self._pending),
+                "batches": self._batches,
+                "written": self._written,
+                "failed": self._failed,
+                "mean_batch": self._written / self._batches if self._batches else 0.0,
+                "last_error": self._last_error,
+            }
+
+_write_queue = None
+_write_queue_lock = threading.Lock()
+
+def get_write_queue():
+    """Returns the queue shared by all Streamlit sessions in this process."""
+    global _write_queue
+    with _write_queue_lock:
+        if _write_queue is None:
+            _write_queue = WriteBehindQueue()
+            atexit.register(_write_queue.close)
+        return _write_queue
+
+def queue_health_data(username, age, sex, height, weight, gamma_gtp, smoking_prediction, drinking_prediction, sbp=None, dbp=None, blds=None):
+    """add_health_data without waiting for the commit; returns a Future."""
+    return get_write_queue().put('health_data', username, (age, sex, height, weight, gamma_gtp,
+                                                           smoking_prediction, drinking_prediction, sbp, dbp, blds))
+
+def log_action(username, action, **metadata):
+    """Queues a ``history`` event; ``metadata`` is stored as JSON. Returns a Future."""
+    return get_write_queue().put('history', username, (action, json.dumps(metadata) if metadata else None))
+
+def track_writes(description, *futures):
+    """Remembers queued writes in this Streamlit session, so failed_writes can report them."""
+    pending = st.session_state.setdefault("pending_writes", [])
+    pending.extend((description, future) for future in futures)
+
+def failed_writes():
+    """This session's tracked writes that failed, as (description, exception) pairs.
+
+    Finished writes are forgotten, so each failure is returned once.
+    """
+    pending = st.session_state.get("pending_writes", [])
+    failed = [(description, future.exception()) for description, future in pending
+              if future.done() and future.exception() is not None]
+    st.session_state["pending_writes"] = [(description, future) for description, future in pending if not future.done()]
+    return failed
+
+def report_failed_writes(failures=None):
+    """Shows an error for each failed write (default: ``failed_writes()``)."""
+    failures = failed_writes() if failures is None else failures
+    # A row and its history event usually fail together, with the same error
+    for description, error in dict.fromkeys((description, str(error)) for description, error in failures):
+        st.error(f"Could not save {description}: {error}")
+
+def sync_writes(username=None, timeout=WRITE_SYNC_TIMEOUT_SECONDS):
+    """Waits until the queued writes of ``username`` (default: everyone) are committed,
+    then returns ``failed_writes()``.
+
+    Raises TimeoutError if they are still queued after ``timeout`` seconds
+    (``None`` waits as long as it takes).
+    """
+    _drain_writes(username, timeout)
+    return failed_writes()
+
+def _drain_writes(username, timeout):
+    with _write_queue_lock:
+        write_queue = _write_queue
+    if write_queue is not None and not write_queue.sync(username, timeout):
+        raise TimeoutError(f"queued writes not committed within {timeout} s")
+
+@timed("db.get_history")
+def get_history(username, limit=20):
+    """The user's latest ``history`` events, newest first, as (timestamp, action, metadata dict) tuples."""
+    with get_connection() as conn:
+        rows = conn.execute("""SELECT timestamp, action, metadata FROM history WHERE username = ?
+                               ORDER BY timestamp DESC LIMIT ?""", (username, limit)).fetchall()
+    return [(timestamp, action, json.loads(metadata) if metadata else {}) for timestamp, action, metadata in rows]
 
 def login():
     menu = st.sidebar.radio("Menu", ["Login", "Sign Up"])
@@ -108,6 +745,7 @@ def login():
             else:
                 try:
                     add_user(new_user, hash_password(new_pass))
+                    track_writes("sign-up history", log_action(new_user, "sign_up"))
                     st.success("Account created. Go to Login.")
                 except sqlite3.IntegrityError:
                     st.error("Username already exists.")
@@ -118,10 +756,12 @@ def login():
             password = st.text_input("Password", type="password")
             submit = st.form_submit_button('Login')
         if submit:
-            if authenticate_user(username, hash_password(password)):
+            if authenticate_user(username, password):
                 st.success(f"Welcome, {username}!")
                 st.session_state["user"] = username
-                st.session_state.authenticated = True
+                # Later reruns verify this token instead of hashing the password again.
+                st.session_state["session_token"] = issue_session_token(username)
+                track_writes("login history", log_action(username, "login"))
                 return True
             else:
                 st.error("Invalid credentials.")
@@ -129,4 +769,6 @@ def login():
 
 
 def logout():
-    st.session_state.authenticated = False
+    if is_authenticated():
+        track_writes("logout history", log_action(st.session_state.user, "logout"))
+    st.session_state.pop("session_token", None)